@@ -1,26 +1,20 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import yfinance as yf
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
-import matplotlib.pyplot as plt
-import finnhub
-from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
-import base64
-from streamlit import cache_data
-# from dotenv import load_dotenv  # Commented out to avoid dotenv error if not installed
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Uncomment the next line if you have python-dotenv installed and want to use .env
-# load_dotenv()
+from config import (BAR_STORE_PATH, COMMODITIES, COMMODITY_OPTIONS, METRICS_DIR, METRICS_EXPORT, MODEL_DIR,
+                    QUOTE_SYMBOLS, SHARED_CACHE_MAX_BYTES, SHARED_CACHE_PATH, STATIC_DIR, STYLES_PATH, UPLOAD_DIR)
+from models.registry import ModelRegistry
+from utils.aggregation import BarAggregator, sparkline_points
+from utils.assets import AssetCache
+from utils.bar_store import BarStore
+from utils.clients import MarketClients, as_completed_within
+from utils.features import FeaturePipeline, FeatureSpec, parse_windows
+from utils.instrumentation import telemetry
+from utils.market_data import QuoteEngine
+from utils.prefetch import QuotePrefetcher
+from utils.preprocessing import OUTLIER_POLICIES, preprocess
+from utils.shared_cache import SharedCache
+from utils.upload_store import UploadStore
 
 # Set page config
 st.set_page_config(
@@ -29,304 +23,13 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for two-tone green theme and gold text
-st.markdown("""
-    <style>
-    html, body, [class*="css"]  {
-        background: linear-gradient(135deg, #123524 0%, #1C352D 100%) !important;
-        color: #f5d76e !important;
-    }
-    .main {
-        background: linear-gradient(135deg, #123524 0%, #1C352D 100%) !important;
-        color: #f5d76e !important;
-        padding: 2rem;
-    }
-    section[data-testid="stSidebar"] {
-        background-color: #1C352D !important;
-        color: #f5d76e !important;
-    }
-    .stButton>button {
-        background-color: #f5d76e;
-        color: #123524;
-        border-radius: 8px;
-        padding: 0.5rem 1rem;
-        border: none;
-        width: 100%;
-        font-weight: bold;
-        font-size: 1.1rem;
-        transition: all 0.3s ease;
-        box-shadow: 0 2px 8px rgba(245,215,110,0.15);
-    }
-    .stButton>button:hover {
-        background-color: #fff2b2;
-        color: #123524;
-        transform: translateY(-2px);
-    }
-    .welcome-popup {
-        position: fixed;
-        top: 0; left: 0; right: 0; bottom: 0;
-        background: rgba(18,53,36,0.95);
-        z-index: 9999;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-    }
-    .welcome-popup-content {
-        background: #1C352D;
-        color: #f5d76e;
-        padding: 2.5rem 3rem;
-        border-radius: 18px;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.25);
-        text-align: center;
-        font-size: 2rem;
-        font-weight: bold;
-    }
-    .header-title {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #f5d76e;
-        margin-bottom: 0.5rem;
-        text-align: center;
-    }
-    .header-sub {
-        font-size: 1.1rem;
-        color: #f5d76e;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .commodity-emojis {
-        text-align: center;
-        font-size: 2rem;
-        margin-bottom: 1.5rem;
-        color: #f5d76e;
-    }
-    .signup-container {
-        background: #1C352D;
-        border-radius: 18px;
-        padding: 2rem 2.5rem 2.5rem 2.5rem;
-        margin: 2rem auto 0 auto;
-        max-width: 420px;
-        box-shadow: 0 4px 24px rgba(18,53,36,0.15);
-        color: #f5d76e;
-    }
-    .signup-btn {
-        background: #f54e4e;
-        color: #fff;
-        border: none;
-        border-radius: 2rem;
-        width: 100%;
-        font-size: 1.2rem;
-        font-weight: bold;
-        padding: 0.8rem 0;
-        margin: 1.2rem 0 1rem 0;
-        cursor: pointer;
-        transition: background 0.2s;
-    }
-    .signup-btn:hover {
-        background: #ff7b7b;
-    }
-    .signup-divider {
-        display: flex;
-        align-items: center;
-        text-align: center;
-        color: #f5d76e;
-        margin: 1.5rem 0 1rem 0;
-    }
-    .signup-divider::before, .signup-divider::after {
-        content: '';
-        flex: 1;
-        border-bottom: 1px solid #f5d76e;
-    }
-    .signup-divider:not(:empty)::before {
-        margin-right: .75em;
-    }
-    .signup-divider:not(:empty)::after {
-        margin-left: .75em;
-    }
-    .social-btn {
-        display: flex;
-        align-items: center;
-        background: #fff;
-        color: #222;
-        border-radius: 2rem;
-        padding: 0.7rem 1rem;
-        margin-bottom: 0.7rem;
-        font-weight: bold;
-        font-size: 1.1rem;
-        border: none;
-        width: 100%;
-        cursor: pointer;
-        transition: background 0.2s;
-        text-decoration: none;
-    }
-    .social-btn img {
-        height: 1.5rem;
-        margin-right: 1rem;
-    }
-    .social-btn:hover {
-        background: #f5d76e;
-        color: #123524;
-    }
-    .stAlert, .stInfo, .stWarning, .stSuccess, .stError {
-        color: #f5d76e !important;
-    }
-    .commodity-row {
-        display: flex;
-        align-items: center;
-        margin-bottom: 0.7rem;
-    }
-    .commodity-img {
-        width: 38px;
-        height: 38px;
-        border-radius: 8px;
-        margin-right: 14px;
-        transition: transform 0.2s;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.10);
-        object-fit: cover;
-    }
-    .commodity-img:hover {
-        transform: scale(1.35);
-        z-index: 2;
-    }
-    .about-heading {
-        color: #f5d76e;
-        font-size: 2rem;
-        font-weight: bold;
-        margin-bottom: 1.2rem;
-    }
-    .hover-img {
-        transition: transform 0.2s;
-        border-radius: 8px;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.10);
-        width: 38px;
-        height: 38px;
-        object-fit: cover;
-        margin-right: 14px;
-        vertical-align: middle;
-    }
-    .hover-img:hover {
-        transform: scale(1.35);
-        z-index: 2;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-# Add custom CSS to style st.info and st.success messages with gold text
-st.markdown('''
-<style>
-.stAlert, .stInfo, .stSuccess, .stWarning, .stError {
-    color: #f5d76e !important;
-    font-size: 1.1rem !important;
-}
-</style>
-''', unsafe_allow_html=True)
+# Theme, alert and card styles live in static/styles.css and are read once per process
+@st.cache_resource(show_spinner=False)
+def get_page_styles():
+    with open(STYLES_PATH, encoding='utf-8') as f:
+        return f'<style>\n{f.read()}</style>'
 
-# Add custom CSS for golden border and remove spread
-st.markdown('''
-<style>
-.commodity-cards {
-    display: flex;
-    flex-direction: row;
-    justify-content: center;
-    align-items: flex-start;
-    gap: 1.2rem;
-    margin: 2rem 0;
-    width: 100%;
-    overflow-x: auto;
-    white-space: nowrap;
-    padding-bottom: 1.5rem;
-}
-.commodity-card {
-    background: linear-gradient(135deg, #123524 0%, #1C352D 100%);
-    border-radius: 24px;
-    box-shadow: 0 2px 12px 0 rgba(44,62,80,0.10);
-    border: 3px solid #f5d76e;
-    width: 250px;
-    min-width: 220px;
-    max-width: 270px;
-    height: 170px;
-    min-height: 150px;
-    max-height: 200px;
-    padding: 1.1rem 1.1rem 0.7rem 1.1rem;
-    display: flex;
-    flex-direction: column;
-    justify-content: flex-start;
-    align-items: stretch;
-    box-sizing: border-box;
-    margin: 0;
-    flex-shrink: 0;
-    position: relative;
-    transition: box-shadow 0.2s, transform 0.2s;
-}
-.commodity-card:hover {
-    box-shadow: 0 8px 32px 0 rgba(245,215,110,0.18);
-    transform: scale(1.045);
-    z-index: 2;
-}
-.commodity-header {
-    display: flex;
-    align-items: center;
-    margin-bottom: 0.7rem;
-    font-size: 1.1rem;
-    font-weight: 500;
-}
-.commodity-title {
-    color: #f5d76e;
-    font-size: 1.1rem;
-    font-weight: 500;
-    margin-left: 0.4rem;
-}
-.commodity-flag {
-    font-size: 1.1rem;
-    margin-left: 0.2rem;
-}
-.commodity-icon {
-    font-size: 1.5rem;
-}
-.trend-row {
-    display: flex;
-    align-items: center;
-    justify-content: flex-end;
-    margin-bottom: 0.4rem;
-    margin-top: -0.7rem;
-    width: 100%;
-}
-.trend-icon {
-    width: 22px;
-    height: 14px;
-    margin-right: 0.2rem;
-    vertical-align: middle;
-    display: inline-block;
-}
-.trend-positive {
-    color: #00b86b;
-    font-weight: 500;
-    font-size: 1.05rem;
-}
-.trend-negative {
-    color: #ff4444;
-    font-weight: 500;
-    font-size: 1.05rem;
-}
-.commodity-metrics {
-    display: flex;
-    justify-content: space-between;
-    margin: 0.7rem 0 0.1rem 0;
-    width: 100%;
-}
-.metric-label {
-    color: #b0b0b0;
-    font-size: 0.95rem;
-    font-weight: 400;
-}
-.metric-value {
-    color: #00b86b;
-    font-size: 1.25rem;
-    font-weight: 500;
-    margin-top: 0.1rem;
-}
-</style>
-''', unsafe_allow_html=True)
+st.markdown(get_page_styles(), unsafe_allow_html=True)
 
 # Streamlit-native welcome popup
 if 'welcome_shown' not in st.session_state:
@@ -358,70 +61,146 @@ st.markdown('<div class="commodity-emojis" style="color:#f5d76e;">'
 # Subheader
 st.markdown('<div class="header-sub" style="color:#f5d76e;">Learn how to trade gold, oil, and other essential commodities with expert insights and strategies</div>', unsafe_allow_html=True)
 
-# Dummy values for Bid, Ask, Spread, and dummy graph data
-DUMMY_METRICS = {
-    'Silver': {'bid': 3239.18, 'ask': 3239.66, 'spread': 0.00005, 'change': 0.06},
-    'Gold': {'bid': 947.46, 'ask': 961.54, 'spread': 0.00005, 'change': 0.77},
-    'Copper': {'bid': 1.075, 'ask': 1.07, 'spread': 0.00005, 'change': 0.11},
-}
+# Intraday sparkline drawn from the prefetcher's aggregated 15-minute closes
+def sparkline_svg(closes, rising):
+    points = sparkline_points(closes) if isinstance(closes, (tuple, list)) else ''
+    if not points:
+        return ''
+    color = '#00b86b' if rising else '#ff4444'
+    return (f'<svg class="trend-icon" viewBox="0 0 32 20" fill="none" xmlns="http://www.w3.org/2000/svg">'
+            f'<polyline points="{points}" stroke="{color}" stroke-width="2" fill="none" stroke-linecap="round" stroke-linejoin="round"/></svg>')
+
+# Quotes older than this are flagged as stale on the cards
+QUOTE_REFRESH_SECONDS = 60
+QUOTE_STALE_SECONDS = 5 * QUOTE_REFRESH_SECONDS
+
+@st.cache_resource(show_spinner=False)
+def get_shared_cache():
+    # One SQLite file per host, so worker processes behind a load balancer share fetched data
+    return SharedCache(SHARED_CACHE_PATH, max_bytes=SHARED_CACHE_MAX_BYTES)
+
+@st.cache_resource(show_spinner=False)
+def get_quote_prefetcher():
+    # One refresher thread per server process; page runs only read its in-memory snapshot
+    # The aggregator keeps each symbol's 1-minute bars, so refreshes only fetch the newest ones
+    engine = QuoteEngine(get_market_clients().yahoo, aggregator=BarAggregator())
+    return QuotePrefetcher(QUOTE_SYMBOLS, engine, interval=QUOTE_REFRESH_SECONDS, shared=get_shared_cache()).start()
 
-# Dummy SVGs for up and down trend
-UP_TREND_SVG = '''<svg class="trend-icon" viewBox="0 0 32 20" fill="none" xmlns="http://www.w3.org/2000/svg"><polyline points="2,18 10,8 18,14 30,2" stroke="#00b86b" stroke-width="3" fill="none" stroke-linecap="round" stroke-linejoin="round"/></svg>'''
-DOWN_TREND_SVG = '''<svg class="trend-icon" viewBox="0 0 32 20" fill="none" xmlns="http://www.w3.org/2000/svg"><polyline points="2,2 10,10 18,4 30,18" stroke="#ff4444" stroke-width="3" fill="none" stroke-linecap="round" stroke-linejoin="round"/></svg>'''
-
-# Commodity data and icons (add US flag)
-commodities = [
-    {"name": "Silver", "symbol": "SI=F", "icon": "🥈", "flag": "🇺🇸"},
-    {"name": "Gold", "symbol": "GC=F", "icon": "🥇", "flag": "🇺🇸"},
-    {"name": "Copper", "symbol": "HG=F", "icon": "🥉", "flag": "🇺🇸"},
-    {"name": "Crude Oil", "symbol": "CL=F", "icon": "🛢️", "flag": "🇺🇸"},
-    {"name": "Natural Gas", "symbol": "NG=F", "icon": "🔥", "flag": "🇺🇸"},
-    {"name": "Wheat", "symbol": "ZW=F", "icon": "🌾", "flag": "🇺🇸"},
-]
-
-@st.cache_data(ttl=300, show_spinner=False)
 def get_commodity_data(symbol):
-    try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        bid = info.get('bid')
-        ask = info.get('ask')
-        # Fallback to close price if bid/ask not available
-        data = yf.download(symbol, period="1d", interval="1m")
-        if not data.empty:
-            current_price = data['Close'].iloc[-1]
-            prev_price = data['Open'].iloc[0]
-            change = ((current_price - prev_price) / prev_price) * 100
-        else:
-            current_price = prev_price = change = None
-        # Calculate spread if possible
-        if bid is not None and ask is not None:
-            spread = abs(ask - bid)
-        else:
-            spread = None
-        return {
-            'price': current_price,
-            'change': change,
-            'bid': bid,
-            'ask': ask,
-            'spread': spread
-        }
-    except Exception as e:
-        return None
+    return get_quote_prefetcher().snapshot().get(symbol)
+
+def format_quote_age(age):
+    if age is None:
+        return 'Waiting for first quote'
+    if age < 60:
+        return f'Updated {age:.0f}s ago'
+    if age < 3600:
+        return f'Updated {age / 60:.0f} min ago'
+    return f'Updated {age / 3600:.1f} h ago'
+
+def format_price(value):
+    if value is None:
+        return '—'
+    return f'{value:,.2f}' if abs(value) >= 10 else f'{value:.4f}'
+
+@st.cache_resource(show_spinner=False)
+def get_market_clients():
+    # One pooled HTTP session per provider for the whole process, instead of a new client per rerun
+    return MarketClients(finnhub_api_key=os.getenv('FINNHUB_API_KEY'))
+
+@st.cache_resource(show_spinner=False)
+def get_bar_store():
+    # Shared by every session; history reads come from disk and only the tail is fetched
+    return BarStore(BAR_STORE_PATH, provider=get_market_clients().yahoo, shared=get_shared_cache())
+
+def get_finnhub_quote(shared, finnhub, symbol):
+    # Fetched once per refresh interval for the whole host, whichever worker asks first. Runs on a
+    # pool thread, so the cached resources are resolved by the script thread and passed in
+    return shared.get_or_compute(f'finnhub-quote:{symbol}', lambda: finnhub.quote(symbol), ttl=QUOTE_REFRESH_SECONDS)
+
+@st.cache_resource(show_spinner=False)
+def get_upload_store():
+    return UploadStore(UPLOAD_DIR)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_uploaded_dataset(digest):
+    # Keyed by content hash, so identical uploads from any session share one frame
+    return get_upload_store().load(digest)
+
+@st.cache_resource(show_spinner=False)
+def get_asset_cache():
+    return AssetCache(STATIC_DIR)
+
+def thumbnail_html(image_name, width=80):
+    # Small cached thumbnails instead of the full-size originals; empty if the image is missing
+    assets = get_asset_cache()
+    path = os.path.join(STATIC_DIR, image_name)
+    if st.get_option('server.enableStaticServing'):
+        src = assets.thumbnail_url(path)
+    else:
+        src = assets.thumbnail_data_uri(path)
+    return '' if src is None else f'<img src="{src}" width="{width}" alt="" loading="lazy">'
+
+@st.cache_resource(show_spinner=False)
+def get_model_registry():
+    return ModelRegistry(MODEL_DIR)
+
+@st.cache_resource(show_spinner=False)
+def get_feature_pipeline():
+    return FeaturePipeline()
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def auto_select_features(digest, spec, target, method, criterion, _features):
+    # Keyed by dataset and settings; the feature set itself follows from the digest and spec
+    from models.selection import select_features
+    from models.training import make_xy
+    X, y = make_xy(_features.frame, [c for c in _features.options if c != target] + [target])
+    with telemetry.stage('feature_selection'):
+        return select_features(X, y, method=method, criterion=criterion)
+
+@st.cache_resource(show_spinner=False)
+def get_chart_downsampler():
+    # Imports plotly, so it is only loaded by the pages that draw charts
+    from utils.charts import ChartDownsampler
+    return ChartDownsampler()
+
+def get_uploaded_dataset(uploaded_file):
+    # Hash each upload once per session instead of on every rerun
+    digests = st.session_state.setdefault('upload_digests', {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = UploadStore.digest(uploaded_file.getbuffer())
+    digest = digests[uploaded_file.file_id]
+    store = get_upload_store()
+    telemetry.cache('uploads', digest in store)
+    if digest not in store:
+        # First sight of this file: parse it in chunks, showing progress, and store it
+        bar = st.progress(0.0, text=f"Reading {uploaded_file.name}...")
+        store.add(digest, uploaded_file, uploaded_file.name,
+                   progress=lambda done: bar.progress(done, text=f"Reading {uploaded_file.name}... {done:.0%}"))
+        bar.empty()
+    return digest, load_uploaded_dataset(digest)
 
 # Update card layout to match screenshot
+quote_snapshot = get_quote_prefetcher().snapshot()
 st.markdown('<div class="commodity-cards">', unsafe_allow_html=True)
-for idx, commodity in enumerate(commodities[:3]):
-    metrics = DUMMY_METRICS[commodity['name']]
-    is_positive = metrics['change'] >= 0
-    trend_svg = UP_TREND_SVG if is_positive else DOWN_TREND_SVG
+for idx, commodity in enumerate(COMMODITIES[:3]):
+    metrics = quote_snapshot.get(commodity['symbol']) or {}
+    quote_age = quote_snapshot.age(commodity['symbol'])
+    change = metrics.get('change')
+    is_positive = change is None or change >= 0
+    trend_svg = sparkline_svg(metrics.get('sparkline'), is_positive)
     trend_class = "trend-positive" if is_positive else "trend-negative"
-    change_symbol = "+" if is_positive else ""
+    change_symbol = "+" if is_positive and change is not None else ""
+    change_text = '—' if change is None else f"{change_symbol}{change:.2f}%"
+    # Without a live book, fall back to the last trade price
+    bid = metrics.get('bid') if metrics.get('bid') is not None else metrics.get('price')
+    ask = metrics.get('ask') if metrics.get('ask') is not None else metrics.get('price')
+    age_class = "quote-age quote-stale" if quote_age is None or quote_age > QUOTE_STALE_SECONDS else "quote-age"
     st.markdown(f'''
     <div class="commodity-card">
         <div class="trend-row">
             {trend_svg}
-            <span class="{trend_class}">{change_symbol}{metrics['change']:.2f}%</span>
+            <span class="{trend_class}">{change_text}</span>
         </div>
         <div class="commodity-header">
             <span class="commodity-icon">{commodity['icon']}</span>
@@ -431,13 +210,14 @@ for idx, commodity in enumerate(commodities[:3]):
         <div class="commodity-metrics">
             <div>
                 <div class="metric-label">Bid</div>
-                <div class="metric-value">{metrics['bid']}</div>
+                <div class="metric-value">{format_price(bid)}</div>
             </div>
             <div>
                 <div class="metric-label">Ask</div>
-                <div class="metric-value">{metrics['ask']}</div>
+                <div class="metric-value">{format_price(ask)}</div>
             </div>
         </div>
+        <div class="{age_class}">{format_quote_age(quote_age)}</div>
     </div>
     ''', unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
@@ -458,16 +238,6 @@ st.markdown('''
 </div>
 ''', unsafe_allow_html=True)
 
-# Commodity mapping for yfinance and finnhub
-COMMODITY_OPTIONS = {
-    "Gold": {"yfinance": "GC=F", "finnhub": "OANDA:XAU_USD"},
-    "Silver": {"yfinance": "SI=F", "finnhub": "OANDA:XAG_USD"},
-    "Wheat": {"yfinance": "ZW=F", "finnhub": "OANDA:XW1_USD"},
-    "Crude Oil": {"yfinance": "CL=F", "finnhub": "OANDA:XWT_USD"},
-    "Natural Gas": {"yfinance": "NG=F", "finnhub": "OANDA:XNG_USD"},
-    "Copper": {"yfinance": "HG=F", "finnhub": "OANDA:XCU_USD"}
-}
-
 # Sidebar navigation with custom-styled buttons
 st.sidebar.markdown('<h2 style="color:#f5d76e;">Navigation</h2>', unsafe_allow_html=True)
 nav_pages = ["About", "Commodity Trading", "How it works?"]
@@ -501,16 +271,16 @@ if st.session_state['page'] == 'About':
     st.write('These are natural resources that are mined or extracted.')
     st.markdown('**Examples:**')
     hard_commodities = [
-        ("Gold", "static/gold.JPG"),
-        ("Silver", "static/silver.JPG"),
-        ("Crude Oil", "static/crude_oil.JPG"),
-        ("Natural Gas", "static/natural_gas.JPG"),
-        ("Copper", "static/copper.JPG"),
+        ("Gold", "gold.JPG"),
+        ("Silver", "silver.JPG"),
+        ("Crude Oil", "crude_oil.JPG"),
+        ("Natural Gas", "natural_gas.JPG"),
+        ("Copper", "copper.JPG"),
     ]
     for name, img_path in hard_commodities:
         cols = st.columns([1, 6])
         with cols[0]:
-            st.image(img_path, width=80)
+            st.markdown(thumbnail_html(img_path), unsafe_allow_html=True)
         with cols[1]:
             st.markdown(f"<span style='color:#f5d76e;font-size:1.1rem;'>{name}</span>", unsafe_allow_html=True)
 
@@ -518,16 +288,16 @@ if st.session_state['page'] == 'About':
     st.write('These are agricultural products or livestock.')
     st.markdown('**Examples:**')
     soft_commodities = [
-        ("Wheat", "static/wheat.JPG"),
-        ("Corn", "static/corn.JPG"),
-        ("Sugar", "static/sugar.JPG"),
-        ("Cotton", "static/cotton.JPG"),
-        ("Coffee", "static/coffee.JPG"),
+        ("Wheat", "wheat.JPG"),
+        ("Corn", "corn.JPG"),
+        ("Sugar", "sugar.JPG"),
+        ("Cotton", "cotton.JPG"),
+        ("Coffee", "coffee.JPG"),
     ]
     for name, img_path in soft_commodities:
         cols = st.columns([1, 6])
         with cols[0]:
-            st.image(img_path, width=80)
+            st.markdown(thumbnail_html(img_path), unsafe_allow_html=True)
         with cols[1]:
             st.markdown(f"<span style='color:#f5d76e;font-size:1.1rem;'>{name}</span>", unsafe_allow_html=True)
 
@@ -599,189 +369,327 @@ if st.session_state['page'] == 'Commodity Trading':
     </table>
     ''', unsafe_allow_html=True)
 elif st.session_state['page'] == 'How it works?':
+    # sklearn and plotly are only needed on this page, so they load on its first visit, not at startup
+    import plotly.graph_objects as go
+    from models.backtest import walk_forward_backtest
+    from models.batch import run_batch
+    from models.forecasting import RecursiveForecaster
+    from models.intervals import direct_intervals, recursive_intervals
+    from models.training import holdout_split, train_direct, train_model
+
     st.markdown('<div class="about-heading" style="color:#f5d76e;font-size:2rem;font-weight:bold;margin-bottom:1.2rem;">How it works?</div>', unsafe_allow_html=True)
     st.markdown('**Upload Kragle CSV**', unsafe_allow_html=True)
     uploaded_file = st.file_uploader("Upload your Kaggle dataset", type=['csv', 'xlsx'])
     data = None
+    data_digest = None
     if uploaded_file is not None:
         try:
-            data = pd.read_csv(uploaded_file)
+            data_digest, data = get_uploaded_dataset(uploaded_file)
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
 
     st.markdown('**Select Commodity**', unsafe_allow_html=True)
-    COMMODITY_OPTIONS = {
-        "Gold": {"yfinance": "GC=F", "finnhub": "OANDA:XAU_USD"},
-        "Silver": {"yfinance": "SI=F", "finnhub": "OANDA:XAG_USD"},
-        "Wheat": {"yfinance": "ZW=F", "finnhub": "OANDA:XW1_USD"},
-        "Crude Oil": {"yfinance": "CL=F", "finnhub": "OANDA:XWT_USD"},
-        "Natural Gas": {"yfinance": "NG=F", "finnhub": "OANDA:XNG_USD"},
-        "Copper": {"yfinance": "HG=F", "finnhub": "OANDA:XCU_USD"}
-    }
     commodity = st.selectbox("Choose a commodity:", list(COMMODITY_OPTIONS.keys()))
 
     if commodity:
         st.markdown(f"**Fetch Real-Time Data for {commodity}**", unsafe_allow_html=True)
-        # Fetch with yfinance
+        # Yahoo history and the Finnhub quote are fetched concurrently; each is shown as soon as it arrives
+        clients = get_market_clients()
         yf_symbol = COMMODITY_OPTIONS[commodity]["yfinance"]
-        try:
-            yf_data = yf.download(yf_symbol, period="5d")
-            if yf_data.empty:
-                st.warning("No data found for this commodity. Please try another or check your internet connection.")
-            else:
-                st.write(f"### {commodity} - Yahoo Finance (last 5 days)")
-                st.dataframe(yf_data)
-        except Exception as e:
-            st.error(f"Failed to fetch data from Yahoo Finance: {e}")
-        # Fetch with finnhub
         finnhub_symbol = COMMODITY_OPTIONS[commodity]["finnhub"]
-        try:
-            import os
-            import finnhub
-            api_key = os.getenv('FINNHUB_API_KEY')
-            if api_key:
-                finnhub_client = finnhub.Client(api_key=api_key)
-                quote = finnhub_client.quote(finnhub_symbol)
-                st.write(f"### {commodity} - Finnhub Real-Time Quote")
-                st.json(quote)
-            else:
-                st.info("Finnhub API key not set. Skipping Finnhub data.")
-        except Exception as e:
-            st.warning(f"Finnhub data unavailable: {str(e)}")
+        slots = {'yahoo': st.empty(), 'finnhub': st.empty()}
+        requests_in_flight = {'yahoo': clients.submit(get_bar_store().history, yf_symbol, period="5d")}
+        if clients.finnhub is not None:
+            requests_in_flight['finnhub'] = clients.submit(get_finnhub_quote, get_shared_cache(), clients.finnhub, finnhub_symbol)
+        else:
+            slots['finnhub'].info("Finnhub API key not set. Skipping Finnhub data.")
+        for source, result, error in as_completed_within(requests_in_flight, timeout=12):
+            with slots[source].container():
+                if source == 'yahoo':
+                    if error is not None:
+                        st.error(f"Failed to fetch data from Yahoo Finance: {error}")
+                    elif result.empty:
+                        st.warning("No data found for this commodity. Please try another or check your internet connection.")
+                    else:
+                        st.write(f"### {commodity} - Yahoo Finance (last 5 days)")
+                        st.dataframe(result)
+                elif error is not None:
+                    st.warning(f"Finnhub data unavailable: {str(error)}")
+                else:
+                    st.write(f"### {commodity} - Finnhub Real-Time Quote")
+                    st.json(result)
+
+    # Batch mode: every configured commodity, plus any extra symbols, trained and forecast at once
+    with st.expander('Batch mode: train and forecast every commodity'):
+        extra_symbols = st.text_area('Extra Yahoo Finance symbols (comma or newline separated):', '')
+        batch_horizon = st.number_input('Forecast horizon (days):', min_value=1, max_value=365, value=30, key='batch_horizon')
+        if st.button('Run batch'):
+            batch_symbols = {name: options['yfinance'] for name, options in COMMODITY_OPTIONS.items()}
+            for symbol in extra_symbols.replace(',', ' ').split():
+                batch_symbols.setdefault(symbol, symbol)
+            with st.spinner(f'Training and forecasting {len(batch_symbols)} series...'):
+                histories = get_bar_store().history_many(list(batch_symbols.values()), period='5y')
+                series = {name: histories[symbol] for name, symbol in batch_symbols.items() if not histories[symbol].empty}
+                comparison, batch_forecasts = run_batch(series, horizon=int(batch_horizon))
+            missing = sorted(set(batch_symbols) - set(series))
+            if missing:
+                st.warning(f"No price history for: {', '.join(missing)}")
+            st.dataframe(comparison)
+            if batch_forecasts:
+                forecast_table = pd.DataFrame(batch_forecasts)
+                forecast_table.index = pd.RangeIndex(1, len(forecast_table) + 1, name='Day')
+                st.download_button('Download Batch Forecast CSV', forecast_table.to_csv().encode('utf-8'),
+                                   'batch_forecast.csv', 'text/csv')
 
     # Step 2: Load Data Button
     if data is not None:
+        with st.expander('Feature settings'):
+            spec_cols = st.columns(4)
+            spec_text = {
+                'windows': spec_cols[0].text_input('Moving average windows', '5'),
+                'std_windows': spec_cols[1].text_input('Rolling std windows', ''),
+                'min_windows': spec_cols[2].text_input('Rolling min windows', ''),
+                'max_windows': spec_cols[3].text_input('Rolling max windows', ''),
+                'ewm_spans': spec_cols[0].text_input('EWMA spans', ''),
+                'vol_windows': spec_cols[1].text_input('Realized volatility windows', ''),
+                'lags': spec_cols[2].text_input('Lags', '1'),
+            }
+            use_returns = spec_cols[3].checkbox('Returns')
+            use_log_returns = spec_cols[3].checkbox('Log returns')
+        try:
+            spec = FeatureSpec(returns=use_returns, log_returns=use_log_returns,
+                               **{field: parse_windows(text) for field, text in spec_text.items()})
+        except ValueError:
+            st.warning('Feature windows must be positive whole numbers; using the defaults.')
+            spec = FeatureSpec()
+        # Engineered features are built once per dataset and spec and shared by every step below
+        features = get_feature_pipeline().transform(data_digest, data, spec)
+
+        # Automatic mode searches feature subsets instead of using every column
+        with st.expander('Feature selection'):
+            selection_cols = st.columns(4)
+            selection_mode = selection_cols[0].radio('Mode', ['Manual', 'Automatic'])
+            selection_target = selection_cols[1].selectbox('Target', features.options, index=len(features.options) - 1)
+            selection_method = selection_cols[2].selectbox('Search', ['auto', 'forward', 'backward', 'exhaustive'],
+                                                           format_func={'auto': 'Exhaustive if few features, else forward',
+                                                                        'forward': 'Forward stepwise',
+                                                                        'backward': 'Backward stepwise',
+                                                                        'exhaustive': 'Exhaustive'}.get)
+            selection_criterion = selection_cols[3].selectbox('Criterion', ['bic', 'aic'], format_func=str.upper)
+
+        def choose_features(key=None):
+            # Manual: the user's pick, target last; automatic: the best subset found, then the target
+            if selection_mode == 'Manual':
+                return st.multiselect('Select features for modeling:', features.options, default=features.options, key=key)
+            try:
+                selection = auto_select_features(data_digest, spec, selection_target, selection_method,
+                                                 selection_criterion, features)
+            except ValueError as e:
+                st.warning(f'Automatic feature selection failed ({e}); using every feature.')
+                return features.options
+            st.info(f'Auto-selected by {selection.criterion.upper()} ({selection.method} search): {selection.features}')
+            return selection.features + [selection_target]
+
         if st.button('Load Data'):
             st.dataframe(data)
             st.success("Data Loaded Successfully")
 
         # Step 3: Preprocessing Button
+        policy_labels = {'zscore': 'Z-score (3σ)', 'iqr': 'IQR (1.5× fences)', 'mad': 'Median absolute deviation'}
+        outlier_policy = st.selectbox('Outlier policy:', list(OUTLIER_POLICIES), format_func=policy_labels.get)
         if st.button('Preprocessing'):
-            # Show before stats
-            st.info(f"Missing values before: {data.isnull().sum().sum()}")
-            st.info(f"Rows before: {data.shape[0]}")
-            # Handle missing values (drop rows with any missing values)
-            data_clean = data.dropna()
-            # Handle outliers (remove rows where any numeric value is more than 3 std from mean)
-            numeric_cols = data_clean.select_dtypes(include=[np.number]).columns
-            for col in numeric_cols:
-                mean = data_clean[col].mean()
-                std = data_clean[col].std()
-                data_clean = data_clean[(data_clean[col] >= mean - 3*std) & (data_clean[col] <= mean + 3*std)]
-            # Show after stats
-            st.info(f"Missing values after: {data_clean.isnull().sum().sum()}")
-            st.info(f"Rows after: {data_clean.shape[0]}")
+            # Drop rows with missing values, then rows that are outliers in any numeric column
+            with telemetry.stage('preprocess'):
+                data_clean, report = preprocess(data, policy=outlier_policy)
+            st.info(f"Missing values before: {report.missing_before}")
+            st.info(f"Rows before: {report.rows_before}")
+            st.info(f"Rows dropped for missing values: {report.dropped_missing}")
+            st.info(f"Rows dropped as outliers: {report.dropped_outliers}")
+            st.info(f"Missing values after: {report.missing_after}")
+            st.info(f"Rows after: {report.rows_after}")
+            if report.dropped_outliers:
+                st.dataframe(report.to_frame())
             st.success("Preprocessing complete!")
             st.dataframe(data_clean)
 
         # Step 4: Feature Engineering Button
         if st.button('Feature Engineering'):
-            df = data.copy()
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            # Only allow numeric columns and their engineered features for modeling
-            feature_options = list(numeric_cols)
-            # Add engineered features for numeric columns
-            for col in numeric_cols:
-                df[f'{col}_ma5'] = df[col].rolling(window=5).mean()
-                df[f'{col}_lag1'] = df[col].shift(1)
-                feature_options.append(f'{col}_ma5')
-                feature_options.append(f'{col}_lag1')
-            selected_features = st.multiselect('Select features for modeling:', feature_options, default=feature_options)
+            df = features.frame
+            selected_features = choose_features()
             st.info(f'Selected features: {selected_features}')
             st.dataframe(df[selected_features].head(10))
             st.success('Feature engineering complete!')
 
         # Step 5: Model Training Button
+        model_labels = {'LinearRegression': 'Linear Regression', 'OnlineLinearRegression': 'Online linear regression (RLS)'}
+        estimator = st.selectbox('Model:', list(model_labels), format_func=model_labels.get)
+        estimator_params = {}
+        if estimator == 'OnlineLinearRegression':
+            # Below 1, older rows are down-weighted so the fit follows recent behaviour
+            estimator_params['forgetting'] = st.slider('Forgetting factor', 0.90, 1.0, 1.0, 0.001, format='%.3f')
         if st.button('Model Training'):
-            df = data.copy()
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            feature_options = list(numeric_cols)
-            for col in numeric_cols:
-                df[f'{col}_ma5'] = df[col].rolling(window=5).mean()
-                df[f'{col}_lag1'] = df[col].shift(1)
-                feature_options.append(f'{col}_ma5')
-                feature_options.append(f'{col}_lag1')
-            selected_features = st.multiselect('Select features for modeling:', feature_options, default=feature_options, key='model_features')
-            df_model = df[selected_features].dropna()
+            df = features.frame
+            selected_features = choose_features('model_features')
             if len(selected_features) < 2:
                 st.warning('Please select at least one feature and a target.')
             else:
-                X = df_model.iloc[:, :-1]
-                y = df_model.iloc[:, -1]
-                model = LinearRegression()
-                model.fit(X, y)
-                st.success('Model Trained!')
+                entry, X, y = train_model(get_model_registry(), data_digest, df, selected_features,
+                                          estimator=estimator, estimator_params=estimator_params)
+                st.success(f"Model Trained! ({entry.trained_at:%Y-%m-%d %H:%M} UTC)")
 
         # Step 6: Evaluation Button
+        with st.expander('Walk-forward backtest settings'):
+            bt_cols = st.columns(4)
+            bt_window = bt_cols[0].selectbox('Training window', ['expanding', 'sliding'])
+            bt_train_share = bt_cols[1].slider('Initial training share', 0.1, 0.9, 0.5, 0.05)
+            bt_horizon = bt_cols[2].number_input('Test horizon (rows)', min_value=1, value=5)
+            bt_step = bt_cols[3].number_input('Step (rows)', min_value=1, value=5)
+        # Long series are reduced to about one point per pixel before they are sent to the browser
+        with st.expander('Chart settings'):
+            chart_cols = st.columns(2)
+            chart_method = chart_cols[0].selectbox('Downsampling', ['lttb', 'minmax'],
+                                                   format_func={'lttb': 'Largest triangle (LTTB)', 'minmax': 'Min/max per bucket'}.get)
+            chart_zoom = chart_cols[1].slider('Zoom (% of series)', 0, 100, (0, 100))
+
+        def zoom_range(n):
+            return n * chart_zoom[0] // 100, n * chart_zoom[1] // 100
+
         if st.button('Evaluation'):
-            df = data.copy()
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            feature_options = list(numeric_cols)
-            for col in numeric_cols:
-                df[f'{col}_ma5'] = df[col].rolling(window=5).mean()
-                df[f'{col}_lag1'] = df[col].shift(1)
-                feature_options.append(f'{col}_ma5')
-                feature_options.append(f'{col}_lag1')
-            selected_features = st.multiselect('Select features for modeling:', feature_options, default=feature_options, key='eval_features')
-            df_model = df[selected_features].dropna()
+            df = features.frame
+            selected_features = choose_features('eval_features')
             if len(selected_features) < 2:
                 st.warning('Please select at least one feature and a target.')
             else:
-                X = df_model.iloc[:, :-1]
-                y = df_model.iloc[:, -1]
-                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-                model = LinearRegression()
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-                r2 = r2_score(y_test, y_pred)
-                mae = np.mean(np.abs(y_test - y_pred))
-                mse = np.mean((y_test - y_pred) ** 2)
-                st.info(f'R² Score: {r2:.4f}')
-                st.info(f'MAE: {mae:.4f}')
-                st.info(f'MSE: {mse:.4f}')
+                entry, X, y = train_model(get_model_registry(), data_digest, df, selected_features, test_size=0.2,
+                                          estimator=estimator, estimator_params=estimator_params)
+                X_train, X_test, y_train, y_test = holdout_split(X, y, 0.2)
+                with telemetry.stage('predict'):
+                    y_pred = entry.model.predict(X_test)
+                st.info(f"R² Score: {entry.metrics['r2']:.4f}")
+                st.info(f"MAE: {entry.metrics['mae']:.4f}")
+                st.info(f"MSE: {entry.metrics['mse']:.4f}")
                 fig = go.Figure()
-                fig.add_trace(go.Scatter(y=y_test, mode='lines', name='Actual'))
-                fig.add_trace(go.Scatter(y=y_pred, mode='lines', name='Predicted'))
+                charts = get_chart_downsampler()
+                x_range = zoom_range(len(y_test))
+                fig.add_trace(charts.trace((entry.key, 'actual'), y_test, x_range=x_range, method=chart_method,
+                                           mode='lines', name='Actual'))
+                fig.add_trace(charts.trace((entry.key, 'predicted'), y_pred, x_range=x_range, method=chart_method,
+                                           mode='lines', name='Predicted'))
                 fig.update_layout(title='Actual vs Predicted', xaxis_title='Index', yaxis_title='Value')
                 st.plotly_chart(fig)
+                # Refit on each expanding or sliding window and score the rows that follow it
+                try:
+                    with telemetry.stage('backtest'):
+                        backtest = walk_forward_backtest(X, y, max(int(len(y) * bt_train_share), X.shape[1] + 2),
+                                                         horizon=int(bt_horizon), step=int(bt_step), window=bt_window)
+                    st.write(f'### Walk-forward backtest ({len(backtest.folds)} folds)')
+                    st.dataframe(backtest.summary)
+                    st.dataframe(backtest.folds)
+                except ValueError as e:
+                    st.warning(f'Walk-forward backtest skipped: {e}')
                 st.success('Evaluation complete!')
 
+        # Outside the button, so changing them reruns the page without losing the choice
+        with st.expander('Forecast settings'):
+            forecast_cols = st.columns(2)
+            n_days = forecast_cols[0].number_input('Forecast next n-days:', min_value=1, max_value=365, value=5)
+            forecast_mode = forecast_cols[1].radio('Forecast mode:', ['Recursive', 'Direct multi-horizon'], horizontal=True)
+
+        # Bootstrap paths for the forecast's uncertainty bands, all simulated in one batch
+        with st.expander('Prediction intervals'):
+            pi_cols = st.columns(3)
+            pi_method = pi_cols[0].selectbox('Bootstrap', ['residual', 'block', 'none'],
+                                             format_func={'residual': 'Residual', 'block': 'Moving block', 'none': 'Off'}.get)
+            pi_paths = pi_cols[1].number_input('Paths', min_value=100, max_value=20000, value=2000, step=100)
+            pi_block = pi_cols[2].number_input('Block length (0 = automatic)', min_value=0, value=0)
+
         # Step 7: Results Visualization Button
         if st.button('Results Visualization'):
-            df = data.copy()
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            feature_options = list(numeric_cols)
-            for col in numeric_cols:
-                df[f'{col}_ma5'] = df[col].rolling(window=5).mean()
-                df[f'{col}_lag1'] = df[col].shift(1)
-                feature_options.append(f'{col}_ma5')
-                feature_options.append(f'{col}_lag1')
-            selected_features = st.multiselect('Select features for modeling:', feature_options, default=feature_options, key='viz_features')
-            df_model = df[selected_features].dropna()
+            df = features.frame
+            selected_features = choose_features('viz_features')
             if len(selected_features) < 2:
                 st.warning('Please select at least one feature and a target.')
             else:
-                X = df_model.iloc[:, :-1]
-                y = df_model.iloc[:, -1]
-                model = LinearRegression()
-                model.fit(X, y)
-                n_days = st.number_input('Forecast next n-days:', min_value=1, max_value=30, value=5)
-                last_row = X.iloc[[-1]].values
-                preds = []
-                for _ in range(n_days):
-                    pred = model.predict(last_row)[0]
-                    preds.append(pred)
-                forecast_index = range(len(y), len(y) + n_days)
+                entry, X, y = train_model(get_model_registry(), data_digest, df, selected_features,
+                                          estimator=estimator, estimator_params=estimator_params)
+                model = entry.model
+                n_days = int(n_days)
+                try:
+                    if forecast_mode == 'Recursive':
+                        # Lags and moving averages are rolled forward from each new prediction
+                        forecaster = RecursiveForecaster(model, X.columns, y.name, features.sources)
+                        with telemetry.stage('forecast'):
+                            preds = forecaster.forecast(df, n_days)[0]
+                    else:
+                        # One model per horizon, all predicted from the last row in one matrix multiply
+                        direct = train_direct(get_model_registry(), data_digest, X, y, n_days)
+                        with telemetry.stage('forecast'):
+                            preds = direct.model.predict(X.iloc[-1].to_numpy())
+                except ValueError as e:
+                    st.warning(f'Cannot forecast {n_days} days: {e}')
+                    st.stop()
+                intervals = None
+                if pi_method != 'none':
+                    try:
+                        with telemetry.stage('intervals'):
+                            if forecast_mode == 'Recursive':
+                                residuals = y.to_numpy() - model.predict(X)
+                                intervals = recursive_intervals(forecaster, df, residuals, n_days, n_paths=int(pi_paths),
+                                                                method=pi_method, block_size=int(pi_block) or None)
+                            else:
+                                intervals = direct_intervals(direct.model, X.iloc[-1].to_numpy(),
+                                                             direct.model.residuals(X, y), n_paths=int(pi_paths))
+                    except ValueError as e:
+                        st.warning(f'Prediction intervals skipped: {e}')
+                forecast_index = list(range(len(y), len(y) + n_days))
                 fig = go.Figure()
-                fig.add_trace(go.Scatter(y=y, mode='lines', name='Actual'))
-                fig.add_trace(go.Scatter(x=list(forecast_index), y=preds, mode='lines+markers', name='Forecast'))
+                fig.add_trace(get_chart_downsampler().trace((entry.key, 'actual'), y, x_range=zoom_range(len(y)),
+                                                            method=chart_method, mode='lines', name='Actual'))
+                if intervals is not None:
+                    # Each band is an invisible upper edge with the lower edge filled up to it
+                    for low, high, opacity in ((0.05, 0.95, 0.15), (0.25, 0.75, 0.3)):
+                        fig.add_trace(go.Scatter(x=forecast_index, y=intervals.bands[high], mode='lines', line=dict(width=0),
+                                                 showlegend=False, hoverinfo='skip'))
+                        fig.add_trace(go.Scatter(x=forecast_index, y=intervals.bands[low], mode='lines', line=dict(width=0),
+                                                 fill='tonexty', fillcolor=f'rgba(245,215,110,{opacity})',
+                                                 name=f'{high - low:.0%} interval'))
+                fig.add_trace(go.Scatter(x=forecast_index, y=preds, mode='lines+markers', name='Forecast'))
                 fig.update_layout(title='Future Forecast', xaxis_title='Index', yaxis_title='Value')
                 st.plotly_chart(fig)
-                forecast_df = pd.DataFrame({'Forecast': preds})
+                forecast_df = intervals.to_frame() if intervals is not None else pd.DataFrame({'Forecast': preds})
+                st.dataframe(forecast_df)
                 csv = forecast_df.to_csv(index=False).encode('utf-8')
                 st.download_button('Download Forecast CSV', csv, 'forecast.csv', 'text/csv')
                 st.success('Results visualization complete!')
 
 def get_base64_image(image_path):
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode() 
\ No newline at end of file
+    # Encoded once per (path, mtime) and kept in the asset cache's LRU
+    return get_asset_cache().encoded(image_path)
+
+# Debug panel: per-stage timings and cache hit rates for this server process
+if st.sidebar.checkbox('Show performance panel', key='perf_panel'):
+    trace_memory = st.sidebar.checkbox('Trace peak memory (slows allocation-heavy stages)', value=telemetry.trace_memory)
+    if trace_memory != telemetry.trace_memory:
+        telemetry.enable_memory_tracing(trace_memory)
+    stage_table = telemetry.stages_frame()
+    cache_table = telemetry.caches_frame()
+    st.sidebar.markdown('**Stages**')
+    if stage_table.empty:
+        st.sidebar.caption('No stages have run yet.')
+    else:
+        st.sidebar.dataframe(stage_table[['runs', 'errors', 'last_wall_seconds', 'mean_wall_seconds', 'cpu_seconds', 'peak_bytes']])
+    st.sidebar.markdown('**Caches**')
+    if cache_table.empty:
+        st.sidebar.caption('No cache lookups yet.')
+    else:
+        st.sidebar.dataframe(cache_table)
+    st.sidebar.download_button('Download Prometheus metrics', telemetry.to_prometheus().encode('utf-8'),
+                               'metrics.prom', 'text/plain')
+    st.sidebar.download_button('Download JSON lines', telemetry.to_json_lines().encode('utf-8'),
+                               'metrics.jsonl', 'application/x-ndjson')
+
+if METRICS_EXPORT:
+    try:
+        telemetry.export(METRICS_DIR, METRICS_EXPORT)
+    except OSError:
+        pass
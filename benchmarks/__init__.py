@@ -0,0 +1 @@
+# Performance benchmarks; each module runs standalone and compares against benchmarks/baselines/
@@ -0,0 +1,44 @@
+import json
+import os
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def load_baseline(name):
+    """The stored baseline ``{key: value}`` for benchmark ``name``, or None if none was recorded."""
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(name, values, merge=False):
+    """Store ``values`` as the baseline; with ``merge`` keys not measured this time are kept."""
+    if merge:
+        values = {**(load_baseline(name) or {}), **values}
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(name), 'w') as f:
+        json.dump(values, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return baseline_path(name)
+
+
+def regressions(current, baseline, tolerance, floor=0.0):
+    """``(key, current, baseline)`` for every measured key that is more than ``tolerance`` worse than its baseline.
+
+    Differences smaller than ``floor`` are ignored, so timer noise on very fast
+    stages does not count as a regression.
+    """
+    worse = []
+    for key, value in current.items():
+        reference = baseline.get(key)
+        if reference is None or value is None:
+            continue
+        if value > reference * (1 + tolerance) and value - reference > floor:
+            worse.append((key, value, reference))
+    return worse
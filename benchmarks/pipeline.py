@@ -0,0 +1,254 @@
+"""Time and peak-memory benchmark of the modeling pipeline on synthetic price data.
+
+For each ``ROWSxCOLS`` size the suite writes a synthetic CSV (cached under
+``--workdir``) and measures every stage the app runs on an upload:
+
+- ``csv_read``: ``read_upload`` of the CSV bytes
+- ``outliers``: the 3-sigma (``zscore``) filter in ``preprocess``
+- ``features``: ``build_features`` with the default ``_ma5``/``_lag1`` spec
+- ``fit``: ``LinearRegression`` on every lag feature, predicting ``Close``
+- ``evaluation``: chronological holdout metrics plus a walk-forward backtest
+- ``forecast``: a 30-step ``RecursiveForecaster`` run
+- ``market_data``: bar-store sync and quotes for every configured symbol,
+  against the offline Yahoo/Finnhub stubs (once per run, not per size)
+
+Time is the best of ``--repeat`` untraced runs; peak memory comes from one
+extra run under ``tracemalloc``, which sees numpy and pandas buffers. Results
+are compared with ``benchmarks/baselines/pipeline.json``:
+
+    python -m benchmarks.pipeline --preset quick
+    python -m benchmarks.pipeline --sizes 1000000x10,10000x500 --update
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.compare import load_baseline, regressions, save_baseline
+
+PRESETS = {
+    'quick': ['10000x1', '10000x10', '100000x10'],
+    'standard': ['10000x1', '10000x10', '100000x10', '100000x100', '1000000x10', '10000x500'],
+    'full': ['10000x1', '10000x10', '100000x10', '100000x100', '1000000x10', '10000x500',
+             '100000x500', '1000000x100', '10000000x1', '10000000x10'],
+}
+STAGES = ['csv_read', 'outliers', 'features', 'fit', 'evaluation', 'forecast']
+FORECAST_STEPS = 30
+BACKTEST_FOLDS = 20
+
+
+def parse_size(text):
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+
+def synthetic_prices(n_rows, n_cols, seed=0):
+    """Minute-stamped random walks: ``n_cols - 1`` related series plus the ``Close`` target, with a Date column."""
+    rng = np.random.default_rng(seed)
+    market = np.cumsum(rng.normal(0, 1, n_rows))
+    values = {'Date': pd.date_range('1990-01-01', periods=n_rows, freq='min').strftime('%Y-%m-%d %H:%M')}
+    for i in range(n_cols - 1):
+        values[f'P{i}'] = (100 + 0.5 * market + np.cumsum(rng.normal(0, 1, n_rows))).astype(np.float32)
+    values['Close'] = (100 + market + rng.normal(0, 1, n_rows)).astype(np.float32)
+    return pd.DataFrame(values)
+
+
+def dataset_path(workdir, n_rows, n_cols, seed=0):
+    """Path of the synthetic CSV for this size, generating it on first use."""
+    path = os.path.join(workdir, f'prices-{n_rows}x{n_cols}-{seed}.csv')
+    if not os.path.exists(path):
+        os.makedirs(workdir, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        synthetic_prices(n_rows, n_cols, seed).to_csv(tmp_path, index=False, float_format='%.4f')
+        os.replace(tmp_path, path)
+    return path
+
+
+def measure(fn, repeat=1, memory=True):
+    """Run ``fn``; return its result, the best wall time of ``repeat`` runs and the traced peak in MB."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def pipeline_stages(raw, name):
+    """The stages in order, each a function of the previous stage outputs kept in ``state``."""
+    from sklearn.linear_model import LinearRegression
+
+    from models.backtest import walk_forward_backtest
+    from models.forecasting import RecursiveForecaster
+    from models.training import holdout_split, make_xy, regression_metrics
+    from utils.features import build_features
+    from utils.ingest import read_upload
+    from utils.preprocessing import preprocess
+
+    state = {}
+
+    def csv_read():
+        return read_upload(raw, name)
+
+    def outliers():
+        return preprocess(state['data'], policy='zscore')
+
+    def features():
+        return build_features(state['data'])
+
+    def fit():
+        return LinearRegression().fit(state['X'], state['y'])
+
+    def evaluation():
+        X, y = state['X'], state['y']
+        X_train, X_test, y_train, y_test = holdout_split(X, y, 0.2)
+        model = LinearRegression().fit(X_train, y_train)
+        metrics = regression_metrics(y_test, model.predict(X_test))
+        min_train = max(len(y) // 2, X.shape[1] + 2)
+        step = max(1, (len(y) - min_train) // BACKTEST_FOLDS)
+        return metrics, walk_forward_backtest(X, y, min_train, horizon=step, n_jobs=1)
+
+    def forecast():
+        forecaster = RecursiveForecaster(state['model'], state['X'].columns, 'Close', state['features'].sources)
+        return forecaster.forecast(state['features'].frame, FORECAST_STEPS)
+
+    def after(stage, result):
+        if stage == 'csv_read':
+            state['data'] = result
+        elif stage == 'features':
+            state['features'] = result
+            lagged = [col for col in result.options if result.sources[col][1] == 'lag']
+            state['X'], state['y'] = make_xy(result.frame, lagged + ['Close'])
+        elif stage == 'fit':
+            state['model'] = result
+
+    stages = {'csv_read': csv_read, 'outliers': outliers, 'features': features,
+              'fit': fit, 'evaluation': evaluation, 'forecast': forecast}
+    return stages, after
+
+
+def run_size(workdir, n_rows, n_cols, repeat=1, memory=True, stages=STAGES):
+    """Measure every stage for one dataset size; returns ``{stage: (seconds, peak_mb)}``.
+
+    A stage that fails (for instance with ``MemoryError``) is reported as
+    ``(None, None)`` together with the error, and the stages after it are skipped.
+    """
+    path = dataset_path(workdir, n_rows, n_cols)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    functions, after = pipeline_stages(raw, os.path.basename(path))
+    results = {}
+    for stage in STAGES:
+        try:
+            result, seconds, peak = measure(functions[stage], repeat if stage in stages else 1,
+                                            memory and stage in stages)
+        except Exception as e:
+            results[stage] = (None, None, f'{type(e).__name__}: {e}')
+            break
+        after(stage, result)
+        if stage in stages:
+            results[stage] = (seconds, peak, None)
+    return results
+
+
+def run_market_data(memory=True):
+    """Bar-store sync and quote engine over every configured symbol using the offline stubs."""
+    from config import COMMODITY_OPTIONS, QUOTE_SYMBOLS
+    from benchmarks.stubs import StubFinnhubQuotes, StubYahooProvider
+    from utils.bar_store import BarStore
+    from utils.market_data import QuoteEngine
+
+    provider = StubYahooProvider()
+    finnhub = StubFinnhubQuotes()
+
+    def fetch():
+        with tempfile.TemporaryDirectory() as tmp:
+            store = BarStore(os.path.join(tmp, 'bars.sqlite'), provider=provider)
+            history = store.history_many(list(QUOTE_SYMBOLS), period='5y')
+            quotes = QuoteEngine(provider).get_quotes(QUOTE_SYMBOLS)
+            finnhub_quotes = [finnhub.quote(options['finnhub']) for options in COMMODITY_OPTIONS.values()]
+            return history, quotes, finnhub_quotes
+
+    _, seconds, peak = measure(fetch, memory=memory)
+    return seconds, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--preset', choices=list(PRESETS), default='quick', help='dataset sizes to run (default: quick)')
+    parser.add_argument('--sizes', help='comma-separated ROWSxCOLS sizes, overriding --preset')
+    parser.add_argument('--stages', help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage, best is kept (default: 3)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak-memory runs')
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'commodity-bench'),
+                        help='where synthetic CSVs are cached')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed slowdown over the baseline (default: 0.3)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.1,
+                        help='allowed peak-memory growth over the baseline (default: 0.1)')
+    parser.add_argument('--update', action='store_true', help='merge these measurements into the stored baseline')
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in (args.sizes.split(',') if args.sizes else PRESETS[args.preset])]
+    stages = args.stages.split(',') if args.stages else STAGES
+    memory = not args.no_memory
+    times, peaks = {}, {}
+    print(f"{'size':>14} {'stage':>12} {'seconds':>10} {'peak MB':>10}")
+
+    def report(label, stage, seconds, peak):
+        print(f"{label:>14} {stage:>12} {seconds:10.4f} {'-' if peak is None else f'{peak:.1f}':>10}")
+
+    for n_rows, n_cols in sizes:
+        label = f'{n_rows}x{n_cols}'
+        for stage, (seconds, peak, error) in run_size(args.workdir, n_rows, n_cols, args.repeat, memory, stages).items():
+            if error:
+                print(f'{label:>14} {stage:>12} failed: {error}')
+                continue
+            times[f'{label}/{stage}'], peaks[f'{label}/{stage}'] = seconds, peak
+            report(label, stage, seconds, peak)
+    seconds, peak = run_market_data(memory)
+    times['market_data'], peaks['market_data'] = seconds, peak
+    report('offline stubs', 'market_data', seconds, peak)
+
+    current = {f'{key}/seconds': round(value, 5) for key, value in times.items()}
+    current.update({f'{key}/peak_mb': round(value, 2) for key, value in peaks.items() if value is not None})
+    if args.update:
+        print(f"baseline written to {save_baseline('pipeline', current, merge=True)}")
+        return 0
+    baseline = load_baseline('pipeline')
+    if baseline is None:
+        print('no baseline yet; run with --update to record one', file=sys.stderr)
+        return 1
+    # Absolute floors keep millisecond jitter and allocator noise from failing the run
+    worse = regressions({k: v for k, v in current.items() if k.endswith('/seconds')}, baseline, args.tolerance,
+                        floor=0.05)
+    worse += regressions({k: v for k, v in current.items() if k.endswith('/peak_mb')}, baseline,
+                         args.memory_tolerance, floor=1.0)
+    for key, value, reference in worse:
+        print(f'REGRESSION: {key} = {value:g} vs baseline {reference:g}', file=sys.stderr)
+    missing = sorted(set(current) - set(baseline))
+    if missing:
+        print(f"no baseline for: {', '.join(missing)}", file=sys.stderr)
+    return 1 if worse else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Cold-start benchmark for the Streamlit app.
+
+Each repeat starts a fresh interpreter, imports Streamlit's test runner,
+runs ``app.py`` to its first render (the welcome screen) and then to the
+home page with the quote cards. Yahoo is replaced by the offline stub
+from ``benchmarks/stubs.py`` and no Finnhub key is passed, so no request
+leaves the machine. Median timings are compared with
+``benchmarks/baselines/startup.json``; the script exits non-zero if the app's
+part of the cold start (everything after importing Streamlit) is slower
+than the baseline by more than ``--tolerance``.
+
+    python -m benchmarks.startup            # check against the baseline
+    python -m benchmarks.startup --update   # record a new baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.compare import load_baseline, regressions, save_baseline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so every import is cold
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+# The quote prefetcher starts with the home page; serve it offline so timings do not depend on the network
+import utils.clients
+from benchmarks.stubs import StubYahooProvider
+utils.clients.YahooProvider = lambda **kwargs: StubYahooProvider()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+first_render = time.perf_counter()
+at.button(key="welcome_btn").click().run()
+home = time.perf_counter()
+print(json.dumps({
+    "streamlit_import": imported - start,
+    "first_render": first_render - imported,
+    "home_render": home - first_render,
+    "app_cold_start": home - imported,
+    "errors": [str(e.value) for e in at.exception],
+}))
+'''
+
+
+def measure_once(app_path):
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, COMMODITY_DATA_DIR=data_dir, PYTHONPATH=ROOT)
+        env.pop('FINNHUB_API_KEY', None)
+        result = subprocess.run([sys.executable, '-c', PROBE, app_path], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    if sample.pop('errors'):
+        raise RuntimeError(f'app raised during startup: {result.stdout}')
+    return sample
+
+
+def measure(app_path, repeat):
+    samples = [measure_once(app_path) for _ in range(repeat)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='cold starts to take the median of (default: 5)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown over the baseline, as a fraction (default: 0.25)')
+    parser.add_argument('--update', action='store_true', help='write the measured timings as the new baseline')
+    args = parser.parse_args(argv)
+
+    timings = measure(os.path.join(ROOT, 'app.py'), args.repeat)
+    for key, seconds in timings.items():
+        print(f'{key:>18}: {seconds * 1000:8.1f} ms')
+    if args.update:
+        path = save_baseline('startup', {key: round(value, 4) for key, value in timings.items()})
+        print(f'baseline written to {path}')
+        return 0
+    baseline = load_baseline('startup')
+    if baseline is None:
+        print('no baseline yet; run with --update to record one', file=sys.stderr)
+        return 1
+    worse = regressions({'app_cold_start': timings['app_cold_start']}, baseline, args.tolerance)
+    for key, value, reference in worse:
+        print(f'REGRESSION: {key} {value * 1000:.1f} ms exceeds the {reference * 1000:.1f} ms baseline '
+              f'by more than {args.tolerance:.0%}', file=sys.stderr)
+    if worse:
+        return 1
+    print(f"ok: app cold start within {args.tolerance:.0%} of the baseline ({baseline['app_cold_start'] * 1000:.1f} ms)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Offline stand-ins for Yahoo Finance and Finnhub, so benchmarks never touch the network."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.market_data import OHLCV_COLUMNS, MarketDataProvider
+
+PERIOD_ROWS = {'1d': 390, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126, '1y': 252, '2y': 504, '5y': 1260}
+
+
+def synthetic_bars(n_rows, seed=0, freq='min', end='2024-01-05 21:00'):
+    """A geometric random walk shaped like a Yahoo OHLCV download."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, n_rows)) * close
+    index = pd.date_range(end=end, periods=n_rows, freq=freq, tz='UTC')
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + spread,
+                         'Low': np.minimum(open_, close) - spread, 'Close': close,
+                         'Volume': rng.integers(1, 10_000, n_rows).astype(np.float64)},
+                        index=index, columns=OHLCV_COLUMNS)
+
+
+class StubYahooProvider(MarketDataProvider):
+    """Serves synthetic bars and books for any symbol after an optional simulated ``latency``."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+
+    def bars(self, symbols, period="1d", interval="1m", start=None):
+        symbols = list(symbols)
+        self.calls.append(('bars', tuple(symbols), period, interval))
+        time.sleep(self.latency)
+        freq = 'min' if interval.endswith('m') else 'D'
+        n_rows = PERIOD_ROWS.get(period, 390)
+        return {symbol: synthetic_bars(n_rows, seed=i, freq=freq) for i, symbol in enumerate(symbols)}
+
+    def book(self, symbols):
+        symbols = list(symbols)
+        self.calls.append(('book', tuple(symbols)))
+        time.sleep(self.latency)
+        return {symbol: {'bid': 99.9, 'ask': 100.1} for symbol in symbols}
+
+
+class StubFinnhubQuotes:
+    """Same interface as ``utils.clients.FinnhubQuotes``."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def quote(self, symbol):
+        time.sleep(self.latency)
+        return {'c': 100.0, 'd': 0.5, 'dp': 0.5, 'h': 101.0, 'l': 99.0, 'o': 99.5, 'pc': 99.5, 't': int(time.time())}
@@ -0,0 +1,2 @@
+# Headless pipeline: the app's preprocessing, features, training and forecasting without Streamlit
+from commodity_predict.pipeline import find_datasets, load_dataset, run_directory, run_files, run_frame, write_results
@@ -0,0 +1,46 @@
+import argparse
+import sys
+
+from commodity_predict.pipeline import DEFAULT_PATTERNS, run_directory
+from utils.features import FeatureSpec
+from utils.preprocessing import OUTLIER_POLICIES
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m commodity_predict',
+                                     description='Train, evaluate and forecast commodity datasets without the web app.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='forecast every CSV/XLSX file in a directory',
+                              description='Forecast every CSV/XLSX file in a directory. Each dataset gets a linear '
+                                          'regression on lagged features only (see --lags); feature selection and '
+                                          'model choice are only in the app.')
+    run.add_argument('--input', required=True, help='directory of datasets')
+    run.add_argument('--output', help='directory for summary.csv and forecasts.csv, keyed by file name '
+                                      '(default: <input>/forecasts)')
+    run.add_argument('--pattern', action='append', help=f"file glob, repeatable (default: {' '.join(DEFAULT_PATTERNS)})")
+    run.add_argument('--horizon', type=int, default=30, help='days to forecast (default: 30)')
+    run.add_argument('--target', help="column to forecast (default: 'Close', else the last numeric column)")
+    run.add_argument('--outlier-policy', choices=list(OUTLIER_POLICIES),
+                     help='drop missing values and outliers first (default: keep all rows)')
+    run.add_argument('--lags', type=int, nargs='+', default=[1], help='lags used as model inputs (default: 1)')
+    run.add_argument('--test-size', type=float, default=0.2, help='chronological holdout share (default: 0.2)')
+    run.add_argument('--jobs', type=int, help='worker processes (default: one per CPU)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    spec = FeatureSpec(lags=tuple(sorted(set(args.lags))))
+    table, forecasts, (summary_path, forecasts_path) = run_directory(
+        args.input, args.output, patterns=tuple(args.pattern or DEFAULT_PATTERNS), n_jobs=args.jobs,
+        target=args.target, horizon=args.horizon, outlier_policy=args.outlier_policy, spec=spec,
+        test_size=args.test_size)
+    failed = table['error'].notna()
+    print(f'{len(forecasts)} of {len(table)} datasets forecast; summary in {summary_path}, forecasts in {forecasts_path}')
+    for name, error in table.loc[failed, 'error'].items():
+        print(f'  {name}: {error}', file=sys.stderr)
+    return 1 if failed.all() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
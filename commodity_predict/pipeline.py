@@ -0,0 +1,113 @@
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from models.batch import run_series
+from utils.features import DEFAULT_SPEC
+from utils.ingest import read_upload
+from utils.preprocessing import preprocess
+
+DEFAULT_PATTERNS = ('*.csv', '*.xlsx')
+
+
+def load_dataset(path):
+    """Read a CSV or XLSX file the same way the app reads an upload."""
+    with open(path, 'rb') as f:
+        return read_upload(f, os.path.basename(path))
+
+
+def run_frame(name, frame, target=None, horizon=30, outlier_policy=None, spec=DEFAULT_SPEC, **kwargs):
+    """Preprocess, engineer features, train, evaluate and forecast one dataset.
+
+    Unlike the app, the model is always a linear regression on the lagged
+    features of ``spec`` (no feature selection or model choice), so batch
+    results are a quick comparison rather than the app's tuned forecast.
+    ``target`` defaults to ``'Close'`` when present, otherwise the last
+    numeric column (the app's convention). With ``outlier_policy`` rows with
+    missing values or outliers are dropped first. Returns the summary row
+    and the forecast, as ``models.batch.run_series`` does.
+    """
+    if target is None:
+        numeric = frame.select_dtypes('number').columns
+        if not len(numeric):
+            raise ValueError('no numeric columns')
+        target = 'Close' if 'Close' in numeric else numeric[-1]
+    elif target not in frame.columns:
+        raise ValueError(f'no {target!r} column')
+    dropped = 0
+    if outlier_policy:
+        frame, report = preprocess(frame, policy=outlier_policy)
+        dropped = report.rows_before - report.rows_after
+    row, forecast = run_series(name, frame, target=target, horizon=horizon, spec=spec, **kwargs)
+    row.update(target=target, rows_dropped=dropped)
+    return row, forecast
+
+
+def _run_file(job):
+    path, kwargs = job
+    # The extension stays in the name so gold.csv and gold.xlsx get separate rows and columns
+    name = os.path.basename(path)
+    # Each worker gets one BLAS thread; the pool provides the parallelism
+    with threadpool_limits(1):
+        try:
+            return run_frame(name, load_dataset(path), **kwargs)
+        except Exception as e:
+            return {'name': name, 'error': str(e)}, None
+
+
+def find_datasets(input_dir, patterns=DEFAULT_PATTERNS):
+    paths = {path for pattern in patterns for path in glob.glob(os.path.join(input_dir, pattern))}
+    return sorted(paths)
+
+
+def run_files(paths, n_jobs=None, **kwargs):
+    """Run ``run_frame`` on every file, across a process pool when ``n_jobs`` allows.
+
+    Workers read their own files, so only paths and results cross process
+    boundaries. Returns a summary table indexed by file name (failures
+    are reported in its ``error`` column) and a ``{name: forecast}`` dict.
+    """
+    jobs = [(path, kwargs) for path in paths]
+    if not jobs:
+        return pd.DataFrame(columns=['error'], index=pd.Index([], name='name')), {}
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(jobs), 1))
+    if n_jobs == 1:
+        results = [_run_file(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_run_file, jobs, chunksize=max(1, len(jobs) // (n_jobs * 4))))
+    table = pd.DataFrame([row for row, _ in results])
+    # Failed datasets only carry an error, so keep that column last whichever row came first
+    table = table.reindex(columns=[col for col in table.columns if col != 'error'] + ['error'])
+    forecasts = {row['name']: forecast for row, forecast in results if forecast is not None}
+    return table.set_index('name'), forecasts
+
+
+def write_results(output_dir, table, forecasts):
+    """Write ``summary.csv`` and a wide ``forecasts.csv`` (one column per dataset) to ``output_dir``."""
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, 'summary.csv')
+    forecasts_path = os.path.join(output_dir, 'forecasts.csv')
+    table.to_csv(summary_path)
+    forecast_table = pd.DataFrame(forecasts)
+    forecast_table.index = pd.RangeIndex(1, len(forecast_table) + 1, name='Day')
+    forecast_table.to_csv(forecasts_path)
+    return summary_path, forecasts_path
+
+
+def run_directory(input_dir, output_dir=None, patterns=DEFAULT_PATTERNS, n_jobs=None, **kwargs):
+    """Forecast every dataset in ``input_dir`` and write the results to ``output_dir``.
+
+    ``output_dir`` defaults to ``<input_dir>/forecasts``. Returns the summary
+    table, the forecasts and the paths written.
+    """
+    paths = find_datasets(input_dir, patterns)
+    if not paths:
+        raise FileNotFoundError(f"no files matching {', '.join(patterns)} in {input_dir}")
+    table, forecasts = run_files(paths, n_jobs=n_jobs, **kwargs)
+    written = write_results(output_dir or os.path.join(input_dir, 'forecasts'), table, forecasts)
+    return table, forecasts, written
@@ -0,0 +1,50 @@
+# Shared configuration for the Streamlit app and the data/model helpers
+import os
+
+from dotenv import load_dotenv
+
+# Read .env once per process, before anything looks up API keys
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+STYLES_PATH = os.path.join(STATIC_DIR, 'styles.css')
+
+# Local on-disk stores (bar history, cached uploads, ...) live under data/
+DATA_DIR = os.getenv('COMMODITY_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+BAR_STORE_PATH = os.path.join(DATA_DIR, 'bars.sqlite')
+UPLOAD_DIR = os.path.join(DATA_DIR, 'uploads')
+MODEL_DIR = os.path.join(DATA_DIR, 'models')
+# Quotes and sync results shared by every Streamlit worker process on this host
+SHARED_CACHE_PATH = os.path.join(DATA_DIR, 'shared_cache.sqlite')
+SHARED_CACHE_MAX_BYTES = int(os.getenv('COMMODITY_SHARED_CACHE_MB', '64')) * 1024 * 1024
+
+# Stage timings and cache counters are written here after every page run when
+# COMMODITY_METRICS_EXPORT lists formats ('prometheus', 'jsonl'); empty turns export off
+METRICS_DIR = os.getenv('COMMODITY_METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+METRICS_EXPORT = tuple(os.getenv('COMMODITY_METRICS_EXPORT', '').replace(',', ' ').split())
+
+# Commodity data and icons (add US flag)
+COMMODITIES = [
+    {"name": "Silver", "symbol": "SI=F", "icon": "🥈", "flag": "🇺🇸"},
+    {"name": "Gold", "symbol": "GC=F", "icon": "🥇", "flag": "🇺🇸"},
+    {"name": "Copper", "symbol": "HG=F", "icon": "🥉", "flag": "🇺🇸"},
+    {"name": "Crude Oil", "symbol": "CL=F", "icon": "🛢️", "flag": "🇺🇸"},
+    {"name": "Natural Gas", "symbol": "NG=F", "icon": "🔥", "flag": "🇺🇸"},
+    {"name": "Wheat", "symbol": "ZW=F", "icon": "🌾", "flag": "🇺🇸"},
+]
+
+# Commodity mapping for yfinance and finnhub
+COMMODITY_OPTIONS = {
+    "Gold": {"yfinance": "GC=F", "finnhub": "OANDA:XAU_USD"},
+    "Silver": {"yfinance": "SI=F", "finnhub": "OANDA:XAG_USD"},
+    "Wheat": {"yfinance": "ZW=F", "finnhub": "OANDA:XW1_USD"},
+    "Crude Oil": {"yfinance": "CL=F", "finnhub": "OANDA:XWT_USD"},
+    "Natural Gas": {"yfinance": "NG=F", "finnhub": "OANDA:XNG_USD"},
+    "Copper": {"yfinance": "HG=F", "finnhub": "OANDA:XCU_USD"}
+}
+
+# Every Yahoo symbol the dashboard quotes, in display order and without duplicates
+QUOTE_SYMBOLS = tuple(dict.fromkeys(
+    [c["symbol"] for c in COMMODITIES] + [o["yfinance"] for o in COMMODITY_OPTIONS.values()]
+))
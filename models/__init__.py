@@ -0,0 +1 @@
+# Machine learning model implementations used by app.py
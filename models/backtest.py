@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+METRIC_COLUMNS = ['r2', 'mae', 'mse']
+# Below this many folds the process pool costs more than it saves
+PARALLEL_MIN_FOLDS = 64
+
+
+@dataclass
+class BacktestResult:
+    folds: pd.DataFrame
+    summary: pd.DataFrame
+
+
+def walk_forward_folds(n_rows, min_train, horizon=1, step=None, window='expanding'):
+    """Return (train_start, train_end, test_end) row bounds for each walk-forward fold.
+
+    Each fold trains on rows ``[train_start, train_end)`` and tests on the
+    next ``horizon`` rows. With ``window='sliding'`` the training window
+    keeps a fixed length of ``min_train`` rows; with ``'expanding'`` it always
+    starts at row 0. Folds advance by ``step`` rows (default ``horizon``).
+    """
+    if window not in ('expanding', 'sliding'):
+        raise ValueError(f"window must be 'expanding' or 'sliding', not {window!r}")
+    if min_train < 1 or horizon < 1:
+        raise ValueError('min_train and horizon must be positive')
+    step = step or horizon
+    ends = np.arange(min_train, n_rows - horizon + 1, step)
+    starts = ends - min_train if window == 'sliding' else np.zeros_like(ends)
+    return np.column_stack([starts, ends, ends + horizon])
+
+
+def _score_fold(X, y, fold):
+    start, split, end = fold
+    design = np.column_stack([np.ones(split - start), X[start:split]])
+    coef, *_ = np.linalg.lstsq(design, y[start:split], rcond=None)
+    y_test = y[split:end]
+    y_pred = coef[0] + X[split:end] @ coef[1:]
+    err = y_test - y_pred
+    mse = float(np.mean(err ** 2))
+    ss_tot = float(np.sum((y_test - y_test.mean()) ** 2))
+    # R² is undefined for a single test row or a constant test window
+    r2 = 1.0 - float(np.sum(err ** 2)) / ss_tot if len(y_test) > 1 and ss_tot > 0 else np.nan
+    return r2, float(np.mean(np.abs(err))), mse
+
+
+# Arrays attached from shared memory in each worker process
+_shared = {}
+
+
+def _attach(blocks):
+    # One BLAS thread per worker; the pool itself provides the parallelism
+    threadpool_limits(1)
+    for name, (shm_name, shape, dtype) in blocks.items():
+        shm = SharedMemory(name=shm_name)
+        _shared[name] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+
+def _score_folds(folds):
+    X = _shared['X'][1]
+    y = _shared['y'][1]
+    return [_score_fold(X, y, fold) for fold in folds]
+
+
+def _share(array):
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def run_folds(X, y, folds, n_jobs=None):
+    """Score every fold, in parallel on a process pool when there are enough of them."""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(folds) < PARALLEL_MIN_FOLDS:
+        return [_score_fold(X, y, fold) for fold in folds]
+    arrays = {'X': X, 'y': y}
+    shared = {name: _share(array) for name, array in arrays.items()}
+    blocks = {name: (shared[name].name, array.shape, array.dtype.str) for name, array in arrays.items()}
+    try:
+        # Workers map the arrays read-only from shared memory; only fold bounds are pickled
+        chunks = np.array_split(folds, n_jobs * 4)
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_attach, initargs=(blocks,)) as pool:
+            return [score for chunk in pool.map(_score_folds, chunks) for score in chunk]
+    finally:
+        for shm in shared.values():
+            shm.close()
+            shm.unlink()
+
+
+def walk_forward_backtest(X, y, min_train, horizon=1, step=None, window='expanding', n_jobs=None):
+    """Walk-forward backtest of an ordinary least-squares model.
+
+    Returns a ``BacktestResult`` with per-fold R², MAE and MSE and their
+    aggregate statistics.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    folds = walk_forward_folds(len(y), min_train, horizon, step, window)
+    if len(folds) == 0:
+        raise ValueError(f'{len(y)} rows are not enough for {min_train} training rows plus a {horizon}-row test window')
+    scores = np.asarray(run_folds(X, y, folds, n_jobs), dtype=np.float64).reshape(-1, 3)
+    frame = pd.DataFrame(folds, columns=['train_start', 'train_end', 'test_end'])
+    frame['train_rows'] = frame['train_end'] - frame['train_start']
+    frame[METRIC_COLUMNS] = scores
+    summary = frame[METRIC_COLUMNS].agg(['mean', 'std', 'median', 'min', 'max']).T
+    summary['folds'] = frame[METRIC_COLUMNS].notna().sum()
+    return BacktestResult(frame, summary)
@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from threadpoolctl import threadpool_limits
+
+from models.backtest import walk_forward_backtest
+from models.forecasting import RecursiveForecaster
+from models.training import holdout_split, make_xy, regression_metrics
+from utils.features import DEFAULT_SPEC, build_features
+
+
+def run_series(name, frame, target='Close', horizon=30, spec=DEFAULT_SPEC,
+               test_size=0.2, backtest_horizon=5, min_train_share=0.5):
+    """Train, evaluate and forecast one price series.
+
+    The model uses only lagged features, so nothing observed at the target's
+    own timestamp leaks into the fit. Returns a summary row and the forecast.
+    """
+    features = build_features(frame, spec)
+    lagged = [col for col in features.options if features.sources[col][1] == 'lag']
+    X, y = make_xy(features.frame, lagged + [target])
+    if len(y) < 2 * (len(lagged) + 2):
+        raise ValueError(f'only {len(y)} usable rows')
+    X_train, X_test, y_train, y_test = holdout_split(X, y, test_size)
+    holdout = regression_metrics(y_test, LinearRegression().fit(X_train, y_train).predict(X_test))
+    backtest = walk_forward_backtest(X, y, max(int(len(y) * min_train_share), X.shape[1] + 2),
+                                     horizon=backtest_horizon, n_jobs=1)
+    model = LinearRegression().fit(X, y)
+    forecast = RecursiveForecaster(model, X.columns, target, features.sources).forecast(features.frame, horizon)[0]
+    last = float(y.iloc[-1])
+    row = {
+        'name': name,
+        'rows': len(y),
+        'last': last,
+        'r2': holdout['r2'],
+        'mae': holdout['mae'],
+        'mse': holdout['mse'],
+        'backtest_r2': backtest.summary.loc['r2', 'mean'],
+        'backtest_mae': backtest.summary.loc['mae', 'mean'],
+        'forecast_end': float(forecast[-1]),
+        'forecast_change_pct': (float(forecast[-1]) - last) / last * 100 if last else np.nan,
+    }
+    return row, forecast
+
+
+def _run_job(job):
+    name, frame, kwargs = job
+    # Each worker gets one BLAS thread; the pool provides the parallelism
+    with threadpool_limits(1):
+        try:
+            return run_series(name, frame, **kwargs)
+        except Exception as e:
+            return {'name': name, 'error': str(e)}, None
+
+
+def run_batch(series, n_jobs=None, **kwargs):
+    """Run ``run_series`` for every ``{name: frame}`` item across a process pool.
+
+    Returns a comparison table indexed by name and a ``{name: forecast}``
+    dict. Series that fail are reported in the table's ``error`` column.
+    """
+    jobs = [(name, frame, kwargs) for name, frame in series.items()]
+    if not jobs:
+        return pd.DataFrame(columns=['error'], index=pd.Index([], name='name')), {}
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(jobs), 1))
+    if n_jobs == 1:
+        results = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_run_job, jobs))
+    table = pd.DataFrame([row for row, _ in results])
+    if 'error' not in table.columns:
+        table['error'] = None
+    forecasts = {row['name']: forecast for row, forecast in results if forecast is not None}
+    return table.set_index('name'), forecasts
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _window_length(op, param):
+    # How many of the most recent values of the source column a feature reads; EWMAs carry their own state
+    if op in ('raw', 'ewm'):
+        return 1
+    if op in ('lag', 'vol'):
+        return (param or 0) + 1
+    if op in ('ret', 'logret'):
+        return 2
+    return param or 1
+
+
+def _linear_predict(model, X, feature_names):
+    coef = getattr(model, 'coef_', None)
+    if coef is not None and np.ndim(coef) == 1:
+        return X @ coef + getattr(model, 'intercept_', 0.0)
+    return np.asarray(model.predict(pd.DataFrame(X, columns=feature_names)), dtype=np.float64)
+
+
+class RecursiveForecaster:
+    """Multi-step forecasts that feed each prediction back into the engineered features.
+
+    ``sources`` maps feature names to ``(column, op, param)`` as produced by
+    ``utils.features.build_features``. The forecaster keeps the last few
+    values of every source column in a fixed-size ring buffer. At each step
+    columns carry their last value forward, the target's source column is
+    updated from the prediction, and lags and window statistics are recomputed
+    from the buffer. EWMAs are advanced from their last value instead. All
+    ``n_paths`` paths are advanced together.
+    """
+
+    def __init__(self, model, feature_names, target, sources):
+        self.model = model
+        self.feature_names = list(feature_names)
+        self.target = target
+        specs = {name: sources.get(name, (name, 'raw', None)) for name in self.feature_names + [target]}
+        self.columns = list(dict.fromkeys(col for col, _, _ in specs.values()))
+        self.window = max(_window_length(op, param) for _, op, param in specs.values())
+        col_index = {col: i for i, col in enumerate(self.columns)}
+        # Every (column, span) EWMA read by a feature or the target gets one slot of running state
+        self._ewm_keys = list(dict.fromkeys((col, param) for col, op, param in specs.values() if op == 'ewm'))
+        ewm_index = {key: i for i, key in enumerate(self._ewm_keys)}
+        self._ewm_cols = np.array([col_index[col] for col, _ in self._ewm_keys], dtype=int)
+        self._ewm_alpha = np.array([2.0 / (span + 1.0) for _, span in self._ewm_keys])
+        # Group features by operation so each group is gathered with one fancy-indexing call
+        groups = {}
+        for position, name in enumerate(self.feature_names):
+            col, op, param = specs[name]
+            groups.setdefault((op, param), ([], []))
+            groups[(op, param)][0].append(position)
+            # EWMA features index into the state slots rather than the buffer
+            groups[(op, param)][1].append(ewm_index[(col, param)] if op == 'ewm' else col_index[col])
+        self._groups = [(op, param, np.array(pos), np.array(cols)) for (op, param), (pos, cols) in groups.items()]
+        col, op, param = specs[target]
+        self._target = (col_index[col], op, ewm_index[(col, param)] if op == 'ewm' else param)
+
+    def initial_window(self, history):
+        """Last ``window`` complete rows of the source columns, oldest first, as (columns, window)."""
+        tail = history[self.columns].dropna().iloc[-self.window:]
+        if len(tail) < self.window:
+            raise ValueError(f'Need at least {self.window} complete rows of {self.columns} to forecast')
+        return tail.to_numpy(dtype=np.float64).T
+
+    def initial_ewm(self, history):
+        """Each tracked EWMA at the last complete row of ``history``."""
+        complete = history[self.columns].dropna()
+        return np.array([complete[self.columns[col]].ewm(span=span).mean().iloc[-1]
+                         for col, (_, span) in zip(self._ewm_cols, self._ewm_keys)], dtype=np.float64)
+
+    def _ewm_step(self, state, newest):
+        return self._ewm_alpha * newest[:, self._ewm_cols] + (1.0 - self._ewm_alpha) * state
+
+    def _features(self, ordered, ewm):
+        X = np.empty((ordered.shape[0], len(self.feature_names)))
+        for op, param, positions, cols in self._groups:
+            if op == 'raw':
+                X[:, positions] = ordered[:, cols, -1]
+            elif op == 'lag':
+                X[:, positions] = ordered[:, cols, -1 - param]
+            elif op == 'ma':
+                X[:, positions] = ordered[:, cols, -param:].mean(axis=-1)
+            elif op == 'std':
+                X[:, positions] = ordered[:, cols, -param:].std(axis=-1, ddof=1)
+            elif op == 'min':
+                X[:, positions] = ordered[:, cols, -param:].min(axis=-1)
+            elif op == 'max':
+                X[:, positions] = ordered[:, cols, -param:].max(axis=-1)
+            elif op == 'ewm':
+                X[:, positions] = ewm[:, cols]
+            elif op == 'ret':
+                X[:, positions] = ordered[:, cols, -1] / ordered[:, cols, -2] - 1.0
+            elif op == 'logret':
+                X[:, positions] = np.log(ordered[:, cols, -1] / ordered[:, cols, -2])
+            else:
+                X[:, positions] = np.diff(np.log(ordered[:, cols, -param - 1:]), axis=-1).std(axis=-1, ddof=1)
+        return X
+
+    def _implied_value(self, prediction, ordered, ewm_state):
+        col, op, param = self._target
+        if op == 'raw':
+            return prediction
+        if op == 'ma':
+            # Invert the moving average: the newest value is w * mean minus the other w - 1 values
+            return param * prediction - ordered[:, col, -param:-1].sum(axis=-1)
+        if op == 'ret':
+            return ordered[:, col, -2] * (1.0 + prediction)
+        if op == 'logret':
+            return ordered[:, col, -2] * np.exp(prediction)
+        if op == 'ewm':
+            alpha = self._ewm_alpha[param]
+            return (prediction - (1.0 - alpha) * ewm_state[:, param]) / alpha
+        # Lags and dispersion statistics don't pin down the newest value, so it keeps its carried-forward value
+        return None
+
+    def forecast(self, history, n_steps, n_paths=1, shocks=None):
+        """Return an (n_paths, n_steps) array of forecasts following the end of ``history``.
+
+        ``shocks``, an (n_paths, n_steps) array, is added to each step's
+        prediction before it is fed back, which simulates that many sample paths.
+        """
+        if shocks is not None:
+            n_paths = shocks.shape[0]
+        window = self.initial_window(history)
+        length = self.window
+        buffer = np.empty((n_paths, len(self.columns), length))
+        buffer[:] = window
+        ewm_state = np.empty((n_paths, len(self._ewm_keys)))
+        ewm_state[:] = self.initial_ewm(history)
+        head = length - 1
+        steps = np.arange(length)
+        preds = np.empty((n_paths, n_steps))
+        for step in range(n_steps):
+            newest = buffer[:, :, head]
+            head = (head + 1) % length
+            buffer[:, :, head] = newest
+            ordered = buffer[:, :, (head + 1 + steps) % length]
+            ewm = self._ewm_step(ewm_state, buffer[:, :, head])
+            prediction = _linear_predict(self.model, self._features(ordered, ewm), self.feature_names)
+            if shocks is not None:
+                prediction = prediction + shocks[:, step]
+            preds[:, step] = prediction
+            value = self._implied_value(prediction, ordered, ewm_state)
+            if value is not None:
+                buffer[:, self._target[0], head] = value
+            ewm_state = self._ewm_step(ewm_state, buffer[:, :, head])
+        return preds
+
+
+class DirectForecaster:
+    """One linear model per horizon, all fitted with a single least-squares solve.
+
+    Row ``t`` of ``X`` is regressed on ``y[t + 1] ... y[t + horizon]``, so the
+    whole horizon is predicted from the latest feature row with one matrix
+    multiply.
+    """
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n = len(y) - self.horizon
+        if n <= X.shape[1] + 1:
+            raise ValueError(f'Need more than {X.shape[1] + 1 + self.horizon} rows for a {self.horizon}-step direct forecast')
+        design = np.column_stack([np.ones(n), X[:n]])
+        targets = sliding_window_view(y[1:], self.horizon)[:n]
+        self.coef_, *_ = np.linalg.lstsq(design, targets, rcond=None)
+        return self
+
+    def predict(self, X):
+        """Forecast every horizon for each row of ``X``; a single row gives a 1-d array."""
+        X = np.asarray(X, dtype=np.float64)
+        single = X.ndim == 1
+        X = np.atleast_2d(X)
+        preds = self.coef_[0] + X @ self.coef_[1:]
+        return preds[0] if single else preds
+
+    def residuals(self, X, y):
+        """In-sample errors as an (n, horizon) array; row ``t`` holds the errors of the forecast made at ``t``."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n = len(y) - self.horizon
+        return sliding_window_view(y[1:], self.horizon)[:n] - self.predict(X[:n])
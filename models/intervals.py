@@ -0,0 +1,93 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+BOOTSTRAP_METHODS = ('residual', 'block')
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+@dataclass
+class PredictionIntervals:
+    """Point forecast plus bootstrap quantile bands, one entry per horizon step.
+
+    ``bands`` maps each quantile to an array of ``n_steps`` values; ``paths``
+    keeps the simulated (n_paths, n_steps) sample for further risk measures.
+    """
+    point: np.ndarray
+    bands: dict
+    paths: np.ndarray
+
+    def to_frame(self):
+        """``Forecast`` followed by one ``q05``-style column per quantile."""
+        columns = {'Forecast': self.point}
+        columns.update({quantile_label(q): values for q, values in self.bands.items()})
+        return pd.DataFrame(columns)
+
+
+def quantile_label(q):
+    return f'q{q * 100:02.0f}' if round(q * 100, 6).is_integer() else f'q{q * 100:g}'
+
+
+def default_block_size(n_residuals):
+    # Cube-root rule of thumb for moving-block bootstraps
+    return max(1, round(n_residuals ** (1 / 3)))
+
+
+def bootstrap_shocks(residuals, n_paths, n_steps, method='residual', block_size=None, seed=None):
+    """Draw an (n_paths, n_steps) array of shocks from ``residuals`` with one fancy-indexing call.
+
+    ``'residual'`` samples residuals independently. ``'block'`` glues
+    together contiguous runs of ``block_size`` residuals (moving-block
+    bootstrap), which keeps their autocorrelation.
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f'method must be one of {BOOTSTRAP_METHODS}, not {method!r}')
+    residuals = np.asarray(residuals, dtype=np.float64)
+    residuals = residuals[np.isfinite(residuals)]
+    if not len(residuals):
+        raise ValueError('no finite residuals to resample')
+    rng = np.random.default_rng(seed)
+    if method == 'residual':
+        return residuals[rng.integers(0, len(residuals), size=(n_paths, n_steps))]
+    block_size = min(block_size or default_block_size(len(residuals)), len(residuals))
+    n_blocks = math.ceil(n_steps / block_size)
+    starts = rng.integers(0, len(residuals) - block_size + 1, size=(n_paths, n_blocks))
+    positions = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n_steps]
+    return residuals[positions]
+
+
+def _summarize(point, paths, quantiles):
+    levels = np.quantile(paths, quantiles, axis=0)
+    return PredictionIntervals(np.asarray(point, dtype=np.float64), dict(zip(quantiles, levels)), paths)
+
+
+def recursive_intervals(forecaster, history, residuals, n_steps, n_paths=2000, method='residual',
+                        block_size=None, quantiles=DEFAULT_QUANTILES, seed=None):
+    """Bootstrap bands for a ``RecursiveForecaster``.
+
+    Each path adds a resampled one-step residual to every prediction before
+    it is fed back, so errors compound over the horizon as they would in
+    practice. All paths advance together through the forecaster's batched
+    recursion.
+    """
+    point = forecaster.forecast(history, n_steps)[0]
+    shocks = bootstrap_shocks(residuals, n_paths, n_steps, method, block_size, seed)
+    return _summarize(point, forecaster.forecast(history, n_steps, shocks=shocks), quantiles)
+
+
+def direct_intervals(model, x_last, residuals, n_paths=2000, quantiles=DEFAULT_QUANTILES, seed=None):
+    """Bootstrap bands for a ``DirectForecaster``'s forecast from the feature row ``x_last``.
+
+    ``residuals`` is the model's (n, horizon) in-sample error matrix. Each
+    path adds one whole resampled row, so every path is already a block of
+    ``horizon`` consecutive errors and the horizons keep their correlation.
+    """
+    residuals = np.asarray(residuals, dtype=np.float64)
+    residuals = residuals[np.isfinite(residuals).all(axis=1)]
+    if not len(residuals):
+        raise ValueError('no finite residuals to resample')
+    point = model.predict(x_last)
+    rows = np.random.default_rng(seed).integers(0, len(residuals), size=n_paths)
+    return _summarize(point, point + residuals[rows], quantiles)
@@ -0,0 +1,149 @@
+import os
+import tempfile
+
+import numpy as np
+
+
+class OnlineLinearRegression:
+    """Linear regression updated incrementally instead of refitted on the full history.
+
+    The model keeps the (exponentially weighted) sufficient statistics XᵀX,
+    Xᵀy and the row count, plus the inverse ``P`` of XᵀX used by recursive
+    least squares. A single new row updates the coefficients in O(p²).
+    Larger batches fold their statistics in and re-solve once. ``forgetting``
+    below 1 down-weights older rows by that factor per row, so the fit tracks
+    drifting relationships. ``ridge`` is a tiny prior that keeps the first
+    updates well defined.
+    """
+
+    def __init__(self, forgetting=1.0, ridge=1e-8):
+        if not 0 < forgetting <= 1:
+            raise ValueError('forgetting must be in (0, 1]')
+        self.forgetting = forgetting
+        self.ridge = ridge
+        self.n_features_in_ = None
+
+    def get_params(self, deep=True):
+        return {'forgetting': self.forgetting, 'ridge': self.ridge}
+
+    def _reset(self, n_features):
+        size = n_features + 1
+        self.n_features_in_ = n_features
+        self.xtx_ = np.zeros((size, size))
+        self.xty_ = np.zeros(size)
+        self.n_samples_seen_ = 0
+        self.prior_ = self.ridge
+        self.P_ = np.eye(size) / self.ridge
+        self.theta_ = np.zeros(size)
+
+    @staticmethod
+    def _design(X):
+        X = np.asarray(X, dtype=np.float64)
+        X = X.reshape(1, -1) if X.ndim == 1 else X
+        return np.column_stack([np.ones(len(X)), X])
+
+    def fit(self, X, y):
+        self.n_features_in_ = None
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        """Fold new rows into the model without revisiting earlier ones."""
+        if hasattr(X, 'columns'):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        A = self._design(X)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+        if self.n_features_in_ is None:
+            self._reset(A.shape[1] - 1)
+        elif A.shape[1] - 1 != self.n_features_in_:
+            raise ValueError(f'Expected {self.n_features_in_} features, got {A.shape[1] - 1}')
+        lam = self.forgetting
+        if len(A) <= A.shape[1]:
+            for a, target in zip(A, y):
+                self._update_row(a, target, lam)
+        else:
+            # Older rows in the batch are down-weighted by the forgetting factor too
+            weights = lam ** np.arange(len(A) - 1, -1, -1)
+            decay = lam ** len(A)
+            self.xtx_ = decay * self.xtx_ + (A * weights[:, None]).T @ A
+            self.xty_ = decay * self.xty_ + (A * weights[:, None]).T @ y
+            self.prior_ *= decay
+            self.n_samples_seen_ += len(A)
+            self._solve()
+        return self
+
+    def _update_row(self, a, target, lam):
+        # Recursive least squares: rank-one update of P = (XᵀX)⁻¹ and the coefficients
+        Pa = self.P_ @ a
+        gain = Pa / (lam + a @ Pa)
+        self.theta_ = self.theta_ + gain * (target - a @ self.theta_)
+        self.P_ = (self.P_ - np.outer(gain, Pa)) / lam
+        self.xtx_ = lam * self.xtx_ + np.outer(a, a)
+        self.xty_ = lam * self.xty_ + a * target
+        self.prior_ *= lam
+        self.n_samples_seen_ += 1
+
+    def _solve(self):
+        gram = self.xtx_ + self.prior_ * np.eye(len(self.xty_))
+        try:
+            self.P_ = np.linalg.inv(gram)
+        except np.linalg.LinAlgError:
+            self.P_ = np.linalg.pinv(gram)
+        self.theta_ = self.P_ @ self.xty_
+
+    def refresh(self):
+        """Re-solve exactly from the sufficient statistics, clearing accumulated RLS rounding."""
+        self._solve()
+        return self
+
+    @property
+    def coef_(self):
+        return self.theta_[1:]
+
+    @property
+    def intercept_(self):
+        return self.theta_[0]
+
+    def predict(self, X):
+        return self._design(X) @ self.theta_
+
+    def state_dict(self):
+        state = {'forgetting': self.forgetting, 'ridge': self.ridge}
+        if self.n_features_in_ is not None:
+            state.update(xtx=self.xtx_, xty=self.xty_, n_samples_seen=self.n_samples_seen_,
+                         prior=self.prior_, P=self.P_, theta=self.theta_)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(forgetting=float(state['forgetting']), ridge=float(state['ridge']))
+        if 'theta' in state:
+            model.n_features_in_ = len(state['theta']) - 1
+            model.xtx_ = np.asarray(state['xtx'], dtype=np.float64)
+            model.xty_ = np.asarray(state['xty'], dtype=np.float64)
+            model.n_samples_seen_ = int(state['n_samples_seen'])
+            model.prior_ = float(state['prior'])
+            model.P_ = np.asarray(state['P'], dtype=np.float64)
+            model.theta_ = np.asarray(state['theta'], dtype=np.float64)
+        return model
+
+    def save(self, path, **metadata):
+        """Write the model state, plus any ``metadata`` arrays, to an ``.npz`` file atomically."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        os.close(fd)
+        try:
+            np.savez(tmp_path, **self.state_dict(), **{f'meta_{key}': value for key, value in metadata.items()})
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, with_metadata=False):
+        """Read a model written by ``save``; with ``with_metadata`` also return its metadata dict."""
+        with np.load(path) as archive:
+            state = {key: archive[key] for key in archive.files}
+        model = cls.from_state(state)
+        if not with_metadata:
+            return model
+        return model, {key[len('meta_'):]: value for key, value in state.items() if key.startswith('meta_')}
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import joblib
+
+from utils.instrumentation import telemetry
+
+
+@dataclass
+class RegistryEntry:
+    """A fitted model together with how it was trained and how well it scored."""
+    key: str
+    model: object
+    metrics: dict
+    trained_at: datetime
+    params: dict = field(default_factory=dict)
+
+
+def model_key(dataset_digest, features, target, params):
+    """Stable key for a model trained on one dataset, feature list, target and hyperparameters."""
+    payload = json.dumps({'dataset': dataset_digest, 'features': list(features), 'target': target,
+                          'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ModelRegistry:
+    """Two-level cache of fitted models: an in-memory LRU backed by joblib files on disk.
+
+    Entries survive restarts and are shared by every session and process
+    that points at the same ``root``.
+    """
+
+    def __init__(self, root, capacity=16):
+        self.root = root
+        self.capacity = capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f'{key}.joblib')
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = joblib.load(path)
+        except Exception:
+            # A truncated or incompatible file is treated as a miss and retrained
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, entry):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump(entry, tmp_path)
+            os.replace(tmp_path, self._path(entry.key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._remember(entry.key, entry)
+        return entry
+
+    def get_or_train(self, key, train_fn, params=None):
+        """Return the entry for ``key``, calling ``train_fn() -> (model, metrics)`` on a miss."""
+        entry = self.get(key)
+        telemetry.cache('model_registry', entry is not None)
+        if entry is not None:
+            return entry
+        with telemetry.stage('fit'):
+            model, metrics = train_fn()
+        return self.put(RegistryEntry(key=key, model=model, metrics=metrics,
+                                      trained_at=datetime.now(timezone.utc), params=dict(params or {})))
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
@@ -0,0 +1,238 @@
+import itertools
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+SELECTION_METHODS = ('auto', 'forward', 'backward', 'exhaustive')
+CRITERIA = ('bic', 'aic')
+# 'auto' searches every subset up to this many candidates (2**12 = 4096 fits), stepwise beyond
+EXHAUSTIVE_MAX_FEATURES = 12
+# 'exhaustive' refuses searches beyond this many subsets (every subset of 21 features)
+EXHAUSTIVE_MAX_SUBSETS = 1 << 21
+# Below this many subsets the process pool costs more than it saves
+PARALLEL_MIN_SUBSETS = 1_000_000
+# Subsets solved together in one batched call
+BATCH_SUBSETS = 4096
+# Added to the Gram diagonal (relative to the row count) so collinear subsets stay solvable
+RIDGE = 1e-10
+
+
+@dataclass
+class Gram:
+    """Cross-products of standardized features and centered target.
+
+    ``xx`` is XᵀX (p×p), ``xy`` is Xᵀy and ``yy`` is yᵀy. Every subset's
+    least-squares fit, with an intercept, follows from sub-blocks of these.
+    """
+    xx: np.ndarray
+    xy: np.ndarray
+    yy: float
+    n_rows: int
+    names: list
+
+    @classmethod
+    def from_data(cls, X, y):
+        names = list(getattr(X, 'columns', range(np.shape(X)[1])))
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        # Centering absorbs the intercept; scaling keeps the blocks well conditioned
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Xs = (X - X.mean(axis=0)) / scale
+        yc = y - y.mean()
+        return cls(Xs.T @ Xs, Xs.T @ yc, float(yc @ yc), len(y), names)
+
+    def rss(self, subset):
+        """Residual sum of squares of the fit on the feature positions in ``subset``."""
+        subset = list(subset)
+        if not subset:
+            return self.yy
+        block = self.xx[np.ix_(subset, subset)] + RIDGE * self.n_rows * np.eye(len(subset))
+        rhs = self.xy[subset]
+        return float(self.yy - rhs @ np.linalg.solve(block, rhs))
+
+    def rss_batch(self, subsets):
+        """RSS for many equal-sized subsets (an ``(m, k)`` index array) with one batched solve."""
+        subsets = np.asarray(subsets, dtype=np.intp)
+        if subsets.shape[1] == 0:
+            return np.full(len(subsets), self.yy)
+        blocks = self.xx[subsets[:, :, None], subsets[:, None, :]]
+        blocks += RIDGE * self.n_rows * np.eye(subsets.shape[1])
+        rhs = self.xy[subsets]
+        coef = np.linalg.solve(blocks, rhs[..., None])[..., 0]
+        return self.yy - np.einsum('ij,ij->i', rhs, coef)
+
+
+def information_criterion(rss, n_rows, n_features, criterion='bic'):
+    """BIC or AIC of a Gaussian linear model with an intercept; lower is better."""
+    if criterion not in CRITERIA:
+        raise ValueError(f'criterion must be one of {CRITERIA}, not {criterion!r}')
+    penalty = math.log(n_rows) if criterion == 'bic' else 2.0
+    rss = np.maximum(rss, np.finfo(float).tiny)
+    return n_rows * np.log(rss / n_rows) + penalty * (np.asarray(n_features) + 1)
+
+
+@dataclass
+class SelectionResult:
+    features: list
+    score: float
+    criterion: str
+    method: str
+    # One row per step (or per subset size for exhaustive search) with the running best score
+    path: pd.DataFrame
+
+
+def _forward(gram, criterion, max_features):
+    p = len(gram.names)
+    chosen, rows = [], []
+    ridge = RIDGE * gram.n_rows
+    best = information_criterion(gram.yy, gram.n_rows, 0, criterion)
+    rows.append({'step': 0, 'action': 'start', 'feature': None, 'n_features': 0, 'score': best})
+    while len(chosen) < max_features:
+        candidates = np.setdiff1d(np.arange(p), chosen)
+        if not len(candidates):
+            break
+        if chosen:
+            # Adding column j cuts RSS by (xy_j - x_jᵀ S⁻¹ xy_S)² / (xx_jj - x_jᵀ S⁻¹ x_j), for every j at once
+            chol = np.linalg.cholesky(gram.xx[np.ix_(chosen, chosen)] + ridge * np.eye(len(chosen)))
+            cross = np.linalg.solve(chol, gram.xx[np.ix_(chosen, candidates)])
+            fitted = np.linalg.solve(chol, gram.xy[chosen])
+            numerator = (gram.xy[candidates] - cross.T @ fitted) ** 2
+            denominator = np.diag(gram.xx)[candidates] + ridge - np.einsum('ij,ij->j', cross, cross)
+            rss = gram.rss(chosen)
+        else:
+            numerator = gram.xy[candidates] ** 2
+            denominator = np.diag(gram.xx)[candidates] + ridge
+            rss = gram.yy
+        gain = numerator / np.maximum(denominator, ridge)
+        pick = int(np.argmax(gain))
+        score = float(information_criterion(rss - gain[pick], gram.n_rows, len(chosen) + 1, criterion))
+        if score >= best:
+            break
+        best = score
+        chosen.append(int(candidates[pick]))
+        rows.append({'step': len(rows), 'action': 'add', 'feature': gram.names[chosen[-1]],
+                     'n_features': len(chosen), 'score': score})
+    return chosen, best, rows
+
+
+def _backward(gram, criterion, max_features):
+    chosen = list(range(len(gram.names)))
+    ridge = RIDGE * gram.n_rows
+    best = float(information_criterion(gram.rss(chosen), gram.n_rows, len(chosen), criterion))
+    rows = [{'step': 0, 'action': 'start', 'feature': None, 'n_features': len(chosen), 'score': best}]
+    while chosen:
+        inverse = np.linalg.inv(gram.xx[np.ix_(chosen, chosen)] + ridge * np.eye(len(chosen)))
+        coef = inverse @ gram.xy[chosen]
+        # Dropping column j raises RSS by coef_j² / (S⁻¹)_jj, for every j at once
+        loss = coef ** 2 / np.diag(inverse)
+        pick = int(np.argmin(loss))
+        score = float(information_criterion(gram.rss(chosen) + loss[pick], gram.n_rows, len(chosen) - 1, criterion))
+        # Keep dropping past the optimum while the set is larger than allowed
+        if score >= best and len(chosen) <= max_features:
+            break
+        best = score
+        dropped = chosen.pop(pick)
+        rows.append({'step': len(rows), 'action': 'drop', 'feature': gram.names[dropped],
+                     'n_features': len(chosen), 'score': score})
+    return chosen, best, rows
+
+
+def _subset_chunks(p, k, start=0, stop=None):
+    """The ``k``-subsets of ``range(p)`` from position ``start`` to ``stop``, ``BATCH_SUBSETS`` at a time.
+
+    Each chunk is an ``(m, k)`` index array. Subsets are generated lazily, so
+    memory stays bounded however many there are.
+    """
+    combinations = itertools.islice(itertools.combinations(range(p), k), start, stop)
+    while True:
+        rows = list(itertools.islice(combinations, BATCH_SUBSETS))
+        if not rows:
+            return
+        yield np.array(rows, dtype=np.intp).reshape(len(rows), k)
+
+
+def _best_of(gram, chunks, criterion):
+    best = (math.inf, None)
+    for subsets in chunks:
+        scores = information_criterion(gram.rss_batch(subsets), gram.n_rows, subsets.shape[1], criterion)
+        pick = int(np.argmin(scores))
+        if scores[pick] < best[0]:
+            best = (float(scores[pick]), subsets[pick].tolist())
+    return best
+
+
+def _best_of_range(args):
+    gram, k, start, stop, criterion = args
+    # One BLAS thread per worker; the pool itself provides the parallelism
+    with threadpool_limits(1):
+        return _best_of(gram, _subset_chunks(len(gram.names), k, start, stop), criterion)
+
+
+def _exhaustive(gram, criterion, max_features, n_jobs):
+    p = len(gram.names)
+    sizes = range(0, max_features + 1)
+    counts = {k: math.comb(p, k) for k in sizes}
+    n_subsets = sum(counts.values())
+    if n_subsets > EXHAUSTIVE_MAX_SUBSETS:
+        raise ValueError(f'exhaustive search over {p} features would score {n_subsets:,} subsets, more than '
+                         f'{EXHAUSTIVE_MAX_SUBSETS:,}; lower max_features or use forward or backward selection')
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1 and n_subsets >= PARALLEL_MIN_SUBSETS:
+        # Workers enumerate their own ranges of subsets, so nothing large is built or pickled here
+        step = max(BATCH_SUBSETS, math.ceil(n_subsets / n_jobs))
+        jobs = [(gram, k, start, min(start + step, counts[k]), criterion)
+                for k in sizes for start in range(0, counts[k], step)]
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_best_of_range, jobs))
+        per_size = {}
+        for (_, k, _, _, _), (score, subset) in zip(jobs, results):
+            if k not in per_size or score < per_size[k][0]:
+                per_size[k] = (score, subset)
+    else:
+        per_size = {k: _best_of(gram, _subset_chunks(p, k), criterion) for k in sizes}
+    rows = [{'step': k, 'action': 'best of size', 'feature': ', '.join(str(gram.names[i]) for i in per_size[k][1]),
+             'n_features': k, 'score': per_size[k][0]} for k in sizes]
+    score, chosen = min(per_size.values(), key=lambda item: item[0])
+    return chosen, score, rows
+
+
+def select_features(X, y, method='auto', criterion='bic', max_features=None, n_jobs=None):
+    """Pick the subset of ``X``'s columns that best explains ``y`` under an information criterion.
+
+    XᵀX and Xᵀy are computed once. Every candidate subset is then scored
+    from sub-blocks of them, without touching the raw rows again.
+    ``'forward'`` adds and ``'backward'`` drops one column at a time. Each
+    step scores all candidate moves at once and stops when the criterion
+    stops improving. ``'exhaustive'`` scores every subset of up to
+    ``max_features`` columns in batched solves, spread over ``n_jobs``
+    processes when there are many, and raises ``ValueError`` rather than
+    score more than ``EXHAUSTIVE_MAX_SUBSETS``. ``'auto'`` is exhaustive for
+    at most ``EXHAUSTIVE_MAX_FEATURES`` columns and forward otherwise.
+    """
+    if method not in SELECTION_METHODS:
+        raise ValueError(f'method must be one of {SELECTION_METHODS}, not {method!r}')
+    gram = Gram.from_data(X, y)
+    p = len(gram.names)
+    if p == 0:
+        raise ValueError('no candidate features')
+    if gram.n_rows < 3:
+        raise ValueError(f'{gram.n_rows} rows are not enough to select features')
+    max_features = min(p, gram.n_rows - 2, max_features or p)
+    if method == 'auto':
+        method = 'exhaustive' if p <= EXHAUSTIVE_MAX_FEATURES else 'forward'
+    if method == 'forward':
+        chosen, score, rows = _forward(gram, criterion, max_features)
+    elif method == 'backward':
+        chosen, score, rows = _backward(gram, criterion, max_features)
+    else:
+        chosen, score, rows = _exhaustive(gram, criterion, max_features, n_jobs)
+    # Report features in their original column order
+    features = [gram.names[i] for i in sorted(chosen)]
+    return SelectionResult(features, float(score), criterion, method, pd.DataFrame(rows))
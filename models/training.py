@@ -0,0 +1,126 @@
+import hashlib
+import os
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from models.forecasting import DirectForecaster
+from models.online import OnlineLinearRegression
+from models.registry import model_key
+
+# Online models' running state, per feature set and target, under the registry root
+ONLINE_STATE_DIR = 'online'
+
+
+# Estimators selectable for training, by registry name
+ESTIMATORS = {
+    'LinearRegression': LinearRegression,
+    'OnlineLinearRegression': OnlineLinearRegression,
+}
+
+
+def make_xy(frame, selected_features):
+    """Split the selected columns into features and target; the last selected column is the target."""
+    df_model = frame[selected_features].dropna()
+    return df_model.iloc[:, :-1], df_model.iloc[:, -1]
+
+
+def regression_metrics(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    return {
+        'r2': float(r2_score(y_true, y_pred)),
+        'mae': float(np.mean(np.abs(y_true - y_pred))),
+        'mse': float(np.mean((y_true - y_pred) ** 2)),
+    }
+
+
+def holdout_split(X, y, test_size):
+    # Chronological split: the held-out rows are the most recent ones, never shuffled into training
+    return train_test_split(X, y, test_size=test_size, shuffle=False)
+
+
+def _fingerprint(X, y, n_rows):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X.to_numpy(dtype=np.float64)[:n_rows]).tobytes())
+    digest.update(np.ascontiguousarray(y.to_numpy(dtype=np.float64)[:n_rows]).tobytes())
+    return digest.hexdigest()
+
+
+def fit_online(path, make_model, X, y):
+    """Bring the online model persisted at ``path`` up to date with ``X``/``y`` and save it again.
+
+    When the rows the saved model has already seen are an unchanged prefix
+    of ``X``/``y``, only the rows appended since are folded in with
+    ``partial_fit``. Otherwise, or when nothing is saved yet, the model is
+    fitted from scratch. A fingerprint of the rows seen is stored with the
+    state to tell the two apart.
+    """
+    model = None
+    if os.path.exists(path):
+        try:
+            model, metadata = OnlineLinearRegression.load(path, with_metadata=True)
+        except Exception:
+            # An unreadable state file is treated like a missing one
+            model = None
+        if model is not None:
+            seen = model.n_samples_seen_
+            if (model.n_features_in_ != X.shape[1] or seen > len(X)
+                    or str(metadata.get('fingerprint')) != _fingerprint(X, y, seen)):
+                model = None
+    if model is None:
+        model = make_model().fit(X, y)
+    elif model.n_samples_seen_ < len(X):
+        # Re-solving from the statistics clears any rounding the row-by-row updates left behind
+        model.partial_fit(X.iloc[model.n_samples_seen_:], y.iloc[model.n_samples_seen_:]).refresh()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    model.save(path, fingerprint=_fingerprint(X, y, len(X)))
+    return model
+
+
+def train_model(registry, dataset_digest, frame, selected_features, test_size=None,
+                estimator='LinearRegression', estimator_params=None):
+    """Fit (or load) a regression model on ``selected_features``.
+
+    With ``test_size`` the model is fitted on the earliest rows and scored on
+    the most recent ``test_size`` share; otherwise it is fitted on everything
+    and scored in-sample. Returns the registry entry and the full ``X``/``y``.
+
+    A new dataset digest normally means a full refit. The online estimator
+    instead resumes from its saved state when the new data only appends
+    rows to what it was last trained on, and folds in just those rows.
+    """
+    X, y = make_xy(frame, selected_features)
+
+    def make_model():
+        return ESTIMATORS[estimator](**(estimator_params or {}))
+
+    params = {'estimator': estimator, **make_model().get_params(),
+              'test_size': test_size, 'split': 'chronological'}
+
+    def fit():
+        if test_size:
+            X_train, X_test, y_train, y_test = holdout_split(X, y, test_size)
+        else:
+            X_train, X_test, y_train, y_test = X, X, y, y
+        if estimator == 'OnlineLinearRegression':
+            # One running state per feature set, target and settings, whatever the dataset digest
+            stream = model_key(None, X.columns, y.name, params)
+            model = fit_online(os.path.join(registry.root, ONLINE_STATE_DIR, f'{stream}.npz'),
+                               make_model, X_train, y_train)
+        else:
+            model = make_model()
+            model.fit(X_train, y_train)
+        return model, regression_metrics(y_test, model.predict(X_test))
+
+    key = model_key(dataset_digest, X.columns, y.name, params)
+    return registry.get_or_train(key, fit, params), X, y
+
+
+def train_direct(registry, dataset_digest, X, y, horizon):
+    """Fit (or load) a DirectForecaster predicting ``horizon`` steps of ``y`` from ``X``."""
+    params = {'estimator': 'DirectForecaster', 'horizon': horizon}
+    key = model_key(dataset_digest, X.columns, y.name, params)
+    return registry.get_or_train(key, lambda: (DirectForecaster(horizon).fit(X, y), {}), params)
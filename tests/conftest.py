@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Import the app's packages from the checkout and keep every on-disk store out of data/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('COMMODITY_DATA_DIR', tempfile.mkdtemp(prefix='commodity-tests-'))
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregation import BarAggregator, sparkline_points
+from utils.market_data import OHLCV_COLUMNS, QuoteEngine, StaticProvider
+
+
+def _minutes(start, periods, seed=5, tz='America/New_York'):
+    rng = np.random.default_rng(seed)
+    close = 70 + rng.normal(0, 0.05, periods).cumsum()
+    open_ = np.concatenate([[close[0] - 0.01], close[:-1]])
+    index = pd.date_range(start, periods=periods, freq='min', tz=tz, name='Datetime')
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + 0.02,
+                         'Low': np.minimum(open_, close) - 0.02, 'Close': close,
+                         'Volume': rng.integers(1, 500, periods).astype(np.float64)}, index=index)
+
+
+def _resample(bars, rule, **kwargs):
+    wall = bars.tz_localize(None)
+    frame = wall.resample(rule, **kwargs).agg({'Open': 'first', 'High': 'max', 'Low': 'min',
+                                               'Close': 'last', 'Volume': 'sum'})
+    return frame.dropna(subset=['Close'])[OHLCV_COLUMNS]
+
+
+@pytest.mark.parametrize('timeframe, rule', [('5m', '5min'), ('15m', '15min'), ('1h', '1h')])
+def test_rollups_match_resample_with_revisions(timeframe, rule):
+    bars = _minutes('2024-03-04 18:00', 900)
+    aggregator = BarAggregator()
+    # Uneven slices that overlap by one minute, like tail fetches, each first sent with a
+    # provisional last minute that the next update revises
+    edges = [0, 1, 7, 60, 61, 300, 599, 900]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        chunk = bars.iloc[max(lo - 1, 0):hi]
+        provisional = chunk.copy()
+        provisional.iloc[-1, provisional.columns.get_loc('Close')] += 5.0
+        aggregator.update('CL=F', provisional)
+        aggregator.update('CL=F', chunk.iloc[-1:])
+    expected = _resample(bars, rule)
+    result = aggregator.bars('CL=F', timeframe)
+    pd.testing.assert_frame_equal(result, expected, check_freq=False, check_names=False)
+
+
+def test_daily_bars_start_at_the_session_open():
+    # Two overnight sessions: 18:00 to 17:00 the next day, with the hourly break in between
+    first = _minutes('2024-03-04 18:00', 23 * 60, seed=6)
+    second = _minutes('2024-03-05 18:00', 6 * 60, seed=7)
+    aggregator = BarAggregator()
+    aggregator.update('CL=F', first.iloc[:30])
+    aggregator.update('CL=F', pd.concat([first.iloc[30:], second]))
+    daily = aggregator.bars('CL=F', '1d')
+    expected = _resample(pd.concat([first, second]), '1D', offset='18h')
+    pd.testing.assert_frame_equal(daily, expected, check_freq=False, check_names=False)
+    assert daily.index[-1] == pd.Timestamp('2024-03-05 18:00')
+
+
+def test_quote_engine_keeps_the_session_open_reference():
+    session = _minutes('2024-03-04 18:00', 16 * 60, seed=8)
+    provider = StaticProvider({'CL=F': session}, {'CL=F': {'bid': 70.0, 'ask': 70.1}})
+    plain = QuoteEngine(StaticProvider({'CL=F': session})).get_quotes(['CL=F'])
+    engine = QuoteEngine(provider, aggregator=BarAggregator())
+    quotes = engine.get_quotes(['CL=F'])
+    assert quotes.loc['CL=F', 'change'] == pytest.approx(plain.loc['CL=F', 'change'])
+    expected = (session['Close'].iloc[-1] / session['Open'].iloc[0] - 1) * 100
+    assert quotes.loc['CL=F', 'change'] == pytest.approx(expected)
+    assert len(quotes.loc['CL=F', 'sparkline']) == 32
+
+
+def _recent(hours_ago):
+    # Tail requests only apply to bars inside the requested period, so these are stamped relative to now
+    return (pd.Timestamp.now(tz='America/New_York') - pd.Timedelta(hours=hours_ago)).floor('min').tz_localize(None)
+
+
+def test_quote_engine_only_fetches_the_tail_after_the_first_call():
+    start = _recent(3)
+    session = _minutes(start, 120)
+    provider = StaticProvider({'CL=F': session})
+    engine = QuoteEngine(provider, with_book=False, aggregator=BarAggregator())
+    engine.get_quotes(['CL=F'])
+    provider.frames['CL=F'] = _minutes(start, 130)
+    quotes = engine.get_quotes(['CL=F'])
+    assert provider.calls[0][-1] is None
+    assert provider.calls[1][-1] == session.index[-1].tz_convert('UTC')
+    assert quotes.loc['CL=F', 'price'] == pytest.approx(provider.frames['CL=F']['Close'].iloc[-1])
+
+
+def test_quote_engine_groups_tails_by_start_and_refetches_stale_symbols():
+    frames = {'CL=F': _minutes(_recent(3), 120), 'NG=F': _minutes(_recent(3), 121, seed=6),
+              'GC=F': _minutes(_recent(20), 60, seed=7), 'SI=F': _minutes('2024-03-04 18:00', 60, seed=9)}
+    provider = StaticProvider(frames)
+    engine = QuoteEngine(provider, with_book=False, aggregator=BarAggregator())
+    engine.get_quotes(list(frames), period='5d')
+    provider.calls.clear()
+    engine.get_quotes(list(frames), period='5d')
+    starts = {symbols: start for _, symbols, _, _, start in provider.calls}
+    # SI=F's last bar is older than the period, so it gets the whole period rather than a tail from 2024
+    assert starts[('SI=F',)] is None
+    # GC=F is hours behind, so it does not pull the two up-to-date symbols' request back with it
+    assert starts[('GC=F',)] == frames['GC=F'].index[-1].tz_convert('UTC')
+    assert starts[('CL=F', 'NG=F')] == frames['CL=F'].index[-1].tz_convert('UTC')
+    assert len(provider.calls) == 3
+
+
+def test_sparkline_points_scale_into_the_box():
+    points = sparkline_points([1.0, 3.0, 2.0], width=32, height=20, pad=2)
+    assert points == '2.0,18.0 16.0,2.0 30.0,10.0'
+    assert sparkline_points([1.0]) == ''
@@ -0,0 +1,76 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+class _Upload(io.BytesIO):
+    # Just enough of Streamlit's UploadedFile for the app's upload path
+    def __init__(self, raw, name):
+        super().__init__(raw)
+        self.name = name
+        self.file_id = name
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # AppTest cannot drive file_uploader, so the widget hands the app a prepared CSV instead
+    rng = np.random.default_rng(13)
+    close = 100 + rng.normal(0, 1, 250).cumsum()
+    frame = pd.DataFrame({'Date': pd.date_range('2023-01-01', periods=250).strftime('%Y-%m-%d'), 'Close': close})
+    upload = _Upload(frame.to_csv(index=False).encode(), 'prices.csv')
+    monkeypatch.setattr(streamlit, 'file_uploader', lambda *args, **kwargs: upload)
+    # The script runner installs app.py as __main__, which spawned worker pools would then re-run
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    at.button(key='welcome_btn').click().run()
+    _rerun(at.button(key='nav_How it works?').click())
+    assert not at.exception
+    return at
+
+
+def _rerun(widget):
+    # AppTest sends choices back by their label, which a format_func widget never matches
+    # (see Selectbox.set_value), so untouched ones are pinned to the label they display
+    for choice in [*widget.root.selectbox, *widget.root.radio]:
+        if choice.value is not None and str(choice.value) not in choice.options:
+            choice.select_index(choice.proto.default)
+    return widget.run()
+
+
+def _widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def test_forecast_settings_survive_reruns(app):
+    _rerun(_widget(app.radio, 'Forecast mode:').set_value('Direct multi-horizon'))
+    _rerun(_widget(app.number_input, 'Forecast next n-days:').set_value(12))
+    assert not app.exception
+    assert _widget(app.radio, 'Forecast mode:').value == 'Direct multi-horizon'
+    assert _widget(app.number_input, 'Forecast next n-days:').value == 12
+
+
+def test_direct_forecast_renders_its_interval_table(app, monkeypatch):
+    import models.intervals
+
+    calls = []
+    direct_intervals = models.intervals.direct_intervals
+    monkeypatch.setattr(models.intervals, 'direct_intervals',
+                        lambda *args, **kwargs: calls.append(args) or direct_intervals(*args, **kwargs))
+    _rerun(_widget(app.radio, 'Forecast mode:').set_value('Direct multi-horizon'))
+    _rerun(_widget(app.number_input, 'Forecast next n-days:').set_value(7))
+    _rerun(_widget(app.button, 'Results Visualization').click())
+    assert not app.exception
+    assert len(calls) == 1
+    table = app.dataframe[-1].value
+    assert list(table.columns) == ['Forecast', 'q05', 'q25', 'q50', 'q75', 'q95']
+    assert len(table) == 7
+    assert (table['q95'] >= table['q05']).all()
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from models.backtest import PARALLEL_MIN_FOLDS, walk_forward_backtest, walk_forward_folds
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(10)
+    X = rng.normal(size=(600, 4))
+    y = X @ [1.0, -0.5, 0.25, 2.0] + rng.normal(0, 0.5, 600)
+    return X, y
+
+
+def test_folds_cover_expanding_and_sliding_windows():
+    expanding = walk_forward_folds(20, min_train=10, horizon=3)
+    np.testing.assert_array_equal(expanding, [[0, 10, 13], [0, 13, 16], [0, 16, 19]])
+    sliding = walk_forward_folds(20, min_train=10, horizon=3, step=5, window='sliding')
+    np.testing.assert_array_equal(sliding, [[0, 10, 13], [5, 15, 18]])
+
+
+def test_fold_scores_match_sklearn(data):
+    X, y = data
+    result = walk_forward_backtest(X, y, min_train=400, horizon=50)
+    first = result.folds.iloc[0]
+    model = LinearRegression().fit(X[:400], y[:400])
+    err = y[400:450] - model.predict(X[400:450])
+    assert first['mae'] == pytest.approx(np.mean(np.abs(err)))
+    assert first['mse'] == pytest.approx(np.mean(err ** 2))
+
+
+def test_parallel_folds_match_serial(data):
+    X, y = data
+    serial = walk_forward_backtest(X, y, min_train=100, horizon=5, n_jobs=1)
+    assert len(serial.folds) >= PARALLEL_MIN_FOLDS
+    parallel = walk_forward_backtest(X, y, min_train=100, horizon=5, n_jobs=2)
+    np.testing.assert_allclose(parallel.folds.to_numpy(dtype=float), serial.folds.to_numpy(dtype=float),
+                               rtol=1e-10, equal_nan=True)
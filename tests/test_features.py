@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.features import FeatureSpec, build_features
+
+SPEC = FeatureSpec(windows=(3, 10), std_windows=(3, 10), min_windows=(4,), max_windows=(4,),
+                   ewm_spans=(5,), log_returns=True, vol_windows=(5,), lags=(1, 2))
+
+
+def _expected(series):
+    log_ret = np.log(series.where(series > 0)).diff()
+    return {
+        'ma3': series.rolling(3).mean(), 'ma10': series.rolling(10).mean(),
+        'std3': series.rolling(3).std(), 'std10': series.rolling(10).std(),
+        'min4': series.rolling(4).min(), 'max4': series.rolling(4).max(),
+        'ewm5': series.ewm(span=5).mean(), 'vol5': log_ret.rolling(5).std(),
+        'logret': log_ret, 'lag1': series.shift(1), 'lag2': series.shift(2),
+    }
+
+
+def _assert_matches_pandas(data):
+    frame = build_features(data, SPEC).frame
+    for col in data.columns:
+        for suffix, expected in _expected(data[col]).items():
+            np.testing.assert_allclose(frame[f'{col}_{suffix}'].to_numpy(dtype=np.float64),
+                                       expected.to_numpy(dtype=np.float64).astype(np.float32),
+                                       rtol=1e-5, atol=1e-6, err_msg=f'{col}_{suffix}')
+
+
+def test_matches_pandas_rolling():
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({'Close': 2000 + rng.normal(0, 5, 300).cumsum(), 'Volume': rng.uniform(1e3, 1e4, 300)})
+    data.iloc[[40, 41, 200], 0] = np.nan
+    _assert_matches_pandas(data)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_zero_and_inf_only_blank_their_own_windows():
+    rng = np.random.default_rng(2)
+    close = 50 + rng.normal(0, 1, 120).cumsum()
+    close[30] = 0.0
+    close[60] = np.inf
+    close[90] = -np.inf
+    data = pd.DataFrame({'Close': close})
+    _assert_matches_pandas(data)
+    frame = build_features(data, SPEC).frame
+    # Later windows recover once the bad values have left them
+    assert np.isfinite(frame['Close_vol5'].iloc[-20:]).all()
+    assert np.isfinite(frame['Close_ma10'].iloc[-20:]).all()
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from models.forecasting import DirectForecaster, RecursiveForecaster
+from models.training import make_xy
+from utils.features import FeatureSpec, build_features
+
+SPEC = FeatureSpec(windows=(5,), std_windows=(5,), ewm_spans=(3,), lags=(1, 2))
+FEATURES = ['Close_lag1', 'Close_lag2', 'Close_ma5', 'Close_std5', 'Close_ewm3', 'Other', 'Other_lag1']
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(9)
+    other = 50 + rng.normal(0, 1, 300).cumsum()
+    close = 0.5 * other + 20 + rng.normal(0, 1, 300).cumsum() * 0.2
+    return pd.DataFrame({'Close': close, 'Other': other},
+                        index=pd.date_range('2023-01-01', periods=300, freq='D'))
+
+
+def _brute_force(model, history, n_steps):
+    # Rebuild every feature from scratch after each step: the new row carries the last values
+    # forward, is featurized, and then takes the prediction as its Close
+    frame = history.copy()
+    preds = []
+    for _ in range(n_steps):
+        row = frame.iloc[[-1]].copy()
+        row.index = [frame.index[-1] + pd.Timedelta(days=1)]
+        frame = pd.concat([frame, row])
+        X = build_features(frame, SPEC).frame[FEATURES].iloc[[-1]]
+        prediction = float(model.predict(X.to_numpy(dtype=np.float64))[0])
+        frame.iloc[-1, frame.columns.get_loc('Close')] = prediction
+        preds.append(prediction)
+    return np.array(preds)
+
+
+def _fit(history):
+    features = build_features(history, SPEC)
+    X, y = make_xy(features.frame, FEATURES + ['Close'])
+    model = LinearRegression().fit(X.to_numpy(dtype=np.float64), y)
+    return model, RecursiveForecaster(model, FEATURES, 'Close', features.sources)
+
+
+def test_recursive_matches_refeaturizing_every_step(history):
+    model, forecaster = _fit(history)
+    forecast = forecaster.forecast(history, 15)
+    assert forecast.shape == (1, 15)
+    # build_features stores float32, so the brute force carries its rounding
+    np.testing.assert_allclose(forecast[0], _brute_force(model, history, 15), rtol=1e-5)
+
+
+def test_recursive_paths_with_zero_shocks_equal_the_point_forecast(history):
+    _, forecaster = _fit(history)
+    point = forecaster.forecast(history, 10)
+    paths = forecaster.forecast(history, 10, shocks=np.zeros((4, 10)))
+    np.testing.assert_allclose(paths, np.repeat(point, 4, axis=0))
+    shifted = forecaster.forecast(history, 10, shocks=np.r_[1.0, np.zeros(9)][None, :])
+    assert shifted[0, 0] == pytest.approx(point[0, 0] + 1.0)
+
+
+def test_direct_matches_one_regression_per_horizon(history):
+    X = history[['Other']].to_numpy()
+    y = history['Close'].to_numpy()
+    horizon = 5
+    direct = DirectForecaster(horizon).fit(X, y)
+    n = len(y) - horizon
+    for h in range(1, horizon + 1):
+        reference = LinearRegression().fit(X[:n], y[h:n + h])
+        np.testing.assert_allclose(direct.coef_[1:, h - 1], reference.coef_, rtol=1e-8)
+        assert direct.coef_[0, h - 1] == pytest.approx(reference.intercept_, rel=1e-8)
+    residuals = direct.residuals(X, y)
+    assert residuals.shape == (n, horizon)
+    np.testing.assert_allclose(residuals[:, 0], y[1:n + 1] - direct.predict(X[:n])[:, 0])
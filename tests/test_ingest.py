@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from utils.ingest import infer_dtypes, read_upload
+
+
+def test_float32_only_when_values_round_trip():
+    frame = pd.DataFrame({
+        'halves': [1.5, 2.25, np.nan],
+        'prices': [1234.5678, 1.0, 2.0],
+        'volumes': [123456789.5, 1.0, 2.0],
+    })
+    plan = infer_dtypes(frame)
+    assert plan['halves'] == 'float32'
+    assert plan['prices'] == 'float64'
+    assert plan['volumes'] == 'float64'
+
+
+def test_integers_beyond_int64_stay_float():
+    frame = pd.DataFrame({'small': [1, 2, 3], 'large': [3e9, 1, 2], 'huge': [1e40, 1, 2]})
+    assert infer_dtypes(frame) == {'small': 'Int32', 'large': 'Int64', 'huge': 'float64'}
+
+
+def test_read_upload_preserves_values_across_chunks():
+    closes = np.round(np.random.default_rng(0).uniform(1000, 2000, 50), 4)
+    dates = pd.date_range('2024-01-01', periods=50)
+    text = 'Date,Close\n' + ''.join(f'{d:%Y-%m-%d},{c}\n' for d, c in zip(dates[::-1], closes[::-1]))
+    frame = read_upload(text.encode(), chunksize=7)
+    assert frame.index.is_monotonic_increasing
+    np.testing.assert_array_equal(frame['Close'].to_numpy(dtype=np.float64), closes)
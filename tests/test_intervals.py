@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from models.forecasting import DirectForecaster, RecursiveForecaster
+from models.intervals import bootstrap_shocks, direct_intervals, quantile_label, recursive_intervals
+from models.training import make_xy
+from utils.features import build_features
+
+
+def test_residual_bootstrap_only_draws_finite_residuals():
+    residuals = np.array([1.0, 2.0, np.nan, 3.0, np.inf])
+    shocks = bootstrap_shocks(residuals, n_paths=50, n_steps=7, seed=0)
+    assert shocks.shape == (50, 7)
+    assert set(np.unique(shocks)) <= {1.0, 2.0, 3.0}
+
+
+def test_block_bootstrap_keeps_runs_of_consecutive_residuals():
+    residuals = np.arange(100, dtype=np.float64)
+    shocks = bootstrap_shocks(residuals, n_paths=20, n_steps=12, method='block', block_size=4, seed=1)
+    blocks = shocks.reshape(20, 3, 4)
+    np.testing.assert_array_equal(np.diff(blocks, axis=-1), 1.0)
+
+
+def test_bootstrap_rejects_unknown_methods_and_empty_residuals():
+    with pytest.raises(ValueError):
+        bootstrap_shocks([1.0], 1, 1, method='wild')
+    with pytest.raises(ValueError):
+        bootstrap_shocks([np.nan], 1, 1)
+
+
+def test_direct_intervals_are_ordered_and_centred_on_the_residuals():
+    rng = np.random.default_rng(11)
+    X = rng.normal(size=(500, 2))
+    y = np.r_[0.0, X[:-1] @ [1.0, 2.0]] + rng.normal(0, 1.0, 500)
+    model = DirectForecaster(3).fit(X, y)
+    residuals = model.residuals(X, y)
+    intervals = direct_intervals(model, X[-1], residuals, n_paths=20_000, seed=2)
+    frame = intervals.to_frame()
+    assert list(frame.columns) == ['Forecast', 'q05', 'q25', 'q50', 'q75', 'q95']
+    assert (np.diff(frame.to_numpy()[:, 1:], axis=1) >= 0).all()
+    np.testing.assert_allclose(frame['q50'], intervals.point + np.median(residuals, axis=0), atol=0.05)
+    assert quantile_label(0.025) == 'q2.5'
+
+
+def test_recursive_intervals_widen_with_the_horizon():
+    rng = np.random.default_rng(12)
+    history = pd.DataFrame({'Close': 100 + rng.normal(0, 1, 400).cumsum()})
+    features = build_features(history)
+    X, y = make_xy(features.frame, ['Close_lag1', 'Close'])
+    model = LinearRegression().fit(X.to_numpy(dtype=np.float64), y)
+    forecaster = RecursiveForecaster(model, ['Close_lag1'], 'Close', features.sources)
+    residuals = y.to_numpy() - model.predict(X.to_numpy(dtype=np.float64))
+    intervals = recursive_intervals(forecaster, history, residuals, n_steps=10, n_paths=5000, seed=3)
+    width = intervals.bands[0.95] - intervals.bands[0.05]
+    assert intervals.paths.shape == (5000, 10)
+    assert width[-1] > 2 * width[0]
+    np.testing.assert_allclose(intervals.point, forecaster.forecast(history, 10)[0])
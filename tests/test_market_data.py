@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bar_store import BarStore
+from utils.market_data import OHLCV_COLUMNS, QuoteEngine, StaticProvider, split_download
+from utils.prefetch import QuotePrefetcher
+from utils.shared_cache import SharedCache
+
+
+def _bars(start, periods, freq='min', base=100.0, tz='UTC'):
+    close = base + np.arange(periods, dtype=np.float64)
+    index = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(periods, 10.0)}, index=index, columns=OHLCV_COLUMNS)
+
+
+@pytest.fixture
+def provider():
+    return StaticProvider({'GC=F': _bars('2024-01-02 14:00', 60, base=2000.0),
+                           'SI=F': _bars('2024-01-02 14:00', 30, base=23.0)},
+                          {'GC=F': {'bid': 2058.5, 'ask': 2059.5}})
+
+
+def test_quote_engine_makes_one_bars_and_one_book_call(provider):
+    quotes = QuoteEngine(provider).get_quotes(['GC=F', 'SI=F', 'HG=F', 'GC=F'])
+    assert [call[0] for call in provider.calls] == ['bars', 'book']
+    assert provider.calls[0][1] == ('GC=F', 'SI=F', 'HG=F')
+    gold = quotes.loc['GC=F']
+    assert gold['price'] == 2059.0
+    assert gold['change'] == pytest.approx((2059.0 / 1999.5 - 1) * 100)
+    assert gold['spread'] == pytest.approx(1.0)
+    assert quotes.loc['SI=F', 'bid'] is None
+    assert quotes.loc['HG=F'].isna().all()
+
+
+def test_quote_engine_survives_a_failing_provider():
+    class Broken(StaticProvider):
+        def bars(self, *args, **kwargs):
+            raise ConnectionError('offline')
+
+    quotes = QuoteEngine(Broken()).get_quotes(['GC=F'])
+    assert quotes.loc['GC=F', 'price'] is None
+
+
+@pytest.mark.parametrize('level', [0, 1])
+def test_split_download_handles_both_column_layouts(level):
+    frames = {'GC=F': _bars('2024-01-02', 3), 'SI=F': _bars('2024-01-02', 2, base=20.0)}
+    wide = pd.concat(frames, axis=1)
+    if level:
+        wide = wide.swaplevel(axis=1)
+    result = split_download(wide, ['GC=F', 'SI=F', 'HG=F'])
+    assert set(result) == {'GC=F', 'SI=F'}
+    pd.testing.assert_frame_equal(result['SI=F'], frames['SI=F'], check_freq=False)
+
+
+def test_bar_store_fetches_the_full_period_once_then_only_the_tail(tmp_path):
+    daily = _bars('2024-01-01', 10, freq='D')
+    provider = StaticProvider({'GC=F': daily.iloc[:8]})
+    store = BarStore(str(tmp_path / 'bars.sqlite'), provider=provider, max_age=0)
+    first = store.history('GC=F', interval='1d', period='1mo')
+    assert len(first) == 8
+    # The last bar is revised and two new ones arrive
+    revised = daily.copy()
+    revised.iloc[7, revised.columns.get_loc('Close')] = 500.0
+    provider.frames['GC=F'] = revised
+    second = store.history('GC=F', interval='1d', period='1mo')
+    assert provider.calls[0][2] == '1mo' and provider.calls[0][4] is None
+    assert pd.Timestamp(provider.calls[1][4]) == daily.index[7]
+    assert len(second) == 10
+    assert second['Close'].iloc[7] == 500.0
+
+
+def test_bar_store_groups_tails_by_start_and_remembers_empty_fetches(tmp_path):
+    frames = {'GC=F': _bars('2024-01-01', 10, freq='D'), 'SI=F': _bars('2024-01-01', 10, freq='D', base=25.0),
+              'HG=F': _bars('2024-01-01', 4, freq='D', base=4.0)}
+    provider = StaticProvider(frames)
+    store = BarStore(str(tmp_path / 'bars.sqlite'), provider=provider, max_age=3600)
+    store.history_many(['GC=F', 'SI=F', 'HG=F', 'XX=F'], interval='1d', period='1mo')
+    assert provider.calls == [('bars', ('GC=F', 'SI=F', 'HG=F', 'XX=F'), '1mo', '1d', None)]
+    # Within max_age even the symbol the provider had nothing for is not asked for again
+    store.history_many(['XX=F'], interval='1d', period='1mo')
+    assert len(provider.calls) == 1
+    store.max_age = 0
+    provider.calls.clear()
+    store.sync_many(['GC=F', 'SI=F', 'HG=F'], interval='1d', period='1mo')
+    starts = {symbols: pd.Timestamp(start) for _, symbols, _, _, start in provider.calls}
+    # HG=F stopped days earlier, so it gets its own tail instead of pulling GC=F and SI=F back
+    assert starts == {('GC=F', 'SI=F'): frames['GC=F'].index[-1], ('HG=F',): frames['HG=F'].index[-1]}
+
+
+def test_prefetcher_keeps_the_last_good_quotes_when_a_refresh_fails(provider):
+    prefetcher = QuotePrefetcher(['GC=F', 'SI=F'], QuoteEngine(provider, with_book=False))
+    first = prefetcher.refresh()
+    assert first.error is None and first.get('GC=F')['price'] == 2059.0
+    provider.frames.clear()
+    second = prefetcher.refresh()
+    assert second.error == 'no quotes returned' and second.failures == 1
+    assert second.get('GC=F')['price'] == 2059.0
+    assert second.age('GC=F') >= 0
+
+
+def test_shared_cache_computes_a_missing_value_once(tmp_path):
+    cache = SharedCache(str(tmp_path / 'shared.sqlite'), max_bytes=10_000)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'price': 1.0}
+
+    assert cache.get_or_compute('quote', compute) == {'price': 1.0}
+    assert cache.get_or_compute('quote', compute) == {'price': 1.0}
+    assert len(calls) == 1
+    cache.set('stale', 1, ttl=-1)
+    assert cache.get('stale', 'missing') == 'missing'
+
+
+def test_shared_cache_evicts_least_recently_read_entries(tmp_path):
+    cache = SharedCache(str(tmp_path / 'shared.sqlite'), max_bytes=3000)
+    cache.set('old', b'x' * 1000)
+    cache.set('kept', b'x' * 1000)
+    cache.set('new', b'x' * 1500)
+    assert cache.get('old') is None
+    assert cache.get('kept') is not None and cache.get('new') is not None
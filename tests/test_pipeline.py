@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+
+from commodity_predict.pipeline import run_directory
+
+
+def test_same_stem_datasets_keep_separate_results(tmp_path):
+    rng = np.random.default_rng(21)
+    for name, writer in [('gold.csv', 'to_csv'), ('gold.xlsx', 'to_excel')]:
+        close = 100 + rng.normal(0, 1, 120).cumsum()
+        frame = pd.DataFrame({'Date': pd.date_range('2023-01-01', periods=120).strftime('%Y-%m-%d'), 'Close': close})
+        getattr(frame, writer)(tmp_path / name, index=False)
+    table, forecasts, _ = run_directory(str(tmp_path), n_jobs=1, horizon=5)
+    assert list(table.index) == ['gold.csv', 'gold.xlsx']
+    assert table['error'].isna().all()
+    assert sorted(forecasts) == ['gold.csv', 'gold.xlsx']
+    assert not np.allclose(forecasts['gold.csv'], forecasts['gold.xlsx'])
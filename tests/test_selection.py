@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models import selection
+from models.selection import information_criterion, select_features
+
+
+def _data(n_rows=200, p=8, seed=4):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, p)), columns=[f'x{i}' for i in range(p)])
+    y = 2.0 * X['x1'] - 1.5 * X['x4'] + 0.8 * X['x6'] + rng.normal(0, 1.0, n_rows)
+    return X, y
+
+
+def _brute_force(X, y, criterion, max_features=None):
+    # Ordinary least squares on every subset, straight from the rows
+    best = (np.inf, None)
+    columns = list(X.columns)
+    for k in range(0, (max_features or len(columns)) + 1):
+        for subset in itertools.combinations(columns, k):
+            A = np.column_stack([np.ones(len(y)), X[list(subset)].to_numpy()])
+            residuals = y.to_numpy() - A @ np.linalg.lstsq(A, y.to_numpy(), rcond=None)[0]
+            score = information_criterion(residuals @ residuals, len(y), k, criterion)
+            if score < best[0]:
+                best = (score, list(subset))
+    return best
+
+
+@pytest.mark.parametrize('criterion', ['bic', 'aic'])
+def test_exhaustive_matches_brute_force(criterion):
+    X, y = _data()
+    score, features = _brute_force(X, y, criterion)
+    result = select_features(X, y, method='exhaustive', criterion=criterion)
+    assert result.features == features
+    assert result.score == pytest.approx(score, rel=1e-7)
+
+
+@pytest.mark.parametrize('method', ['forward', 'backward', 'auto'])
+def test_stepwise_agrees_with_exhaustive_on_clear_signal(method):
+    X, y = _data(n_rows=1000)
+    expected = select_features(X, y, method='exhaustive')
+    result = select_features(X, y, method=method)
+    assert result.features == expected.features == ['x1', 'x4', 'x6']
+    assert result.score == pytest.approx(expected.score, rel=1e-7)
+
+
+def test_exhaustive_respects_max_features():
+    X, y = _data()
+    score, features = _brute_force(X, y, 'bic', max_features=2)
+    result = select_features(X, y, method='exhaustive', max_features=2)
+    assert result.features == features
+    assert result.score == pytest.approx(score, rel=1e-7)
+
+
+def test_exhaustive_refuses_searches_beyond_the_budget():
+    X, y = _data(n_rows=1000, p=30)
+    with pytest.raises(ValueError, match='subsets'):
+        select_features(X, y, method='exhaustive')
+    # A bounded subset size keeps the same candidates searchable
+    assert select_features(X, y, method='exhaustive', max_features=3).features == ['x1', 'x4', 'x6']
+
+
+def test_parallel_exhaustive_matches_serial(monkeypatch):
+    X, y = _data(p=10)
+    serial = select_features(X, y, method='exhaustive', n_jobs=1)
+    monkeypatch.setattr(selection, 'PARALLEL_MIN_SUBSETS', 1)
+    monkeypatch.setattr(selection, 'BATCH_SUBSETS', 64)
+    parallel = select_features(X, y, method='exhaustive', n_jobs=2)
+    assert parallel.features == serial.features
+    assert parallel.score == pytest.approx(serial.score)
+    pd.testing.assert_frame_equal(parallel.path, serial.path)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from models.registry import ModelRegistry, model_key
+from utils.upload_store import UploadStore
+
+
+def test_upload_store_round_trips_a_parsed_csv(tmp_path):
+    raw = b'Date,Close,Volume\n2024-01-02,2.5,10\n2024-01-01,1.5,20\n'
+    store = UploadStore(str(tmp_path))
+    digest = UploadStore.digest(raw)
+    assert digest not in store
+    frame = store.load(digest, raw=raw, name='prices.csv')
+    assert digest in store
+    assert list(frame.index) == list(pd.to_datetime(['2024-01-01', '2024-01-02']))
+    np.testing.assert_array_equal(frame['Close'], [1.5, 2.5])
+    pd.testing.assert_frame_equal(UploadStore(str(tmp_path)).load(digest), frame)
+
+
+def test_registry_trains_once_and_reloads_from_disk(tmp_path):
+    calls = []
+
+    def train():
+        calls.append(1)
+        return {'coef': [1.0, 2.0]}, {'r2': 0.5}
+
+    key = model_key('digest', ['a', 'b'], 'target', {'estimator': 'LinearRegression'})
+    assert key != model_key('digest', ['a', 'b'], 'target', {'estimator': 'OnlineLinearRegression'})
+    entry = ModelRegistry(str(tmp_path)).get_or_train(key, train)
+    # A new registry has an empty memory tier, as after a restart
+    again = ModelRegistry(str(tmp_path)).get_or_train(key, train)
+    assert len(calls) == 1
+    assert again.model == entry.model and again.metrics == {'r2': 0.5}
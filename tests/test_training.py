@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.online import OnlineLinearRegression
+from models.registry import ModelRegistry
+from models.training import train_model
+
+FEATURES = ['a', 'b', 'c', 'target']
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(400, 3))
+    y = X @ [1.5, -2.0, 0.5] + 3.0 + rng.normal(0, 0.1, 400)
+    return pd.DataFrame(np.column_stack([X, y]), columns=FEATURES)
+
+
+@pytest.fixture
+def partial_rows(monkeypatch):
+    rows = []
+    original = OnlineLinearRegression.partial_fit
+
+    def spy(self, X, y):
+        rows.append(len(X))
+        return original(self, X, y)
+
+    monkeypatch.setattr(OnlineLinearRegression, 'partial_fit', spy)
+    return rows
+
+
+def _train(root, frame, digest, **kwargs):
+    entry, _, _ = train_model(ModelRegistry(str(root)), digest, frame, FEATURES,
+                              estimator='OnlineLinearRegression', **kwargs)
+    return entry.model
+
+
+def _refit(frame, **params):
+    return OnlineLinearRegression(**params).fit(frame[FEATURES[:-1]], frame['target'])
+
+
+@pytest.mark.parametrize('appended', [1, 3, 150])
+def test_appended_rows_are_folded_in_and_match_a_full_refit(tmp_path, frame, partial_rows, appended):
+    _train(tmp_path, frame.iloc[:250], 'first')
+    partial_rows.clear()
+    # A fresh registry stands in for a restarted process
+    model = _train(tmp_path, frame.iloc[:250 + appended], 'second')
+    assert partial_rows == [appended]
+    np.testing.assert_allclose(model.theta_, _refit(frame.iloc[:250 + appended]).theta_, rtol=1e-9, atol=1e-9)
+
+
+def test_forgetting_factor_matches_a_full_refit(tmp_path, frame, partial_rows):
+    params = {'forgetting': 0.99}
+    _train(tmp_path, frame.iloc[:300], 'first', estimator_params=params)
+    model = _train(tmp_path, frame, 'second', estimator_params=params)
+    assert partial_rows[-1] == 100
+    np.testing.assert_allclose(model.theta_, _refit(frame, **params).theta_, rtol=1e-8, atol=1e-10)
+
+
+def test_holdout_only_feeds_new_training_rows(tmp_path, frame, partial_rows):
+    _train(tmp_path, frame.iloc[:300], 'first', test_size=0.2)
+    partial_rows.clear()
+    model = _train(tmp_path, frame, 'second', test_size=0.2)
+    assert partial_rows == [320 - 240]
+    np.testing.assert_allclose(model.theta_, _refit(frame.iloc[:320]).theta_, rtol=1e-9, atol=1e-9)
+
+
+def test_rewritten_history_is_refitted_from_scratch(tmp_path, frame, partial_rows):
+    _train(tmp_path, frame.iloc[:300], 'first')
+    revised = frame.copy()
+    revised.loc[10, 'a'] += 1.0
+    partial_rows.clear()
+    model = _train(tmp_path, revised, 'revised')
+    assert partial_rows == [len(revised)]
+    np.testing.assert_allclose(model.theta_, _refit(revised).theta_, rtol=1e-9, atol=1e-9)
@@ -0,0 +1 @@
+# Utility functions and helper modules used by app.py
@@ -0,0 +1,174 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.market_data import OHLCV_COLUMNS
+
+# Roll-up periods in seconds; intraday buckets are aligned to the exchange's wall clock
+TIMEFRAMES = {'5m': 300, '15m': 900, '1h': 3600, '1d': 86400}
+DAY_SECONDS = TIMEFRAMES['1d']
+# Session opens fall on the quarter hour, so a few missing opening minutes do not shift the daily bucket
+SESSION_ALIGN_SECONDS = 900
+
+
+def _merge(bar, newer):
+    """Combine two consecutive (open, high, low, close, volume) bars into one."""
+    if bar is None:
+        return newer
+    return (bar[0], max(bar[1], newer[1]), min(bar[2], newer[2]), newer[3],
+            np.nansum([bar[4], newer[4]]))
+
+
+class _Rollup:
+    # Completed buckets plus the forming one, kept as everything sealed so far and the revisable last minute
+    def __init__(self, seconds, max_bars, offset=0):
+        self.seconds = seconds
+        # Buckets start ``offset`` seconds after the clock-aligned boundary
+        self.offset = offset
+        self.completed = deque(maxlen=max_bars)
+        self.start = None
+        self.sealed = None
+
+    def bucket(self, wall):
+        return wall - (wall - self.offset) % self.seconds
+
+    def seal(self, wall, bar):
+        """Fold a minute that can no longer change into its bucket, closing the bucket if it has moved on."""
+        start = self.bucket(wall)
+        if self.start is not None and start != self.start:
+            if self.sealed is not None:
+                self.completed.append((self.start, *self.sealed))
+            self.sealed = None
+        self.start = start
+        self.sealed = _merge(self.sealed, bar)
+
+    def rows(self, last_wall, last_bar):
+        rows = list(self.completed)
+        start = self.bucket(last_wall)
+        if self.start is not None and start != self.start and self.sealed is not None:
+            rows.append((self.start, *self.sealed))
+            rows.append((start, *last_bar))
+        else:
+            rows.append((start, *_merge(self.sealed, last_bar)))
+        return rows
+
+
+class _Series:
+    def __init__(self, timeframes, max_minutes, max_bars, session_open):
+        self.minutes = deque(maxlen=max_minutes)
+        self.rollups = {name: _Rollup(TIMEFRAMES[name], max_bars, session_open if name == '1d' else 0)
+                        for name in timeframes}
+
+
+class BarAggregator:
+    """Keeps a 1-minute bar stream per symbol and rolls it up into coarser bars as it arrives.
+
+    ``update`` takes the latest 1-minute bars from the provider. Bars older
+    than the last one held are ignored. A bar at the same timestamp as the
+    last one replaces it, because the provider revises the still-forming
+    minute. Each roll-up keeps its completed bars plus the forming bucket as
+    "everything before the last minute" and "the last minute", so every new
+    minute costs O(1) per timeframe however long the buckets are. Only the
+    most recent ``max_minutes`` minutes and ``max_bars`` bars per timeframe
+    are kept.
+
+    Daily bars run from the session open, not from midnight. The open is the
+    time of day of the first bar seen for the symbol, which is the first
+    minute of the session when the first update is a whole session's bars.
+    A futures session that opens at 18:00 therefore gets one daily bar
+    from 18:00 to 18:00.
+    """
+
+    def __init__(self, timeframes=tuple(TIMEFRAMES), max_minutes=1440, max_bars=500):
+        unknown = set(timeframes) - set(TIMEFRAMES)
+        if unknown:
+            raise ValueError(f'unknown timeframes {sorted(unknown)}; expected some of {list(TIMEFRAMES)}')
+        self.timeframes = tuple(timeframes)
+        self.max_minutes = max_minutes
+        self.max_bars = max_bars
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, bars):
+        """Apply new or revised 1-minute ``bars``; returns how many were applied."""
+        if bars is None or bars.empty:
+            return 0
+        index = pd.DatetimeIndex(bars.index)
+        utc = (index.tz_convert('UTC') if index.tz is not None else index).tz_localize(None)
+        wall = index.tz_localize(None)
+        # Whole seconds since the epoch, in UTC for ordering and in exchange time for bucketing
+        utc_seconds = utc.asi8 // 10**9
+        wall_seconds = wall.asi8 // 10**9
+        values = bars.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=np.float64)
+        applied = 0
+        with self._lock:
+            series = self._series.get(symbol)
+            for t, w, row in zip(utc_seconds.tolist(), wall_seconds.tolist(), values):
+                bar = tuple(row.tolist())
+                if np.isnan(bar[3]):
+                    continue
+                if series is None:
+                    session_open = w % DAY_SECONDS - w % SESSION_ALIGN_SECONDS
+                    series = self._series[symbol] = _Series(self.timeframes, self.max_minutes, self.max_bars,
+                                                            session_open)
+                minutes = series.minutes
+                if minutes and t < minutes[-1][0]:
+                    continue
+                if minutes and t == minutes[-1][0]:
+                    minutes[-1] = (t, w, bar)
+                else:
+                    if minutes:
+                        # The previous last minute is final now that a newer one exists
+                        _, last_wall, last_bar = minutes[-1]
+                        for rollup in series.rollups.values():
+                            rollup.seal(last_wall, last_bar)
+                    minutes.append((t, w, bar))
+                applied += 1
+        return applied
+
+    def last_timestamp(self, symbol):
+        """UTC time of the newest 1-minute bar held for ``symbol``, or None."""
+        series = self._series.get(symbol)
+        if series is None or not series.minutes:
+            return None
+        return pd.Timestamp(series.minutes[-1][0], unit='s', tz='UTC')
+
+    def _rows(self, symbol, timeframe):
+        series = self._series.get(symbol)
+        if series is None or not series.minutes:
+            return []
+        if timeframe == '1m':
+            return [(w, *bar) for _, w, bar in series.minutes]
+        if timeframe not in series.rollups:
+            raise ValueError(f'timeframe {timeframe!r} is not aggregated; expected one of {["1m", *self.timeframes]}')
+        _, last_wall, last_bar = series.minutes[-1]
+        return series.rollups[timeframe].rows(last_wall, last_bar)
+
+    def bars(self, symbol, timeframe='1m'):
+        """OHLCV bars for ``timeframe``, the last one still forming, indexed by exchange wall-clock time."""
+        with self._lock:
+            rows = self._rows(symbol, timeframe)
+        frame = pd.DataFrame(rows, columns=['ts'] + OHLCV_COLUMNS)
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop('ts'), unit='s'), name='Datetime')
+        return frame
+
+    def sparkline(self, symbol, timeframe='15m', points=32):
+        """Closes of the last ``points`` bars of ``timeframe``, oldest first."""
+        with self._lock:
+            rows = self._rows(symbol, timeframe)[-points:]
+        return np.array([row[4] for row in rows], dtype=np.float64)
+
+
+def sparkline_points(values, width=32, height=20, pad=2):
+    """SVG polyline ``points`` for ``values`` scaled into a ``width`` x ``height`` box; '' if too short."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return ''
+    xs = np.linspace(pad, width - pad, len(values))
+    span = values.max() - values.min()
+    # Higher values sit nearer the top; a flat series is drawn mid-height
+    ys = (np.full(len(values), height / 2) if span == 0
+          else height - pad - (values - values.min()) / span * (height - 2 * pad))
+    return ' '.join(f'{x:.1f},{y:.1f}' for x, y in zip(xs, ys))
@@ -0,0 +1,120 @@
+import base64
+import glob
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from utils.instrumentation import telemetry
+
+
+class AssetCache:
+    """Thumbnails and encoded bytes for the app's static images.
+
+    Thumbnails are resized once to ``width`` display pixels (times ``scale``
+    for high-density screens). They are written next to the originals under
+    ``<static_dir>/thumbs`` so Streamlit's static route can serve them.
+    Encoded bytes are kept in an LRU of ``capacity`` entries keyed by
+    ``(path, mtime)``, so an edited image is picked up on its next use.
+    Missing images give ``None`` instead of raising.
+    """
+
+    def __init__(self, static_dir, width=80, scale=2, capacity=64, quality=85):
+        self.static_dir = os.path.abspath(static_dir)
+        self.thumb_dir = os.path.join(self.static_dir, 'thumbs')
+        self.width = width
+        self.scale = scale
+        self.capacity = capacity
+        self.quality = quality
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _cached(self, key, build):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                telemetry.cache('assets', True)
+                return self._cache[key]
+            self.misses += 1
+        telemetry.cache('assets', False)
+        value = build()
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        return value
+
+    def _thumb_path(self, path, mtime):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.thumb_dir, f'{stem}-{self.width * self.scale}w-{mtime:x}.jpg')
+
+    def thumbnail(self, path):
+        """Path of the thumbnail for ``path``, building it if the source is new or changed."""
+        mtime = self._stamp(path)
+        if mtime is None:
+            return None
+        return self._cached(('thumb', os.path.abspath(path), mtime), lambda: self._build_thumbnail(path, mtime))
+
+    def _build_thumbnail(self, path, mtime):
+        from PIL import Image
+
+        target = self._thumb_path(path, mtime)
+        if os.path.exists(target):
+            return target
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        with Image.open(path) as image:
+            image.thumbnail((self.width * self.scale, self.width * self.scale * 4))
+            fd, tmp_path = tempfile.mkstemp(dir=self.thumb_dir, suffix='.jpg')
+            os.close(fd)
+            try:
+                image.convert('RGB').save(tmp_path, 'JPEG', quality=self.quality, optimize=True)
+                os.replace(tmp_path, target)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        # Thumbnails of earlier versions of the same image are no longer referenced
+        prefix = target.rsplit('-', 1)[0]
+        for stale in glob.glob(f'{glob.escape(prefix)}-*.jpg'):
+            if stale != target:
+                os.unlink(stale)
+        return target
+
+    def thumbnail_url(self, path):
+        """URL of the thumbnail on Streamlit's static route, or None if ``path`` is missing.
+
+        The ``v`` query parameter carries the source mtime, which makes the
+        static handler send a far-future Cache-Control header; a changed image
+        gets a new URL.
+        """
+        thumb = self.thumbnail(path)
+        if thumb is None:
+            return None
+        relative = os.path.relpath(thumb, self.static_dir).replace(os.sep, '/')
+        return f'app/static/{relative}?v={self._stamp(path):x}'
+
+    def encoded(self, path):
+        """Base64 text of the file at ``path``, or None if it is missing."""
+        mtime = self._stamp(path)
+        if mtime is None:
+            return None
+
+        def build():
+            with open(path, 'rb') as f:
+                return base64.b64encode(f.read()).decode()
+
+        return self._cached(('b64', os.path.abspath(path), mtime), build)
+
+    def thumbnail_data_uri(self, path):
+        """The thumbnail inlined as a ``data:`` URI, for when static serving is off."""
+        thumb = self.thumbnail(path)
+        return None if thumb is None else f'data:image/jpeg;base64,{self.encoded(thumb)}'
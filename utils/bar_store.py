@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import telemetry
+from utils.market_data import OHLCV_COLUMNS, PERIOD_DAYS, YahooProvider, group_by_start
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fetches (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    period TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+class BarStore:
+    """SQLite store of OHLCV bars that only asks the provider for the missing tail.
+
+    Bars are keyed by (symbol, interval, timestamp) with timestamps stored as
+    UTC epoch seconds. ``history`` serves reads from disk and, at most once
+    every ``max_age`` seconds per series, fetches bars newer than the last
+    stored one and upserts them in a single transaction. With a ``shared``
+    cache, identical syncs running at once in several processes make one
+    provider call between them.
+    """
+
+    def __init__(self, path, provider=None, max_age=60, shared=None):
+        self.path = path
+        self.provider = provider if provider is not None else YahooProvider()
+        self.max_age = max_age
+        self.shared = shared
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe to share across Streamlit threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def last_timestamp(self, symbol, interval='1d'):
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT MAX(ts) FROM bars WHERE symbol = ? AND interval = ?',
+                               (symbol, interval)).fetchone()
+        return None if row[0] is None else pd.Timestamp(row[0], unit='s')
+
+    def append(self, symbol, interval, bars):
+        """Upsert bars atomically; the last stored bar may be replaced by a fresher copy."""
+        if bars is None or bars.empty:
+            return 0
+        index = pd.DatetimeIndex(bars.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        ts = index.asi8 // 10**9
+        values = bars.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=np.float64)
+        values = np.where(np.isnan(values), None, values).tolist()
+        rows = [(symbol, interval, int(t), *v) for t, v in zip(ts, values)]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def read(self, symbol, interval='1d', start=None):
+        query = 'SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND interval = ?'
+        params = [symbol, interval]
+        if start is not None:
+            query += ' AND ts >= ?'
+            params.append(int(pd.Timestamp(start).timestamp()))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + ' ORDER BY ts', params).fetchall()
+        frame = pd.DataFrame(rows, columns=['ts'] + OHLCV_COLUMNS)
+        index = pd.to_datetime(frame.pop('ts'), unit='s')
+        frame.index = pd.DatetimeIndex(index, name='Date' if interval[-1] in 'dko' else 'Datetime')
+        return frame
+
+    def sync(self, symbol, interval='1d', period='5d', force=False):
+        """Fetch bars newer than the last stored one, or ``period`` of history if none are stored."""
+        return self.sync_many([symbol], interval, period, force).get(symbol, 0)
+
+    def sync_many(self, symbols, interval='1d', period='5d', force=False):
+        """Sync several symbols with a few batched provider calls.
+
+        Symbols without enough stored history are downloaded for the whole
+        ``period`` in one request; the rest share tail requests, one per group
+        of similar last stored bars (see ``group_by_start``). Returns rows written per symbol
+        (as counted by whichever process made the call, when syncs are shared).
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if self.shared is None or force:
+            return self._sync_many(symbols, interval, period, force)
+        key = f'bar-sync:{self.path}:{interval}:{period}:' + ','.join(sorted(symbols))
+        return self.shared.get_or_compute(key, lambda: self._sync_many(symbols, interval, period, force),
+                                          ttl=self.max_age)
+
+    def _sync_many(self, symbols, interval, period, force):
+        with closing(self._connect()) as conn:
+            fetches = {symbol: conn.execute('SELECT period, fetched_at FROM fetches WHERE symbol = ? AND interval = ?',
+                                            (symbol, interval)).fetchone() for symbol in symbols}
+        full, tails = [], {}
+        for symbol, row in fetches.items():
+            covered = row is not None and PERIOD_DAYS.get(row[0], 0) >= PERIOD_DAYS.get(period, 0)
+            if covered and not force and time.time() - row[1] < self.max_age:
+                telemetry.cache('bar_store', True)
+                continue
+            telemetry.cache('bar_store', False)
+            last = self.last_timestamp(symbol, interval) if covered else None
+            if last is None:
+                full.append(symbol)
+            else:
+                tails[symbol] = last
+        fetched = {}
+        if full:
+            with telemetry.stage('fetch.yahoo_bars'):
+                fetched.update(self.provider.bars(full, interval=interval, period=period))
+        for start, group in group_by_start(tails):
+            # Refetch from the last stored bar so a still-forming bar gets its final values
+            start = start.tz_localize('UTC').to_pydatetime()
+            with telemetry.stage('fetch.yahoo_bars'):
+                fetched.update(self.provider.bars(group, interval=interval, start=start))
+        written = {}
+        for symbol in full + list(tails):
+            written[symbol] = self.append(symbol, interval, fetched.get(symbol))
+            # Recorded even when nothing came back, so unknown symbols wait out max_age like the rest
+            stored_period = fetches[symbol][0] if symbol in tails else period
+            with closing(self._connect()) as conn, conn:
+                conn.execute('INSERT OR REPLACE INTO fetches VALUES (?, ?, ?, ?)',
+                             (symbol, interval, stored_period, time.time()))
+        return written
+
+    def history(self, symbol, interval='1d', period='5d'):
+        """Return ``period`` of bars for ``symbol``, syncing the tail from the provider first."""
+        return self.history_many([symbol], interval, period)[symbol]
+
+    def history_many(self, symbols, interval='1d', period='5d'):
+        """Return ``{symbol: bars}`` for ``period``, syncing every symbol in batched requests first."""
+        try:
+            self.sync_many(symbols, interval, period)
+        except Exception:
+            # Serve whatever is on disk if the provider is unreachable
+            pass
+        return {symbol: _trim_to_period(self.read(symbol, interval), period) for symbol in symbols}
+
+
+def _trim_to_period(frame, period):
+    if frame.empty or period == 'max':
+        return frame
+    if period.endswith('d'):
+        # Yahoo counts day periods in trading sessions, not calendar days
+        sessions = frame.index.normalize()
+        keep = sessions.unique()[-int(period[:-1]):]
+        return frame[sessions.isin(keep)]
+    last = frame.index[-1]
+    if period == 'ytd':
+        start = pd.Timestamp(year=last.year, month=1, day=1)
+    elif period.endswith('mo'):
+        start = last - pd.DateOffset(months=int(period[:-2]))
+    elif period.endswith('y'):
+        start = last - pd.DateOffset(years=int(period[:-1]))
+    else:
+        return frame
+    return frame[frame.index > start]
@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.instrumentation import telemetry
+
+# Points sent to the browser per trace, roughly one per horizontal pixel of a wide chart
+DEFAULT_MAX_POINTS = 2000
+# Series longer than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 10_000
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(values, n_out):
+    """Positions kept by Largest-Triangle-Three-Buckets downsampling of ``values`` to ``n_out`` points.
+
+    The first and last points are always kept. The rest of the series is
+    split into ``n_out - 2`` equal buckets, and from each one the point
+    forming the largest triangle with the previously kept point and the
+    next bucket's mean is chosen. Peaks and troughs survive; flat stretches
+    collapse. Points are assumed evenly spaced along x.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    # Mean of every bucket in one pass; the last bucket looks ahead to the final point instead
+    sums = np.add.reduceat(values[:n - 1], edges[:-1])
+    counts = np.diff(edges)
+    means_y = np.append(sums[1:] / counts[1:], values[-1])
+    means_x = np.append((edges[1:-1] + edges[2:] - 1) / 2, n - 1)
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        xs = np.arange(lo, hi)
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((anchor - means_x[bucket]) * (values[lo:hi] - values[anchor])
+                      - (anchor - xs) * (means_y[bucket] - values[anchor]))
+        anchor = lo + int(np.argmax(area))
+        kept[bucket + 1] = anchor
+    return kept
+
+
+def minmax_indices(values, n_out):
+    """Positions of the minimum and maximum of each of ``(n_out - 2) // 2`` equal buckets, in order.
+
+    Cheaper than LTTB and guarantees every local extreme at bucket
+    resolution is drawn, at the cost of a more jagged line.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    # Two points per bucket plus both endpoints stay within n_out
+    n_buckets = (n_out - 2) // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    # Pad to a whole number of buckets so every bucket is one row of a 2-D view
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = values
+    rows = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + np.nanargmin(rows, axis=1)
+    highs = offsets + np.nanargmax(rows, axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+_METHODS = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+
+class ChartDownsampler:
+    """Builds bounded-size Plotly line traces for arbitrarily long series.
+
+    Each trace carries at most ``max_points`` points: longer series are
+    reduced with LTTB or min/max bucketing before they are serialized, so
+    the payload sent to the browser does not grow with the dataset. Series
+    longer than ``webgl_threshold`` use ``Scattergl``. The kept positions are
+    cached per ``(key, method, max_points, x_range)`` in an LRU of
+    ``capacity`` entries, so reruns and repeated zooms skip the reduction.
+    ``key`` must identify the series' contents, e.g. a dataset digest plus
+    the series name.
+    """
+
+    def __init__(self, max_points=DEFAULT_MAX_POINTS, method='lttb', webgl_threshold=WEBGL_THRESHOLD, capacity=64):
+        if method not in _METHODS:
+            raise ValueError(f'unknown downsampling method {method!r}; expected one of {DOWNSAMPLE_METHODS}')
+        self.max_points = max_points
+        self.method = method
+        self.webgl_threshold = webgl_threshold
+        self.capacity = capacity
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def indices(self, key, values, x_range=None, method=None):
+        """Positions of ``values`` to draw within ``x_range = (start, stop)`` (the whole series by default)."""
+        method = method or self.method
+        start, stop = _clip_range(x_range, len(values))
+        cache_key = (key, method, self.max_points, start, stop)
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                telemetry.cache('charts', True)
+                return self._cache[cache_key]
+        telemetry.cache('charts', False)
+        window = np.asarray(values, dtype=float)[start:stop]
+        # Gaps are not drawn, so the budget is spent on finite points only
+        finite = np.flatnonzero(np.isfinite(window))
+        kept = start + finite[_METHODS[method](window[finite], self.max_points)]
+        with self._lock:
+            self._cache[cache_key] = kept
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+        return kept
+
+    def trace(self, key, values, x=None, x_range=None, method=None, **trace_kwargs):
+        """A ``Scatter`` or ``Scattergl`` trace of ``values`` against ``x`` (positions by default)."""
+        values = np.asarray(values)
+        kept = self.indices(key, values, x_range, method)
+        xs = kept if x is None else np.asarray(x)[kept]
+        start, stop = _clip_range(x_range, len(values))
+        trace_type = go.Scattergl if stop - start > self.webgl_threshold else go.Scatter
+        return trace_type(x=xs, y=values[kept], **trace_kwargs)
+
+
+def _clip_range(x_range, n):
+    if x_range is None:
+        return 0, n
+    start, stop = x_range
+    start = min(max(int(start), 0), n)
+    return start, min(max(int(stop), start), n)
@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.instrumentation import telemetry
+from utils.market_data import YahooProvider
+from utils.throttle import ProviderGate
+
+
+def pooled_session(pool_size=16, headers=None):
+    """A ``requests.Session`` whose connection pool keeps up to ``pool_size`` sockets per host alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class FinnhubQuotes:
+    """Finnhub quote lookups over one pooled, keep-alive session with a per-request timeout.
+
+    With a ``gate``, concurrent lookups of one symbol share a single request
+    and every lookup counts against the gate's rate limit.
+    """
+
+    def __init__(self, api_key, timeout=5, pool_size=16, gate=None):
+        # Only imported when a Finnhub key is configured
+        import finnhub
+
+        self.client = finnhub.Client(api_key=api_key)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.client._session.mount('https://', adapter)
+        # finnhub.Client reads the timeout from this attribute on every request
+        self.client.DEFAULT_TIMEOUT = timeout
+        self.gate = gate
+
+    def _quote(self, symbol):
+        with telemetry.stage('fetch.finnhub'):
+            return self.client.quote(symbol)
+
+    def quote(self, symbol):
+        if self.gate is None:
+            return self._quote(symbol)
+        return self.gate.call(('quote', symbol), self._quote, symbol)
+
+
+class MarketClients:
+    """Process-wide market-data clients, created once and shared by every page run.
+
+    Each provider gets one pooled HTTP session, so repeated requests reuse
+    warm connections instead of re-handshaking. ``submit`` runs calls on a
+    small shared thread pool, which lets independent providers be queried
+    concurrently. Each provider also has a ``ProviderGate``. The gate merges
+    identical in-flight requests and limits each provider to ``rate``
+    requests per second, with bursts of up to ``burst``. Background refreshes
+    yield to interactive requests.
+    """
+
+    def __init__(self, finnhub_api_key=None, yahoo_timeout=10, finnhub_timeout=5, pool_size=16, max_workers=4,
+                 yahoo_rate=2.0, yahoo_burst=10, finnhub_rate=1.0, finnhub_burst=10):
+        self.gates = {'yahoo': ProviderGate('yahoo', yahoo_rate, yahoo_burst),
+                      'finnhub': ProviderGate('finnhub', finnhub_rate, finnhub_burst)}
+        self.yahoo_session = pooled_session(pool_size)
+        self.yahoo = YahooProvider(session=self.yahoo_session, timeout=yahoo_timeout, gate=self.gates['yahoo'])
+        self.finnhub = (FinnhubQuotes(finnhub_api_key, finnhub_timeout, pool_size, gate=self.gates['finnhub'])
+                        if finnhub_api_key else None)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='market-data')
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.yahoo_session.close()
+        if self.finnhub is not None:
+            self.finnhub.client.close()
+
+
+def as_completed_within(futures, timeout):
+    """Yield ``(name, result, error)`` for ``{name: future}`` in completion order.
+
+    Futures still running after ``timeout`` seconds are yielded last with a
+    ``TimeoutError`` (they are left to finish in the background).
+    """
+    deadline = time.monotonic() + timeout
+    pending = {future: name for name, future in futures.items()}
+    while pending:
+        done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            name = pending.pop(future)
+            error = future.exception()
+            yield name, None if error else future.result(), error
+    for name in pending.values():
+        yield name, None, TimeoutError(f'{name} did not respond within {timeout:g}s')
@@ -0,0 +1,266 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import telemetry
+
+# Cap on rows x columns processed together, which bounds the cumulative-sum temporaries
+BLOCK_ELEMENTS = 1 << 22
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """Which engineered features to add for every numeric column.
+
+    Window statistics follow pandas' ``rolling(window).<stat>()`` with full
+    windows only, ``ewm_spans`` follow ``ewm(span=s).mean()``, and ``vol``
+    is the rolling standard deviation of log returns.
+    """
+    windows: tuple = (5,)
+    std_windows: tuple = ()
+    min_windows: tuple = ()
+    max_windows: tuple = ()
+    ewm_spans: tuple = ()
+    returns: bool = False
+    log_returns: bool = False
+    vol_windows: tuple = ()
+    lags: tuple = (1,)
+
+    def operations(self):
+        """``(suffix, op, param)`` for every feature, in output order."""
+        ops = [(f'ma{w}', 'ma', w) for w in self.windows]
+        ops += [(f'std{w}', 'std', w) for w in self.std_windows]
+        ops += [(f'min{w}', 'min', w) for w in self.min_windows]
+        ops += [(f'max{w}', 'max', w) for w in self.max_windows]
+        ops += [(f'ewm{s}', 'ewm', s) for s in self.ewm_spans]
+        ops += [('ret', 'ret', 1)] if self.returns else []
+        ops += [('logret', 'logret', 1)] if self.log_returns else []
+        ops += [(f'vol{w}', 'vol', w) for w in self.vol_windows]
+        ops += [(f'lag{k}', 'lag', k) for k in self.lags]
+        return ops
+
+    def names(self, col):
+        return [f'{col}_{suffix}' for suffix, _, _ in self.operations()]
+
+
+DEFAULT_SPEC = FeatureSpec()
+
+
+def parse_windows(text):
+    """Parse ``'5, 20 60'`` into a sorted tuple of distinct positive window lengths."""
+    values = {int(part) for part in text.replace(',', ' ').split()}
+    if any(value < 1 for value in values):
+        raise ValueError('window lengths must be positive integers')
+    return tuple(sorted(values))
+
+
+@dataclass(frozen=True)
+class FeatureSet:
+    frame: pd.DataFrame
+    options: list
+    # feature name -> (source column, operation, parameter), e.g. 'Close_ma5' -> ('Close', 'ma', 5)
+    sources: dict
+
+
+# The helpers below take (columns, rows) arrays and work along the last axis, so every
+# running sum, filter and shift scans contiguous memory
+
+def _window_sums(cumsum, w):
+    # Sum over each trailing window of length w, aligned so row i covers rows i - w + 1 .. i
+    out = np.empty(cumsum.shape[:-1] + (cumsum.shape[-1] - 1,))
+    out[..., :w - 1] = np.nan
+    np.subtract(cumsum[..., w:], cumsum[..., :-w], out=out[..., w - 1:])
+    return out
+
+
+def _cumsum(values):
+    out = np.empty(values.shape[:-1] + (values.shape[-1] + 1,))
+    out[..., 0] = 0.0
+    np.cumsum(values, axis=-1, out=out[..., 1:])
+    return out
+
+
+def _rolling_moments(values, valid, windows, want_std):
+    """Rolling means (and sample standard deviations) for several windows from shared cumulative sums."""
+    n = values.shape[-1]
+    # Centering first keeps the sum-of-squares difference numerically stable for large prices;
+    # a strided sample is close enough to the mean for that
+    sample = values[:, ::max(1, n // 1024)]
+    finite = np.isfinite(sample)
+    # Only finite values count, so a single inf cannot drag the center off to overflow
+    center = (np.where(finite, sample, 0.0).sum(axis=-1, keepdims=True)
+              / np.maximum(finite.sum(axis=-1, keepdims=True), 1)) if sample.size else 0.0
+    complete = bool(valid.all())
+    centered = values - center
+    if not complete:
+        centered[~valid] = 0.0
+    c1 = _cumsum(centered)
+    c2 = _cumsum(np.square(centered, out=centered)) if want_std else None
+    # Windows that contain a NaN or inf are NaN, as with pandas' default min_periods
+    counts = None if complete else _cumsum(valid.astype(np.float64))
+    means, stds = {}, {}
+    for w in windows:
+        if w < 1 or w > n:
+            means[w] = stds[w] = np.full(values.shape, np.nan)
+            continue
+        s1 = _window_sums(c1, w)
+        means[w] = s1 / w + center
+        if want_std:
+            if w > 1:
+                var = _window_sums(c2, w)
+                var -= s1 * s1 / w
+                var /= w - 1
+                stds[w] = np.sqrt(np.clip(var, 0.0, None, out=var), out=var)
+            else:
+                stds[w] = np.full(values.shape, np.nan)
+        if counts is not None:
+            partial = _window_sums(counts, w) < w
+            means[w][partial] = np.nan
+            if want_std:
+                stds[w][partial] = np.nan
+    return means, stds
+
+
+def _rolling_extreme(values, w, ufunc):
+    """Rolling min or max (``np.minimum`` / ``np.maximum``) in O(n) whatever the window.
+
+    Rows are split into blocks of ``w``; each window is the suffix of one
+    block plus the prefix of the next, so it is the ufunc of one running
+    suffix and one running prefix value. NaN propagates like in pandas.
+    """
+    n = values.shape[-1]
+    out = np.full(values.shape, np.nan)
+    if not 1 <= w <= n:
+        return out
+    pad = -n % w
+    padded = np.concatenate([values, np.full(values.shape[:-1] + (pad,), np.nan)], axis=-1) if pad else values
+    blocks = padded.reshape(values.shape[:-1] + (-1, w))
+    prefix = ufunc.accumulate(blocks, axis=-1).reshape(padded.shape)
+    suffix = ufunc.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    ufunc(suffix[..., :n - w + 1], prefix[..., w - 1:n], out=out[..., w - 1:])
+    return out
+
+
+def _ewm_mean(values, valid, span):
+    # scipy.signal is slow to import and only EWMA features need it
+    from scipy.signal import lfilter
+
+    # pandas' adjusted EWMA: exponentially weighted sums of values and of weights, skipping NaNs
+    decay = 1.0 - 2.0 / (span + 1.0)
+    num = lfilter([1.0], [1.0, -decay], np.where(valid, values, 0.0))
+    den = lfilter([1.0], [1.0, -decay], valid.astype(np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _shift(values, k):
+    n = values.shape[-1]
+    out = np.full(values.shape, np.nan)
+    if 0 <= k < n:
+        out[..., k:] = values[..., :n - k]
+    return out
+
+
+def _compute_block(values, spec, ops, out):
+    """Write feature k of column j into ``out[j * len(ops) + k]`` for one (columns, rows) block."""
+    # pandas' rolling and ewm treat ±inf as missing, so the window statistics see them as NaN
+    valid = np.isfinite(values)
+    finite = values if valid.all() else np.where(valid, values, np.nan)
+    stats = {op for _, op, _ in ops}
+    moment_windows = set(spec.windows) | set(spec.std_windows)
+    means, stds = _rolling_moments(finite, valid, sorted(moment_windows), 'std' in stats)
+    log_ret = None
+    if stats & {'logret', 'vol'}:
+        with np.errstate(invalid='ignore'):
+            # A zero or negative price has no log return
+            log_values = np.log(np.where(values > 0, values, np.nan))
+        log_ret = log_values - _shift(log_values, 1)
+    if 'vol' in stats:
+        _, vols = _rolling_moments(log_ret, np.isfinite(log_ret), sorted(set(spec.vol_windows)), True)
+    n_ops = len(ops)
+    for k, (_, op, param) in enumerate(ops):
+        if op == 'ma':
+            block = means[param]
+        elif op == 'std':
+            block = stds[param]
+        elif op == 'min':
+            block = _rolling_extreme(finite, param, np.minimum)
+        elif op == 'max':
+            block = _rolling_extreme(finite, param, np.maximum)
+        elif op == 'ewm':
+            block = _ewm_mean(finite, valid, param)
+        elif op == 'ret':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                block = values / _shift(values, 1) - 1.0
+        elif op == 'logret':
+            block = log_ret
+        elif op == 'vol':
+            block = vols[param]
+        else:
+            block = _shift(values, param)
+        out[k::n_ops] = block
+
+
+def build_features(data, spec=DEFAULT_SPEC):
+    """Add the engineered features in ``spec`` for every numeric column of ``data``.
+
+    All features are written into one preallocated float32 matrix, a block
+    of columns at a time, and joined to ``data`` with a single concat. The
+    matrix is column-major so each feature is contiguous and pandas can use
+    it as a single block without copying.
+    """
+    numeric_cols = list(data.select_dtypes(include=[np.number]).columns)
+    ops = spec.operations()
+    n_ops = len(ops)
+    # Only allow numeric columns and their engineered features for modeling
+    options = list(numeric_cols)
+    sources = {col: (col, 'raw', None) for col in numeric_cols}
+    names = []
+    for col in numeric_cols:
+        for (suffix, op, param) in ops:
+            names.append(f'{col}_{suffix}')
+            sources[f'{col}_{suffix}'] = (col, op, param)
+    options.extend(names)
+    n_rows = data.shape[0]
+    matrix = np.empty((n_rows, len(names)), dtype=np.float32, order='F')
+    step = max(1, BLOCK_ELEMENTS // max(n_rows, 1))
+    # matrix.T is a C-ordered (features, rows) view, matching the layout the helpers work in
+    for start in range(0, len(numeric_cols), step):
+        cols = numeric_cols[start:start + step]
+        values = np.ascontiguousarray(data[cols].to_numpy(dtype=np.float64, na_value=np.nan).T)
+        _compute_block(values, spec, ops, matrix.T[start * n_ops:(start + len(cols)) * n_ops])
+    engineered = pd.DataFrame(matrix, index=data.index, columns=names, copy=False)
+    frame = pd.concat([data, engineered], axis=1, copy=False)
+    return FeatureSet(frame, options, sources)
+
+
+class FeaturePipeline:
+    """Builds each feature matrix once and reuses it for every step that asks again.
+
+    Results are keyed by the dataset's content hash and the ``FeatureSpec``,
+    and the least recently used entries are dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def transform(self, digest, data, spec=DEFAULT_SPEC):
+        key = (digest, spec)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                telemetry.cache('features', True)
+                return self._cache[key]
+        telemetry.cache('features', False)
+        with telemetry.stage('features'):
+            features = build_features(data, spec)
+        with self._lock:
+            self._cache[key] = features
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return features
@@ -0,0 +1,128 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+# Column names treated as the time axis when they hold parseable dates
+DATE_COLUMN_HINTS = ('date', 'time', 'timestamp', 'datetime', 'day')
+# Share of non-empty values that must parse for a column to count as dates
+DATE_PARSE_MIN_RATIO = 0.95
+
+
+def read_upload(source, name='upload.csv', chunksize=250_000, progress=None, downcast=True):
+    """Read an uploaded CSV or XLSX file into a compact DataFrame.
+
+    ``source`` is raw bytes or a binary file object. CSVs are parsed in
+    chunks of ``chunksize`` rows, each chunk downcast before the next is
+    read, so a full float64 copy of the file never exists. A date column
+    becomes a sorted DatetimeIndex. ``progress`` is called with the
+    fraction of the input consumed so far.
+    """
+    buffer = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    buffer.seek(0, os.SEEK_END)
+    total = buffer.tell() or 1
+    buffer.seek(0)
+    if os.path.splitext(name)[1].lower() in EXCEL_EXTENSIONS:
+        frame = pd.read_excel(buffer, engine='openpyxl')
+        plan = infer_dtypes(frame) if downcast else {}
+        frame = apply_dtypes(frame, plan)
+    else:
+        frame = _read_csv_chunks(buffer, total, chunksize, progress, downcast)
+    frame = _set_date_index(frame)
+    if progress is not None:
+        progress(1.0)
+    return frame
+
+
+def _read_csv_chunks(buffer, total, chunksize, progress, downcast):
+    chunks = []
+    plan = {}
+    for chunk in pd.read_csv(buffer, chunksize=chunksize):
+        if downcast:
+            # Widen the plan whenever a later chunk no longer fits the narrower dtype
+            plan = merge_plans(plan, infer_dtypes(chunk))
+            chunk = apply_dtypes(chunk, plan)
+        chunks.append(chunk)
+        if progress is not None:
+            progress(min(buffer.tell() / total, 1.0))
+    if not chunks:
+        return pd.DataFrame()
+    # Earlier chunks may have been cast narrower than the final plan
+    chunks = [apply_dtypes(chunk, plan) for chunk in chunks]
+    return pd.concat(chunks, ignore_index=True, copy=False)
+
+
+# Candidate dtypes from narrowest to widest; merging two plans keeps the wider one
+_DTYPE_ORDER = ['Int32', 'Int64', 'float32', 'float64']
+
+
+def infer_dtypes(frame):
+    """Pick the narrowest safe dtype for each numeric column of ``frame``."""
+    plan = {}
+    for col in frame.columns:
+        series = frame[col]
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            continue
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = values[np.isfinite(values)]
+        integral = (finite.size and np.all(finite == np.round(finite))
+                    and finite.size == np.count_nonzero(~np.isnan(values)))
+        if integral and _fits(finite, np.int64):
+            plan[col] = 'Int32' if _fits(finite, np.int32) else 'Int64'
+        elif finite.size == 0 or _survives_float32(finite):
+            plan[col] = 'float32'
+        else:
+            plan[col] = 'float64'
+    return plan
+
+
+def _fits(values, dtype):
+    info = np.iinfo(dtype)
+    return values.min() >= info.min and values.max() <= info.max
+
+
+def _survives_float32(values):
+    # float32 keeps about 7 significant digits, so only downcast when no value changes
+    if np.abs(values).max() >= np.finfo(np.float32).max:
+        return False
+    return np.array_equal(values.astype(np.float32).astype(np.float64), values)
+
+
+def merge_plans(current, new):
+    merged = dict(current)
+    for col, dtype in new.items():
+        old = merged.get(col)
+        if old is None:
+            merged[col] = dtype
+        elif old != dtype:
+            if old.startswith('Int') != dtype.startswith('Int'):
+                # float32 cannot hold every integer exactly, so mixed columns go to float64
+                merged[col] = 'float64'
+            else:
+                merged[col] = max(old, dtype, key=_DTYPE_ORDER.index)
+    return merged
+
+
+def apply_dtypes(frame, plan):
+    changes = {col: dtype for col, dtype in plan.items() if col in frame.columns and frame[col].dtype != dtype}
+    return frame.astype(changes) if changes else frame
+
+
+def _set_date_index(frame):
+    for col in frame.columns:
+        if not any(hint in str(col).lower() for hint in DATE_COLUMN_HINTS):
+            continue
+        if pd.api.types.is_numeric_dtype(frame[col]):
+            continue
+        parsed = pd.to_datetime(frame[col], errors='coerce')
+        present = frame[col].notna().sum()
+        if present and parsed.notna().sum() / present >= DATE_PARSE_MIN_RATIO:
+            frame.pop(col)
+            frame.index = pd.DatetimeIndex(parsed, name=col)
+            # Many price exports are newest-first; lags and rolling windows need time order
+            if not frame.index.is_monotonic_increasing:
+                frame = frame.sort_index(kind='stable')
+            return frame
+    return frame
@@ -0,0 +1,215 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+METRIC_PREFIX = 'commodity'
+
+
+@dataclass
+class StageStats:
+    runs: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    last_wall_seconds: float = 0.0
+    last_cpu_seconds: float = 0.0
+    # Highest traced allocation above the stage's starting point, over all runs (None unless tracing)
+    peak_bytes: int = None
+    last_peak_bytes: int = None
+
+
+class Instrumentation:
+    """Per-stage wall time, CPU time and peak allocation, plus cache hit/miss counters.
+
+    ``stage(name)`` wraps a block of work; ``cache(name, hit)`` counts one
+    cache lookup. CPU time is the whole process's, so it includes BLAS and
+    worker threads. Peak allocation is measured with ``tracemalloc`` and only
+    when ``trace_memory`` is on, because tracing slows allocation-heavy code.
+    Nested stages on one thread each get their own correct peak. Recent runs
+    are kept as events for JSON-lines export.
+    """
+
+    def __init__(self, max_events=10_000):
+        self._stages = {}
+        self._caches = {}
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.trace_memory = False
+
+    def enable_memory_tracing(self, enabled=True):
+        self.trace_memory = enabled
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _frames(self):
+        if not hasattr(self._local, 'frames'):
+            self._local.frames = []
+        return self._local.frames
+
+    @contextmanager
+    def stage(self, name):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        frames = self._frames()
+        frame = None
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak would hide what enclosing stages saw so far, so hand it to them first
+            for outer in frames:
+                outer['peak'] = max(outer['peak'], peak)
+            tracemalloc.reset_peak()
+            frame = {'start': current, 'peak': current}
+            frames.append(frame)
+        error = None
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak_bytes = None
+            if frame is not None:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1]) if tracemalloc.is_tracing() else frame['peak']
+                frames.remove(frame)
+                for outer in frames:
+                    outer['peak'] = max(outer['peak'], peak)
+                peak_bytes = max(peak - frame['start'], 0)
+            self._record(name, wall, cpu, peak_bytes, error)
+
+    def _record(self, name, wall, cpu, peak_bytes, error):
+        with self._lock:
+            stats = self._stages.setdefault(name, StageStats())
+            stats.runs += 1
+            stats.errors += error is not None
+            stats.wall_seconds += wall
+            stats.cpu_seconds += cpu
+            stats.last_wall_seconds = wall
+            stats.last_cpu_seconds = cpu
+            if peak_bytes is not None:
+                stats.last_peak_bytes = peak_bytes
+                stats.peak_bytes = max(stats.peak_bytes or 0, peak_bytes)
+            self._events.append({'ts': time.time(), 'type': 'stage', 'stage': name, 'wall_seconds': wall,
+                                 'cpu_seconds': cpu, 'peak_bytes': peak_bytes,
+                                 'error': None if error is None else type(error).__name__})
+
+    def cache(self, name, hit):
+        """Count one lookup in cache ``name``."""
+        with self._lock:
+            counts = self._caches.setdefault(name, {'hit': 0, 'miss': 0})
+            counts['hit' if hit else 'miss'] += 1
+
+    def stages(self):
+        with self._lock:
+            return {name: StageStats(**asdict(stats)) for name, stats in self._stages.items()}
+
+    def caches(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._caches.items()}
+
+    def stages_frame(self):
+        """One row per stage with totals, means and the latest run."""
+        rows = []
+        for name, stats in sorted(self.stages().items()):
+            row = {'stage': name, **asdict(stats)}
+            row['mean_wall_seconds'] = stats.wall_seconds / stats.runs if stats.runs else None
+            rows.append(row)
+        return pd.DataFrame(rows).set_index('stage') if rows else pd.DataFrame()
+
+    def caches_frame(self):
+        rows = [{'cache': name, **counts, 'hit_ratio': counts['hit'] / max(counts['hit'] + counts['miss'], 1)}
+                for name, counts in sorted(self.caches().items())]
+        return pd.DataFrame(rows).set_index('cache') if rows else pd.DataFrame()
+
+    def to_prometheus(self):
+        """All counters in the Prometheus text exposition format."""
+        stages = sorted(self.stages().items())
+        caches = sorted(self.caches().items())
+        lines = []
+
+        def family(metric, kind, help_text, samples):
+            lines.append(f'# HELP {METRIC_PREFIX}_{metric} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{metric} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f'{METRIC_PREFIX}_{metric}{{{label_text}}} {value}')
+
+        family('stage_runs_total', 'counter', 'Completed runs of each stage.',
+               [({'stage': name}, stats.runs) for name, stats in stages])
+        family('stage_errors_total', 'counter', 'Runs of each stage that raised.',
+               [({'stage': name}, stats.errors) for name, stats in stages])
+        family('stage_wall_seconds_total', 'counter', 'Wall-clock seconds spent in each stage.',
+               [({'stage': name}, repr(stats.wall_seconds)) for name, stats in stages])
+        family('stage_cpu_seconds_total', 'counter', 'Process CPU seconds spent in each stage.',
+               [({'stage': name}, repr(stats.cpu_seconds)) for name, stats in stages])
+        family('stage_last_wall_seconds', 'gauge', 'Wall-clock seconds of the latest run of each stage.',
+               [({'stage': name}, repr(stats.last_wall_seconds)) for name, stats in stages])
+        family('stage_peak_bytes', 'gauge', 'Largest traced allocation during any run of each stage.',
+               [({'stage': name}, stats.peak_bytes) for name, stats in stages if stats.peak_bytes is not None])
+        family('cache_requests_total', 'counter', 'Cache lookups by cache and result.',
+               [({'cache': name, 'result': result}, counts[result]) for name, counts in caches for result in ('hit', 'miss')])
+        return '\n'.join(lines) + '\n'
+
+    def drain_events(self):
+        """Return and forget the stage events recorded since the last drain."""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def to_json_lines(self, events=None):
+        """Stage events (by default, all not yet drained) followed by one line of cache counters."""
+        if events is None:
+            with self._lock:
+                events = list(self._events)
+        lines = [json.dumps(event) for event in events]
+        lines.append(json.dumps({'ts': time.time(), 'type': 'cache', 'caches': self.caches()}))
+        return '\n'.join(lines) + '\n'
+
+    def export(self, directory, formats=('prometheus', 'jsonl'), name='app'):
+        """Write ``<name>.prom`` (replaced atomically) and/or append new events to ``<name>.jsonl``."""
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        if 'prometheus' in formats:
+            path = os.path.join(directory, f'{name}.prom')
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.prom')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(self.to_prometheus())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            written.append(path)
+        if 'jsonl' in formats:
+            path = os.path.join(directory, f'{name}.jsonl')
+            with open(path, 'a') as f:
+                f.write(self.to_json_lines(self.drain_events()))
+            written.append(path)
+        return written
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._caches.clear()
+            self._events.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide instance shared by the app and the library modules
+telemetry = Instrumentation()
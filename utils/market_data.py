@@ -0,0 +1,248 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.throttle import current_priority
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+QUOTE_COLUMNS = ['price', 'change', 'bid', 'ask', 'spread']
+
+# Rough length of each Yahoo period, used to tell whether stored history covers a request
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, 'ytd': 366,
+    '2y': 731, '5y': 1827, '10y': 3653, 'max': float('inf'),
+}
+
+# Tail requests whose starts are this close share one request; the few overlapping bars are refetched
+TAIL_GROUP_SPAN = pd.Timedelta(hours=1)
+
+
+class MarketDataProvider:
+    """Interface for a source of OHLCV bars and bid/ask quotes.
+
+    ``bars`` returns ``{symbol: DataFrame}`` with a DatetimeIndex and the
+    ``OHLCV_COLUMNS``; ``book`` returns ``{symbol: {'bid': ..., 'ask': ...}}``.
+    Symbols the provider has no data for are simply left out.
+    """
+
+    def bars(self, symbols, period="1d", interval="1m", start=None):
+        raise NotImplementedError
+
+    def book(self, symbols):
+        return {}
+
+
+def _yfinance():
+    # yfinance is slow to import, so it loads on the first Yahoo request rather than at startup
+    import yfinance
+    return yfinance
+
+
+class YahooProvider(MarketDataProvider):
+    """Yahoo Finance provider that downloads all symbols in one request.
+
+    With a ``gate`` (``utils.throttle.ProviderGate``) identical concurrent
+    requests are coalesced and all requests share one rate limit.
+    """
+
+    def __init__(self, session=None, timeout=10, max_workers=8, gate=None):
+        self.session = session
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.gate = gate
+
+    def _call(self, key, fn, *args, priority=None, **kwargs):
+        if self.gate is None:
+            return fn(*args, **kwargs)
+        return self.gate.call(key, fn, *args, priority=priority, **kwargs)
+
+    def bars(self, symbols, period="1d", interval="1m", start=None):
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        kwargs = {'interval': interval, 'group_by': 'ticker', 'progress': False,
+                  'timeout': self.timeout, 'session': self.session}
+        if start is not None:
+            kwargs['start'] = start
+        else:
+            kwargs['period'] = period
+        key = ('download', tuple(symbols), interval, period if start is None else None, start)
+        frame = self._call(key, _yfinance().download, symbols, **kwargs)
+        return split_download(frame, symbols)
+
+    def book(self, symbols):
+        # Yahoo has no batched bid/ask endpoint, so the info lookups run concurrently
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        # Pool threads don't inherit the caller's priority, so it is passed along explicitly
+        priority = None if self.gate is None else current_priority()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as pool:
+            return dict(zip(symbols, pool.map(lambda symbol: self._book_one(symbol, priority), symbols)))
+
+    def _info(self, symbol):
+        return _yfinance().Ticker(symbol, session=self.session).info
+
+    def _book_one(self, symbol, priority=None):
+        try:
+            info = self._call(('info', symbol), self._info, symbol, priority=priority)
+        except Exception:
+            return {'bid': None, 'ask': None}
+        return {'bid': info.get('bid'), 'ask': info.get('ask')}
+
+
+class StaticProvider(MarketDataProvider):
+    """Offline provider serving fixed frames, for tests and demos."""
+
+    def __init__(self, frames=None, books=None):
+        self.frames = dict(frames or {})
+        self.books = dict(books or {})
+        self.calls = []
+
+    def bars(self, symbols, period="1d", interval="1m", start=None):
+        self.calls.append(('bars', tuple(symbols), period, interval, start))
+        result = {}
+        for symbol in symbols:
+            frame = self.frames.get(symbol)
+            if frame is None:
+                continue
+            if start is not None:
+                frame = frame[frame.index >= _align_tz(pd.Timestamp(start), frame.index)]
+            result[symbol] = frame
+        return result
+
+    def book(self, symbols):
+        self.calls.append(('book', tuple(symbols)))
+        return {symbol: self.books[symbol] for symbol in symbols if symbol in self.books}
+
+
+def _align_tz(ts, index):
+    # Compare timestamps in the index's timezone; naive values are treated as UTC
+    tz = getattr(index, 'tz', None)
+    if ts.tzinfo is None:
+        return ts if tz is None else ts.tz_localize('UTC').tz_convert(tz)
+    return ts.tz_convert(tz) if tz is not None else ts.tz_convert('UTC').tz_localize(None)
+
+
+def split_download(frame, symbols):
+    """Split a (possibly multi-ticker) ``yf.download`` frame into per-symbol frames."""
+    if frame is None or frame.empty:
+        return {}
+    result = {}
+    if isinstance(frame.columns, pd.MultiIndex):
+        # group_by='ticker' puts the symbol on level 0, the default puts it on level 1
+        level = 0 if set(symbols) & set(frame.columns.get_level_values(0)) else 1
+        for symbol in symbols:
+            if symbol not in frame.columns.get_level_values(level):
+                continue
+            sub = frame.xs(symbol, axis=1, level=level)
+            result[symbol] = _clean_bars(sub)
+    elif len(symbols) == 1:
+        result[symbols[0]] = _clean_bars(frame)
+    return {symbol: sub for symbol, sub in result.items() if not sub.empty}
+
+
+def group_by_start(starts, span=TAIL_GROUP_SPAN):
+    """Batch ``{symbol: start}`` into ``[(start, [symbols])]`` for tail requests.
+
+    Each batch holds the starts within ``span`` of its earliest one, so a
+    single stale symbol does not drag every other symbol's request back.
+    """
+    groups = []
+    for symbol, start in sorted(starts.items(), key=lambda item: item[1]):
+        if groups and start - groups[-1][0] <= span:
+            groups[-1][1].append(symbol)
+        else:
+            groups.append((start, [symbol]))
+    return groups
+
+
+def _clean_bars(frame):
+    columns = [c for c in OHLCV_COLUMNS if c in frame.columns]
+    # A batched download aligns every symbol on one index, so drop the padding rows
+    return frame[columns].dropna(how='all')
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(value) else value
+
+
+def summarize_quote(bars=None, book=None):
+    """Reduce intraday bars and a bid/ask quote to the card metrics."""
+    price = change = None
+    if bars is not None and not bars.empty:
+        price = _to_float(bars['Close'].iloc[-1])
+        open_price = _to_float(bars['Open'].iloc[0])
+        if price is not None and open_price:
+            change = ((price - open_price) / open_price) * 100
+    book = book or {}
+    bid = _to_float(book.get('bid'))
+    ask = _to_float(book.get('ask'))
+    spread = abs(ask - bid) if bid is not None and ask is not None else None
+    return {'price': price, 'change': change, 'bid': bid, 'ask': ask, 'spread': spread}
+
+
+class QuoteEngine:
+    """Fetches quotes for many symbols with one bars request and one book request.
+
+    With an ``aggregator`` (``utils.aggregation.BarAggregator``) the 1-minute
+    bars are kept rather than discarded. Later calls only request bars from
+    the newest one held, one request per group of similar starts (see
+    ``group_by_start``), and the quotes gain a ``sparkline`` column with
+    the closes of the last ``sparkline_points`` ``sparkline_timeframe`` bars.
+    """
+
+    def __init__(self, provider=None, with_book=True, aggregator=None, sparkline_timeframe='15m', sparkline_points=32):
+        self.provider = provider if provider is not None else YahooProvider()
+        self.with_book = with_book
+        self.aggregator = aggregator
+        self.sparkline_timeframe = sparkline_timeframe
+        self.sparkline_points = sparkline_points
+
+    def _aggregated_bars(self, symbols, period, interval):
+        # Symbols seen within the period only need the tail since their newest bar; the rest, including
+        # any whose newest bar is older than the period (beyond what Yahoo serves for 1m bars), get the period
+        now, days = pd.Timestamp.now(tz='UTC'), PERIOD_DAYS.get(period, 1)
+        last = {symbol: self.aggregator.last_timestamp(symbol) for symbol in symbols}
+        fresh = [symbol for symbol in symbols
+                 if last[symbol] is None or (now - last[symbol]) / pd.Timedelta(days=1) > days]
+        tails = {symbol: last[symbol] for symbol in symbols if symbol not in fresh}
+        fetched = {}
+        if fresh:
+            fetched.update(self.provider.bars(fresh, period=period, interval=interval))
+        for start, group in group_by_start(tails):
+            fetched.update(self.provider.bars(group, period=period, interval=interval, start=start.to_pydatetime()))
+        for symbol, bars in fetched.items():
+            self.aggregator.update(symbol, bars)
+        # The forming daily bar, anchored at the session open, gives the day's open and latest close
+        return {symbol: self.aggregator.bars(symbol, '1d').iloc[-1:] for symbol in symbols
+                if self.aggregator.last_timestamp(symbol) is not None}
+
+    def get_quotes(self, symbols, period="1d", interval="1m"):
+        """Return a DataFrame indexed by symbol with ``QUOTE_COLUMNS`` (and ``sparkline`` when aggregating)."""
+        symbols = list(dict.fromkeys(symbols))
+        try:
+            if self.aggregator is None:
+                bars = self.provider.bars(symbols, period=period, interval=interval)
+            else:
+                bars = self._aggregated_bars(symbols, period, interval)
+        except Exception:
+            bars = {}
+        try:
+            books = self.provider.book(symbols) if self.with_book else {}
+        except Exception:
+            books = {}
+        rows = [summarize_quote(bars.get(symbol), books.get(symbol)) for symbol in symbols]
+        quotes = pd.DataFrame(rows, columns=QUOTE_COLUMNS, index=pd.Index(symbols, name='symbol'))
+        quotes = quotes.astype(object).where(quotes.notna(), None)
+        if self.aggregator is not None:
+            quotes['sparkline'] = [tuple(self.aggregator.sparkline(symbol, self.sparkline_timeframe, self.sparkline_points))
+                                   for symbol in symbols]
+        return quotes
@@ -0,0 +1,124 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from utils.instrumentation import telemetry
+from utils.market_data import QUOTE_COLUMNS, QuoteEngine
+from utils.throttle import background
+
+
+@dataclass(frozen=True)
+class QuoteSnapshot:
+    # Indexed by symbol with QUOTE_COLUMNS plus 'updated_at' (epoch seconds of that symbol's last good quote)
+    quotes: pd.DataFrame
+    refreshed_at: float = None
+    error: str = None
+    failures: int = 0
+    symbols: tuple = field(default=())
+
+    def get(self, symbol):
+        """The symbol's last good quote as a dict, or None if it was never fetched."""
+        if symbol not in self.quotes.index:
+            return None
+        return self.quotes.loc[symbol].to_dict()
+
+    def age(self, symbol, now=None):
+        """Seconds since the symbol's last good quote, or None if it was never fetched."""
+        quote = self.get(symbol)
+        if quote is None or quote['updated_at'] is None:
+            return None
+        return (now if now is not None else time.time()) - quote['updated_at']
+
+
+def _empty_quotes():
+    return pd.DataFrame(columns=QUOTE_COLUMNS + ['updated_at'], index=pd.Index([], name='symbol'), dtype=object)
+
+
+class QuotePrefetcher:
+    """Keeps quotes for a fixed set of symbols warm on a background thread.
+
+    Readers only ever call ``snapshot()``, which returns the latest immutable
+    ``QuoteSnapshot`` without touching the network, so page renders never
+    wait on the provider. The thread refreshes every ``interval`` seconds;
+    after failures it backs off exponentially up to ``max_backoff``. Every
+    sleep is jittered by ±``jitter`` so many processes don't refresh in
+    lockstep. Symbols missing from a refresh keep their previous quote and
+    its timestamp. With a ``shared`` cache (``utils.shared_cache.SharedCache``)
+    the worker processes on a host share one fetch per ``interval``.
+    """
+
+    def __init__(self, symbols, engine=None, interval=60, max_backoff=600, jitter=0.2, shared=None):
+        self.symbols = tuple(dict.fromkeys(symbols))
+        self.engine = engine if engine is not None else QuoteEngine()
+        self.shared = shared
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self._snapshot = QuoteSnapshot(_empty_quotes(), symbols=self.symbols)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def snapshot(self):
+        return self._snapshot
+
+    def _fetch(self):
+        with telemetry.stage('fetch.quotes'):
+            return time.time(), self.engine.get_quotes(self.symbols)
+
+    def refresh(self):
+        """Fetch every symbol once and publish a new snapshot; returns it."""
+        previous = self._snapshot
+        now = time.time()
+        try:
+            if self.shared is None:
+                now, fresh = self._fetch()
+            else:
+                # Carries the fetch time, so quotes fetched by another worker keep their true age
+                now, fresh = self.shared.get_or_compute('quotes:' + ','.join(self.symbols), self._fetch, ttl=self.interval)
+            fetched = fresh[fresh['price'].notna()]
+            error = None if len(fetched) else 'no quotes returned'
+        except Exception as e:
+            fetched, error = _empty_quotes(), str(e)
+        if len(fetched):
+            fetched = fetched.assign(updated_at=now)
+            kept = previous.quotes.drop(fetched.index, errors='ignore')
+            quotes = pd.concat([kept, fetched]) if len(kept) else fetched
+            quotes = quotes.reindex([s for s in self.symbols if s in quotes.index])
+        else:
+            quotes = previous.quotes
+        snapshot = QuoteSnapshot(quotes, refreshed_at=now if error is None else previous.refreshed_at,
+                                 error=error, failures=0 if error is None else previous.failures + 1,
+                                 symbols=self.symbols)
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def next_delay(self, failures):
+        """Seconds to wait before the next refresh, backing off after failures."""
+        base = min(self.interval * 2 ** failures, self.max_backoff) if failures else self.interval
+        return base * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Scheduled refreshes give way to user-triggered requests at the provider's rate limit
+            with background():
+                snapshot = self.refresh()
+            self._stop.wait(self.next_delay(snapshot.failures))
+
+    def start(self):
+        """Start the refresher thread if it isn't already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='quote-prefetcher', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
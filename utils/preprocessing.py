@@ -0,0 +1,88 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Default cut-off for each outlier policy: 3 sigma, Tukey's 1.5 IQR fences and 3.5 robust z
+OUTLIER_POLICIES = {'zscore': 3.0, 'iqr': 1.5, 'mad': 3.5}
+
+
+@dataclass
+class PreprocessReport:
+    """What preprocessing removed and why."""
+    policy: str
+    threshold: float
+    rows_before: int
+    missing_before: int
+    dropped_missing: int
+    dropped_outliers: int
+    rows_after: int
+    missing_after: int
+    # Rows flagged by each column; a row can be flagged by several columns
+    outliers_by_column: dict = field(default_factory=dict)
+
+    def to_frame(self):
+        counts = pd.Series(self.outliers_by_column, name='outlier rows', dtype='int64')
+        return counts[counts > 0].sort_values(ascending=False).to_frame()
+
+
+def _numeric_matrix(frame):
+    # Keep float32 data in float32; nullable and mixed integer columns go through float64
+    dtypes = set(frame.dtypes)
+    if len(dtypes) == 1 and isinstance(next(iter(dtypes)), np.dtype) and next(iter(dtypes)).kind == 'f':
+        return frame.to_numpy()
+    return frame.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def outlier_flags(values, policy='zscore', threshold=None):
+    """Return a boolean (rows, columns) array marking outliers in every column at once."""
+    if policy not in OUTLIER_POLICIES:
+        raise ValueError(f"Unknown outlier policy {policy!r}; choose one of {sorted(OUTLIER_POLICIES)}")
+    k = OUTLIER_POLICIES[policy] if threshold is None else threshold
+    if values.shape[0] == 0:
+        return np.zeros(values.shape, dtype=bool)
+    if policy == 'zscore':
+        center = values.mean(axis=0, dtype=np.float64)
+        scale = values.std(axis=0, ddof=1, dtype=np.float64) if values.shape[0] > 1 else np.zeros(values.shape[1])
+        flags = np.abs(values - center) > k * scale
+    elif policy == 'iqr':
+        q1, q3 = np.percentile(values, [25, 75], axis=0)
+        scale = q3 - q1
+        flags = (values < q1 - k * scale) | (values > q3 + k * scale)
+    else:
+        center = np.median(values, axis=0)
+        scale = np.median(np.abs(values - center), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 0.6745 makes the MAD a consistent estimator of sigma for normal data
+            flags = np.abs(0.6745 * (values - center) / scale) > k
+    # Constant columns have no spread to measure outliers against
+    flags[:, ~(scale > 0)] = False
+    return flags
+
+
+def preprocess(data, policy='zscore', threshold=None):
+    """Drop rows with missing values, then rows flagged as outliers in any numeric column.
+
+    Column statistics are computed once on the missing-value-free frame and a
+    single combined mask is applied, so the result does not depend on column order.
+    """
+    threshold = OUTLIER_POLICIES.get(policy, 0.0) if threshold is None else threshold
+    rows_before = data.shape[0]
+    missing_before = int(data.isnull().sum().sum())
+    data_clean = data.dropna()
+    numeric_cols = data_clean.select_dtypes(include=[np.number]).columns
+    flags = outlier_flags(_numeric_matrix(data_clean[numeric_cols]), policy, threshold)
+    keep = ~flags.any(axis=1)
+    result = data_clean[keep]
+    report = PreprocessReport(
+        policy=policy,
+        threshold=threshold,
+        rows_before=rows_before,
+        missing_before=missing_before,
+        dropped_missing=rows_before - data_clean.shape[0],
+        dropped_outliers=int((~keep).sum()),
+        rows_after=result.shape[0],
+        missing_after=int(result.isnull().sum().sum()),
+        outliers_by_column=dict(zip(numeric_cols, flags.sum(axis=0).tolist())),
+    )
+    return result, report
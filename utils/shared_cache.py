@@ -0,0 +1,153 @@
+import os
+import pickle
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+
+from utils.instrumentation import telemetry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+_MISSING = object()
+
+
+class SharedCache:
+    """Key/value cache in one SQLite file that every process on the host shares.
+
+    Values are pickled, so only use it for data this app produced. Entries
+    expire ``ttl`` seconds after they are written. When the stored values
+    grow beyond ``max_bytes``, expired entries are dropped first and then
+    the least recently read ones. WAL mode lets readers in other processes
+    carry on while one process writes.
+
+    ``get_or_compute`` also coalesces misses across processes. The first
+    caller takes a lease on the key and computes the value. Everyone else
+    polls for the value instead of calling upstream too. A lease lapses
+    after ``lease_seconds``, so a crashed owner cannot block the key for
+    long.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, default_ttl=300, lease_seconds=30, poll_interval=0.05):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._owner = f'{os.getpid()}-{uuid.uuid4().hex}'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Short-lived connections, as in BarStore, so one instance is safe to share across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def get(self, key, default=None):
+        """The live value for ``key``, or ``default`` if it is missing or expired."""
+        value = self._get(key)
+        return default if value is _MISSING else value
+
+    def _get(self, key):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT value, expires_at, accessed_at FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] <= now:
+                return _MISSING
+            # Recency only steers eviction, so it is refreshed at most once a second per key
+            if now - row[2] > 1:
+                with conn:
+                    conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` for ``ttl`` seconds (``default_ttl`` if None), evicting if over budget."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                         (key, sqlite3.Binary(blob), len(blob), now + ttl, now))
+            self._evict(conn, now)
+
+    def delete(self, key):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+        excess = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed_at'):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+
+    def _acquire(self, key):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM leases WHERE key = ? AND expires_at <= ?', (key, now))
+            return conn.execute('INSERT OR IGNORE INTO leases VALUES (?, ?, ?)',
+                                (key, self._owner, now + self.lease_seconds)).rowcount == 1
+
+    def _release(self, key):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, self._owner))
+
+    def get_or_compute(self, key, compute, ttl=None, wait=None):
+        """Return the cached value for ``key``, or compute it once for every waiting process.
+
+        Callers that lose the race for the lease wait up to ``wait`` seconds
+        (default ``lease_seconds``) for the winner's value. After that they
+        compute it themselves. If ``compute`` raises, nothing is stored and the
+        error propagates to that caller only.
+        """
+        value = self._get(key)
+        telemetry.cache('shared', value is not _MISSING)
+        if value is not _MISSING:
+            return value
+        deadline = time.monotonic() + (self.lease_seconds if wait is None else wait)
+        while True:
+            if self._acquire(key):
+                try:
+                    # Another process may have stored it between the miss and the lease
+                    value = self._get(key)
+                    if value is _MISSING:
+                        value = compute()
+                        self.set(key, value, ttl)
+                    return value
+                finally:
+                    self._release(key)
+            time.sleep(self.poll_interval)
+            value = self._get(key)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() > deadline:
+                return compute()
+
+    def stats(self):
+        """Entry count and stored bytes, counting expired entries not yet evicted."""
+        with closing(self._connect()) as conn:
+            entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'entries': entries, 'bytes': size}
@@ -0,0 +1,177 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from utils.instrumentation import telemetry
+
+# Lower values go first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority = ContextVar('fetch_priority', default=INTERACTIVE)
+
+
+def current_priority():
+    """Priority of provider calls made from this thread or task (INTERACTIVE unless inside ``background()``)."""
+    return _priority.get()
+
+
+@contextmanager
+def background():
+    """Mark the provider calls made inside the block as background work."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimited(TimeoutError):
+    """A provider call waited longer than its gate allows for a rate-limit token."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second up to ``burst``.
+
+    Interactive callers take a token whenever one is available. Background
+    callers also leave ``reserve`` tokens in the bucket and give way to any
+    waiting interactive caller. A refresh storm therefore cannot use up the
+    quota that user requests need.
+    """
+
+    def __init__(self, rate, burst, reserve=0):
+        if rate <= 0 or burst < 1:
+            raise ValueError('rate must be positive and burst at least 1')
+        self.rate = rate
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._interactive_waiting = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Take one token, waiting up to ``timeout`` seconds; raises ``RateLimited`` on timeout.
+
+        ``priority`` may be a callable, re-read on every wake-up, so a waiter
+        can be promoted while it waits.
+        """
+        read_priority = priority if callable(priority) else (lambda: priority)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        registered = False
+        with self._cond:
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    interactive = read_priority() == INTERACTIVE
+                    if interactive and not registered:
+                        self._interactive_waiting += 1
+                        registered = True
+                    needed = 1 if interactive else 1 + self.reserve
+                    if self._tokens >= needed and (interactive or not self._interactive_waiting):
+                        self._tokens -= 1
+                        return
+                    delay = max(needed - self._tokens, 0) / self.rate or 1 / self.rate
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise RateLimited(f'no rate-limit token within {timeout:g}s')
+                        delay = min(delay, deadline - now)
+                    self._cond.wait(delay)
+            finally:
+                if registered:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+    def wake(self):
+        """Make waiters re-check their priority."""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'priority')
+
+    def __init__(self, priority):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.priority = priority
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one in-flight call.
+
+    The first caller for a key runs it. Callers arriving while it runs wait
+    and get the same result or exception. Nothing is kept once the call
+    finishes, so this is coalescing, not caching. A waiter with a higher
+    priority promotes the flight, and ``on_promote`` is called so that
+    whatever the leader is queued on can notice.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, priority=INTERACTIVE, on_promote=None):
+        """Run ``fn(flight)`` once for all concurrent callers of ``key``; returns ``(result, joined)``."""
+        promoted = False
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(priority)
+            elif priority < flight.priority:
+                flight.priority = priority
+                promoted = True
+        if not leader:
+            if promoted and on_promote is not None:
+                on_promote()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn(flight)
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class ProviderGate:
+    """Single-flight coalescing plus a token-bucket rate limit for one upstream provider.
+
+    ``call(key, fn, ...)`` joins an identical in-flight request if there is
+    one. Otherwise it waits for a token, at the caller's priority, and makes
+    the call. Interactive callers give up with ``RateLimited`` after
+    ``timeout`` seconds. Background callers wait up to ``background_timeout``.
+    """
+
+    def __init__(self, name, rate, burst, background_reserve=0.25, timeout=10, background_timeout=120):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst, reserve=int(burst * background_reserve))
+        self.timeout = timeout
+        self.background_timeout = background_timeout
+        self._flights = SingleFlight()
+
+    def call(self, key, fn, *args, priority=None, **kwargs):
+        priority = current_priority() if priority is None else priority
+
+        def run(flight):
+            self.bucket.acquire(lambda: flight.priority,
+                                self.timeout if flight.priority == INTERACTIVE else self.background_timeout)
+            return fn(*args, **kwargs)
+
+        result, joined = self._flights.do((self.name, key), run, priority, on_promote=self.bucket.wake)
+        telemetry.cache(f'{self.name}.inflight', joined)
+        return result
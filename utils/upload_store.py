@@ -0,0 +1,61 @@
+import hashlib
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils.ingest import read_upload
+from utils.instrumentation import telemetry
+
+
+class UploadStore:
+    """Content-addressed cache of parsed uploads stored as uncompressed Feather files.
+
+    Each upload is parsed once and written to ``<root>/<sha256>.feather``.
+    Later loads memory-map that file, so identical uploads from any session
+    share one copy on disk and in the OS page cache.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def digest(raw):
+        return hashlib.sha256(raw).hexdigest()
+
+    def path_for(self, digest):
+        return os.path.join(self.root, f'{digest}.feather')
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def add(self, digest, source, name='upload.csv', progress=None):
+        """Parse ``source`` (bytes or a binary file) and store it unless ``digest`` is already stored."""
+        if digest not in self:
+            with telemetry.stage('upload_parse'):
+                self.write(digest, read_upload(source, name, progress=progress))
+
+    def load(self, digest, raw=None, name='upload.csv'):
+        """Return the dataset for ``digest``, parsing ``raw`` first if it is not stored yet."""
+        if raw is not None:
+            self.add(digest, raw, name)
+        elif digest not in self:
+            raise KeyError(digest)
+        table = feather.read_table(self.path_for(digest), memory_map=True)
+        # split_blocks lets null-free numeric columns stay zero-copy views of the mapped file
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def write(self, digest, frame):
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        # Write to a temp file and rename so concurrent sessions never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        os.close(fd)
+        try:
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, self.path_for(digest))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+